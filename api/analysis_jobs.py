@@ -0,0 +1,382 @@
+"""
+Background GDPR analysis jobs.
+
+A job runs extract_schema_metadata + perform_gdpr_analysis for one database
+on a small bounded worker pool, so the HTTP request only submits and polls.
+Job state and results live in a local SQLite store: progress (tables sampled
+out of the total, ETA) is updated while sampling runs, and finished results
+are read back in pages.
+
+Several worker processes can share the store: each job records its owner
+(the process running it) and a heartbeat that the owner renews every
+ANALYSIS_HEARTBEAT_INTERVAL. Only jobs whose heartbeat is older than
+ANALYSIS_HEARTBEAT_TIMEOUT (the owner died) are marked "interrupted". The
+same heartbeat round picks up cancellations made through any process.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from gdpr_risk_analyzer import extract_schema_metadata, perform_gdpr_analysis
+
+# === Analysis Jobs ===
+ANALYSIS_JOB_DB = os.getenv(
+    "ANALYSIS_JOB_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".analysis_jobs.sqlite")
+)
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "2"))    # databases analysed at once
+ANALYSIS_MAX_ACTIVE = int(os.getenv("ANALYSIS_MAX_ACTIVE", "16"))     # queued + running jobs accepted
+ANALYSIS_PROGRESS_INTERVAL = 1.0     # seconds between progress writes
+ANALYSIS_RESULTS_BATCH = 5000        # result rows per insert
+ANALYSIS_PAGE_SIZE = 500
+ANALYSIS_HEARTBEAT_INTERVAL = 2.0    # seconds between heartbeats / cancellation checks of a process's jobs
+ANALYSIS_HEARTBEAT_TIMEOUT = 30.0    # heartbeat age after which a job's owner counts as gone
+
+ACTIVE_STATUSES = ("queued", "running", "cancelling")
+FINISHED_STATUSES = ("done", "failed", "cancelled", "interrupted")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    database_name TEXT NOT NULL,
+    refresh INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    phase TEXT,
+    tables_done INTEGER NOT NULL DEFAULT 0,
+    tables_total INTEGER,
+    result_rows INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    sampling_started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (job_id, row_number)
+);
+"""
+# Columns added after the first release, for stores created before them
+MIGRATIONS = {"owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+              "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL"}
+
+
+class JobLimitReached(Exception):
+    pass
+
+
+class AnalysisJobStore:
+    """SQLite-backed job table; one short-lived connection per operation"""
+
+    def __init__(self, path: str = ANALYSIS_JOB_DB, owner: str = None):
+        self.path = path
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in existing:
+                    conn.execute(statement)
+        self.interrupt_stale()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def insert(self, job: dict):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, database_name, refresh, status, created_at, owner, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["job_id"], job["database_name"], int(job["refresh"]), job["status"], job["created_at"],
+                 self.owner, job["created_at"])
+            )
+
+    def heartbeat(self) -> dict:
+        """Renew the heartbeat of this owner's active jobs; returns their job_id -> status"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN (?, ?, ?)",
+                (time.time(), self.owner, *ACTIVE_STATUSES)
+            )
+            rows = conn.execute(
+                "SELECT job_id, status FROM jobs WHERE owner = ? AND status IN (?, ?, ?, ?)",
+                (self.owner, *ACTIVE_STATUSES, "cancelled")
+            ).fetchall()
+        return {row["job_id"]: row["status"] for row in rows}
+
+    def interrupt_stale(self, timeout: float = ANALYSIS_HEARTBEAT_TIMEOUT) -> int:
+        """Mark active jobs of other owners without a recent heartbeat "interrupted"; returns how many"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'interrupted', finished_at = ? "
+                "WHERE status IN (?, ?, ?) AND (owner IS NULL OR owner != ?) "
+                "AND COALESCE(heartbeat_at, created_at) < ?",
+                (now, *ACTIVE_STATUSES, self.owner, now - timeout)
+            )
+            return cursor.rowcount
+
+    def update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def transition(self, job_id: str, from_statuses, **fields) -> bool:
+        """Update a job only if its status is one of from_statuses; returns whether it was"""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        placeholders = ", ".join("?" * len(from_statuses))
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ? AND status IN ({placeholders})",
+                (*fields.values(), job_id, *from_statuses)
+            )
+            return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown analysis job: {job_id}")
+        return dict(row)
+
+    def list(self, limit: int = 100) -> list:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_active(self) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?, ?)", ACTIVE_STATUSES
+            ).fetchone()[0]
+
+    def save_results(self, job_id: str, lines: list):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            for start in range(0, len(lines), ANALYSIS_RESULTS_BATCH):
+                conn.executemany(
+                    "INSERT INTO results (job_id, row_number, record) VALUES (?, ?, ?)",
+                    ((job_id, start + i, line) for i, line in enumerate(lines[start:start + ANALYSIS_RESULTS_BATCH]))
+                )
+
+    def results(self, job_id: str, offset: int, limit: int) -> list:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT record FROM results WHERE job_id = ? AND row_number >= ? ORDER BY row_number LIMIT ?",
+                (job_id, offset, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def delete(self, job_id: str, statuses=FINISHED_STATUSES) -> bool:
+        """Delete a job (and its results) if its status is one of statuses; returns whether it was"""
+        placeholders = ", ".join("?" * len(statuses))
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE job_id = ? AND status IN ({placeholders})", (job_id, *statuses)
+            )
+            if cursor.rowcount != 1:
+                return False
+            conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            return True
+
+
+class AnalysisJobManager:
+    def __init__(self, store: AnalysisJobStore = None, max_workers: int = ANALYSIS_MAX_WORKERS,
+                 max_active: int = ANALYSIS_MAX_ACTIVE):
+        self.store = store or AnalysisJobStore()
+        self.max_active = max_active
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._cancel_events = {}      # job_id -> Event, for queued/running jobs
+        self._submit_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="analysis-heartbeat",
+                                                  daemon=True)
+        self._heartbeat_thread.start()
+
+    # ----- Public API -----
+    def submit(self, database_name: str, refresh: bool = False) -> dict:
+        with self._submit_lock:
+            if self.store.count_active() >= self.max_active:
+                raise JobLimitReached(f"{self.max_active} analysis jobs already queued or running")
+            job = {
+                "job_id": uuid.uuid4().hex[:12],
+                "database_name": database_name,
+                "refresh": refresh,
+                "status": "queued",
+                "created_at": time.time(),
+            }
+            self.store.insert(job)
+            self._cancel_events[job["job_id"]] = threading.Event()
+        self._executor.submit(self._run, job["job_id"], database_name, refresh)
+        return self.status(job["job_id"])
+
+    def status(self, job_id: str) -> dict:
+        return self._describe(self.store.get(job_id))
+
+    def list(self) -> list:
+        return [self._describe(job) for job in self.store.list()]
+
+    def results(self, job_id: str, offset: int = 0, limit: int = ANALYSIS_PAGE_SIZE) -> dict:
+        job = self.store.get(job_id)
+        if job["status"] != "done":
+            raise ValueError(f"Analysis job {job_id} is {job['status']}, results are not available")
+        data = self.store.results(job_id, offset, limit)
+        next_offset = offset + len(data)
+        return {
+            "job_id": job_id,
+            "total": job["result_rows"],
+            "offset": offset,
+            "limit": limit,
+            "next_offset": next_offset if next_offset < job["result_rows"] else None,
+            "data": data,
+        }
+
+    def cancel_or_delete(self, job_id: str) -> dict:
+        """
+        Cancel a queued/running job; delete a finished one (and its results).
+        Every step is a conditional update, so a job that finishes meanwhile
+        is deleted instead of being left "cancelling" forever.
+        """
+        while True:
+            status = self.store.get(job_id)["status"]
+            if status == "cancelling":
+                return self.status(job_id)
+            if status in FINISHED_STATUSES:
+                if self.store.delete(job_id):
+                    return {"job_id": job_id, "status": "deleted"}
+                continue
+            event = self._cancel_events.get(job_id)
+            if status == "queued" and self.store.transition(job_id, ("queued",), status="cancelled",
+                                                            finished_at=time.time()):
+                if event is not None:
+                    event.set()
+                return self.status(job_id)
+            if status == "running" and self.store.transition(job_id, ("running",), status="cancelling"):
+                if event is not None:
+                    event.set()
+                return self.status(job_id)
+
+    def shutdown(self):
+        self._stopped.set()
+        for event in self._cancel_events.values():
+            event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ----- Heartbeat -----
+    def heartbeat(self):
+        """
+        One round: renew this process's jobs, cancel those cancelled through
+        another process, interrupt jobs whose owner stopped heartbeating
+        """
+        for job_id, status in self.store.heartbeat().items():
+            event = self._cancel_events.get(job_id)
+            if event is not None and status in ("cancelling", "cancelled"):
+                event.set()
+        stale = self.store.interrupt_stale()
+        if stale:
+            print(f"⚠️ {stale} analysis job(s) lost their worker process, marked interrupted")
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(ANALYSIS_HEARTBEAT_INTERVAL):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"⚠️ Analysis job heartbeat failed: {e}")
+
+    # ----- Worker -----
+    def _run(self, job_id: str, database_name: str, refresh: bool):
+        event = self._cancel_events.get(job_id)
+        # Not started if it was cancelled while queued
+        if event is None or not self.store.transition(job_id, ("queued",), status="running", phase="metadata",
+                                                      started_at=time.time()):
+            self._cancel_events.pop(job_id, None)
+            return
+        last_write = [0.0]
+
+        def progress(done, total):
+            now = time.time()
+            if done == 0:
+                self.store.update(job_id, phase="sampling", tables_done=0, tables_total=total,
+                                  sampling_started_at=now)
+            elif done == total or now - last_write[0] >= ANALYSIS_PROGRESS_INTERVAL:
+                self.store.update(job_id, tables_done=done)
+            else:
+                return
+            last_write[0] = now
+
+        try:
+            schema_df = extract_schema_metadata(database_name, use_cache=not refresh)
+            if event.is_set():
+                raise CancelledError()
+            analysis_df = perform_gdpr_analysis(schema_df, database_name, progress=progress, cancel_event=event)
+            if event.is_set():
+                raise CancelledError()
+
+            self.store.update(job_id, phase="saving")
+            lines = analysis_df.to_json(orient="records", lines=True, date_format="iso").splitlines()
+            self.store.save_results(job_id, lines)
+            # Results are complete: a cancel that arrived while saving is too late
+            self.store.transition(job_id, ("running", "cancelling"), status="done", phase=None,
+                                  result_rows=len(lines), finished_at=time.time())
+            print(f"✅ Analysis job {job_id} ({database_name}): {len(lines)} columns")
+        except CancelledError:
+            self.store.transition(job_id, ("running", "cancelling"), status="cancelled", finished_at=time.time())
+            print(f"🛑 Analysis job {job_id} ({database_name}) cancelled")
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            self.store.transition(job_id, ("running", "cancelling"), status="failed", error=str(detail),
+                                  finished_at=time.time())
+            print(f"❌ Analysis job {job_id} ({database_name}) failed: {detail}")
+        finally:
+            self._cancel_events.pop(job_id, None)
+
+    @staticmethod
+    def _describe(job: dict) -> dict:
+        """Job row plus progress percentage and ETA for the sampling phase"""
+        eta = None
+        percent = None
+        done, total = job["tables_done"], job["tables_total"]
+        if total:
+            percent = round(done / total * 100, 1)
+            if job["status"] == "running" and 0 < done < total and job["sampling_started_at"]:
+                elapsed = time.time() - job["sampling_started_at"]
+                eta = round(elapsed / done * (total - done), 1)
+        return {
+            "job_id": job["job_id"],
+            "database_name": job["database_name"],
+            "status": job["status"],
+            "phase": job["phase"],
+            "tables_done": done,
+            "tables_total": total,
+            "percent": percent,
+            "eta_seconds": eta,
+            "result_rows": job["result_rows"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> AnalysisJobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = AnalysisJobManager()
+        return _manager
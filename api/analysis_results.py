@@ -0,0 +1,200 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from gdpr_risk_analyzer import perform_gdpr_analysis
+from sample_extraction import get_row_counts
+
+# === Analysis Results: filtering, projection, pagination, streaming ===
+# /analyze-gdpr results are filtered (risk level, category, table) and
+# projected on the server and serialized with pandas' JSON writer instead of
+# building one dict per row. Table filters are applied to the schema before
+# sampling, so analysing a few tables only samples those tables.
+#
+# Paginated requests keep the filtered result as a snapshot for a while; the
+# cursor names the snapshot and the position in it, so following pages are
+# consistent and do not re-run the analysis. NDJSON requests analyse and
+# stream the schema a few tables at a time, so the first rows go out before
+# the whole database has been sampled.
+ANALYSIS_SNAPSHOT_TTL = int(os.getenv("ANALYSIS_SNAPSHOT_TTL", "600"))  # seconds a paginated result is kept
+ANALYSIS_SNAPSHOT_CACHE_SIZE = 16       # snapshots kept (LRU)
+ANALYSIS_STREAM_TABLES = 50             # tables analysed per streamed chunk
+RISK_LEVELS = ("High", "Medium", "Low")
+ANALYSIS_FIELDS = [
+    'table_schema', 'table_name', 'column_name', 'data_type', 'is_primary_key',
+    'risk_level', 'gdpr_category', 'compliance_status', 'recommendation',
+    'sample_values', 'pii_detected', 'pii_confidence',
+]
+
+
+def parse_list(values) -> list:
+    """Repeated and/or comma-separated query values -> list of non-empty strings"""
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return [part.strip() for value in values for part in value.split(",") if part.strip()]
+
+
+def normalize_risk_levels(values) -> list:
+    levels = []
+    for value in parse_list(values):
+        level = value.capitalize()
+        if level not in RISK_LEVELS:
+            raise ValueError(f"Unknown risk level '{value}' (expected one of {', '.join(RISK_LEVELS)})")
+        levels.append(level)
+    return levels
+
+
+def filter_schema_tables(df_schema: pd.DataFrame, tables) -> pd.DataFrame:
+    """Keep only the requested tables ("schema.table" or "table", case-insensitive) before analysis"""
+    tables = parse_list(tables)
+    if not tables:
+        return df_schema
+    qualified = (df_schema['TABLE_SCHEMA'] + "." + df_schema['TABLE_NAME']).str.lower()
+    bare = df_schema['TABLE_NAME'].str.lower()
+    wanted = {table.lower() for table in tables}
+    return df_schema[qualified.isin(wanted) | bare.isin(wanted)]
+
+
+def filter_results(df_analysis: pd.DataFrame, risk_levels=None, categories=None) -> pd.DataFrame:
+    mask = pd.Series(True, index=df_analysis.index)
+    if risk_levels:
+        mask &= df_analysis['risk_level'].isin(risk_levels)
+    categories = parse_list(categories)
+    if categories:
+        mask &= df_analysis['gdpr_category'].str.lower().isin({category.lower() for category in categories})
+    return df_analysis[mask]
+
+
+def parse_fields(fields) -> list:
+    """Validated projection (empty = all fields); checked before any analysis runs"""
+    fields = list(dict.fromkeys(parse_list(fields)))
+    unknown = [field for field in fields if field not in ANALYSIS_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)} (available: {', '.join(ANALYSIS_FIELDS)})")
+    return fields
+
+
+def project(df_analysis: pd.DataFrame, fields: list) -> pd.DataFrame:
+    return df_analysis[fields] if fields else df_analysis
+
+
+def empty_results(fields: list) -> pd.DataFrame:
+    return pd.DataFrame(columns=fields or ANALYSIS_FIELDS)
+
+
+def records_json(df: pd.DataFrame) -> str:
+    """JSON array of row objects (NaN/None as null)"""
+    return df.to_json(orient="records", force_ascii=False) if len(df) else "[]"
+
+
+def ndjson_lines(df: pd.DataFrame) -> str:
+    """One JSON object per line, newline terminated"""
+    if not len(df):
+        return ""
+    return df.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n"
+
+
+# ----- Snapshots and cursors -----
+class SnapshotCache:
+    def __init__(self, ttl: float = ANALYSIS_SNAPSHOT_TTL, max_entries: int = ANALYSIS_SNAPSHOT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._snapshots = OrderedDict()   # snapshot id -> (created, query fingerprint, frame)
+        self._lock = threading.Lock()
+
+    def put(self, fingerprint: str, df: pd.DataFrame) -> str:
+        snapshot_id = secrets.token_hex(8)
+        with self._lock:
+            self._snapshots[snapshot_id] = (time.time(), fingerprint, df)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def get(self, snapshot_id: str, fingerprint: str) -> pd.DataFrame:
+        with self._lock:
+            entry = self._snapshots.get(snapshot_id)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._snapshots[snapshot_id]
+                entry = None
+            if entry is not None:
+                self._snapshots.move_to_end(snapshot_id)
+        if entry is None:
+            raise LookupError("Cursor expired, request the first page again")
+        if entry[1] != fingerprint:
+            raise ValueError("Cursor does not belong to this query (database, filters and fields must not change)")
+        return entry[2]
+
+
+snapshot_cache = SnapshotCache()
+
+
+def query_fingerprint(database_name: str, **query) -> str:
+    return hashlib.sha1(json.dumps([database_name, query], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def encode_cursor(snapshot_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{snapshot_id}:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        snapshot_id, offset = raw.split(":")
+        return snapshot_id, int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Malformed cursor")
+
+
+def page(df: pd.DataFrame, snapshot_id: str, offset: int, limit: int = None) -> str:
+    """One page of a snapshot as a JSON body (serialized once, rows never become dicts)"""
+    rows = df.iloc[offset:offset + limit] if limit else df.iloc[offset:]
+    next_offset = offset + len(rows)
+    next_cursor = encode_cursor(snapshot_id, next_offset) if limit and next_offset < len(df) else None
+    return (
+        f'{{"total":{len(df)},"offset":{offset},"next_cursor":{json.dumps(next_cursor)},'
+        f'"data":{records_json(rows)}}}'
+    )
+
+
+# ----- Streaming -----
+def iter_analysis_chunks(df_schema: pd.DataFrame, database_name: str, tables_per_chunk: int = ANALYSIS_STREAM_TABLES):
+    """
+    Analyse the schema a few tables at a time, yielding each analysed chunk.
+
+    Row counts are read once for the whole database; all chunks sample on the
+    shared sampling pool.
+    """
+    table_keys = df_schema['TABLE_SCHEMA'] + "\x1f" + df_schema['TABLE_NAME']
+    ordered_tables = table_keys.drop_duplicates().tolist()
+    row_counts = get_row_counts(database_name) if ordered_tables else {}
+    for start in range(0, len(ordered_tables), tables_per_chunk):
+        chunk_tables = ordered_tables[start:start + tables_per_chunk]
+        yield perform_gdpr_analysis(df_schema[table_keys.isin(chunk_tables)].copy(), database_name,
+                                    row_counts=row_counts)
+
+
+def stream_ndjson(df_schema: pd.DataFrame, database_name: str, risk_levels=None, categories=None, fields=None):
+    """
+    NDJSON body: filtered and projected rows, chunk by chunk as tables are
+    analysed. A failure after the first rows ends the stream with an
+    {"error": ...} line, since the status code has already been sent.
+    """
+    try:
+        for analysed in iter_analysis_chunks(df_schema, database_name):
+            lines = ndjson_lines(project(filter_results(analysed, risk_levels, categories), fields))
+            if lines:
+                yield lines.encode("utf-8")
+    except Exception as e:
+        detail = getattr(e, "detail", None) or str(e)
+        print(f"⚠️ Streaming analysis of {database_name} failed: {detail}")
+        yield (json.dumps({"error": str(detail)}) + "\n").encode("utf-8")
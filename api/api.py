@@ -3,18 +3,32 @@ from pydantic import BaseModel
 from typing import List, Literal, Optional
 from fastapi.middleware.cors import CORSMiddleware
 from utils import *
-from fastapi import FastAPI, HTTPException
-from pydantic_stuff import ProcessNameRequest, ProcessNameResponse, SearchRequest, DataRecordSearch
-from gdpr_risk_analyzer import extract_schema_metadata, perform_gdpr_analysis, generate_chart
-import io
-from fastapi.responses import StreamingResponse
-from sql_extraction import run_agent_for_names
+from fastapi import FastAPI, HTTPException, Header, Query
+from pydantic_stuff import ProcessNameRequest, ProcessNameResponse, SearchRequest, DataRecordSearch, \
+    ProcessNamesBatchRequest, ProcessNamesBatchResponse, BulkSearchRequest, BulkSearchResponse, ErasureJobRequest, \
+    AnalysisJobRequest, EntityCluster
+from fastapi.responses import StreamingResponse, Response, JSONResponse, PlainTextResponse
+from executors import run_io, run_cpu, io_executor, cpu_executor, executor_stats
+from warmup import lazy_module, start_preload, readiness
+from masking import shutdown_process_pool, warm_process_pool
+import metrics
+from starlette.requests import Request
+from fastapi.encoders import jsonable_encoder
+import json
+import time
 
-import random
-import string
-
-def random_key(length=8):
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+# Heavy subsystems load on first use (or in the background after startup)
+gdpr_risk_analyzer = lazy_module("gdpr_risk_analyzer")       # pandas, analysis, reports
+charts = lazy_module("chart_service")                        # matplotlib
+name_index = lazy_module("name_index", after_load=lambda m: m.get_name_index().reload(force=True))  # numpy, mmap segments
+sql_extraction = lazy_module("sql_extraction")
+bulk_search = lazy_module("bulk_search")
+erasure_jobs = lazy_module("erasure_jobs")
+analysis_jobs = lazy_module("analysis_jobs")
+incremental_analysis = lazy_module("incremental_analysis")
+server_scan = lazy_module("server_scan")
+analysis_results = lazy_module("analysis_results")
+entity_resolution = lazy_module("entity_resolution")
 
 # ----- App Setup -----
 app = FastAPI()
@@ -28,82 +42,125 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Send "X-Profile: 1" to get a Server-Timing header with the time spent per
+# stage (connection checkout, search queries, sampling, encryption, ...).
+# Stages of streamed bodies run after the headers are sent and are only
+# visible in /metrics.
+PROFILE_HEADER = "x-profile"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    profile_token = metrics.start_profile() if request.headers.get(PROFILE_HEADER) in ("1", "true") else None
+    metrics.http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.http_requests_in_flight.dec()
+        # Route template, not the raw path, to keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.http_request_seconds.observe(elapsed, method=request.method, route=route, status=status)
+        profile = metrics.stop_profile(profile_token) if profile_token is not None else None
+    if profile is not None:
+        response.headers["Server-Timing"] = metrics.server_timing(profile, total=elapsed)
+    return response
+
 # ----- Routes -----
 @app.post("/search", response_model=List[DataRecordSearch])
-def search_data(request: SearchRequest):
-    # results = run_agent_for_names(request.firstName + " " + request.lastName)
-    import time
-    time.sleep(15)
-    #return results
-
-    if request.firstName == "Paul":
-        searches = [
-            DataRecordSearch(
-                source="ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES.PARTY_NAME",
-                name="Paul Jonas",
-                key=random_key(),
-                probability=100,
-            ),
-            DataRecordSearch(
-                source="ECC60jkl_HACK.dbo.KNA1.NAME1",
-                name="Paul Jonas",
-                key=random_key(),
-                probability=33
-            ),
-            DataRecordSearch(
-                source="ECC60jkl_HACK.dbo.KNA1.NAME1",
-                name="Paul Jonas",
-                key=random_key(),
-                probability=33
-            ),
-            DataRecordSearch(
-                source="ECC60jkl_HACK.dbo.KNA1.NAME1",
-                name="Paul Jonas",
-                key=random_key(),
-                probability=33
-            ),
-            DataRecordSearch(
-                source="ECC60jkl_HACK.dbo.ADRC.NAME1",
-                name="Paul Jonas",
-                key=random_key(),
-                probability=100
-            ),
+async def search_data(request: SearchRequest):
+    """
+    Search the configured targets for a person
 
-        ]
+    - **mode**: "direct" (default) queries the name index / databases directly;
+      "agent" runs the LLM agent, which is much slower
+    """
+    name = f"{request.firstName} {request.lastName}".strip()
+    try:
+        if request.mode == "agent":
+            return await run_io(sql_extraction.run_agent_for_names, name)
+        return await run_io(sql_extraction.search_names_direct, name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-    elif request.firstName == "Paula":
-        searches = [
-            DataRecordSearch(
-                source="ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES.PARTY_NAME",
-                name="Paula Erickson",
-                key=random_key(),
-                probability=100
-            ),
-            DataRecordSearch(
-                source="ECC60jkl_HACK.dbo.KNA1.NAME1",
-                name="Paula Erickson",
-                key=random_key(),
-                probability=50
-            ),
-            DataRecordSearch(
-                source="ECC60jkl_HACK.dbo.KNA1.NAME1",
-                name="Paula Erickson",
-                key=random_key(),
-                probability=50
-            ),
-        ]
+@app.post("/search/entities", response_model=List[EntityCluster])
+async def search_entities(request: SearchRequest):
+    """
+    Search like /search (direct mode), grouping hits from all sources into
+    candidate persons with a cluster confidence
+    """
+    name = f"{request.firstName} {request.lastName}".strip()
+    try:
+        records = await run_io(sql_extraction.search_names_direct, name)
+        return await run_cpu(entity_resolution.resolve_entities, records)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Entity search failed: {str(e)}")
 
-    else:
-        searches = [
-            # Default or fallback searches here, e.g.:
-            DataRecordSearch(
-                source="ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES.PARTY_NAME",
-                name=request.firstName + " " + request.lastName,
-                key=random_key(),
-                probability=100
-            )
-        ]
-    return searches
+@app.post("/search/stream")
+def search_data_stream(request: SearchRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    """
+    Streaming variant of /search (direct mode only)
+
+    Emits one {"type": "record"} frame per DataRecordSearch as soon as its
+    target has finished, then a {"type": "summary"} frame with per-target
+    timing and status. format=sse wraps the same frames as server-sent events.
+    """
+    name = f"{request.firstName} {request.lastName}".strip()
+
+    def encode(frame):
+        payload = json.dumps(frame, default=str)
+        return f"data: {payload}\n\n" if format == "sse" else payload + "\n"
+
+    def frames():
+        start = time.time()
+        targets, total = [], 0
+        for event in sql_extraction.iter_target_matches(name):
+            records = sql_extraction.format_results_as_datarecordsearch(event["matches"], name)
+            total += len(records)
+            for record in records:
+                yield encode({"type": "record", "record": jsonable_encoder(record)})
+            targets.append({
+                "target": name_index.target_id(event["target"]),
+                "via": event["via"],
+                "status": event["status"],
+                "matches": len(records),
+                "elapsed_ms": round(event["elapsed"] * 1000, 1),
+                "error": event["error"],
+            })
+        yield encode({
+            "type": "summary",
+            "total": total,
+            "elapsed_ms": round((time.time() - start) * 1000, 1),
+            "targets": targets,
+        })
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type)
+
+@app.post("/search/bulk", response_model=BulkSearchResponse)
+async def search_data_bulk(request: BulkSearchRequest):
+    """
+    Search many data subjects at once; results are grouped by input name
+    """
+    try:
+        results, errors = await run_io(bulk_search.search_names_bulk, request.names)
+        return BulkSearchResponse(results=results, errors=errors)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk search failed: {str(e)}")
+
+def invalidate_cached_searches(names):
+    """Processed records must not be served from cached search results"""
+    if sql_extraction.loaded:  # nothing can be cached before the first search
+        for name in set(names):
+            sql_extraction.search_cache.invalidate_name(name)
 
 # === FastAPI Endpoint ===
 @app.post("/process-name", response_model=ProcessNameResponse)
@@ -115,18 +172,24 @@ async def process_name(request: ProcessNameRequest):
     - **lname**: Last name to process  
     - **id**: Entity ID (BusinessEntityID)
     - **action**: Action to perform - "mask" (encrypt) or "delete"
+    - **deterministic**: mask to a stable token so the same name always masks the same way
+
+    encryption_key in the response is a key reference into the masking key
+    store ("dk:<id>"), not the key itself.
     """
     try:        
         if request.action == "mask":
             # Mask the names (using encryption)
-            encrypted_name, key = encrypt_name(request.name)
+            encrypted_name, key = await run_cpu(encrypt_name, request.name, request.deterministic)
             
             # Insert encrypted data
-            success = insert_into_results_table(
+            success = await run_io(
+                insert_into_results_table,
                 request.id, encrypted_name, key, request.source, request.probability
             )
             
             if success:
+                invalidate_cached_searches([request.name])
                 return ProcessNameResponse(
                     success=True,
                     message="Names masked (encrypted) and inserted successfully",
@@ -142,11 +205,13 @@ async def process_name(request: ProcessNameRequest):
                 
         elif request.action == "delete":
             # Mark for deletion
-            success = insert_into_results_table(
+            success = await run_io(
+                insert_into_results_table,
                 request.id, request.name, "no_key_since_deletion", request.source, request.probability
             )
             
             if success:
+                invalidate_cached_searches([request.name])
                 return ProcessNameResponse(
                     success=True,
                     message="Names marked for deletion successfully",
@@ -160,36 +225,393 @@ async def process_name(request: ProcessNameRequest):
             else:
                 raise HTTPException(status_code=500, detail="Failed to mark for deletion")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+
+@app.post("/process-names", response_model=ProcessNamesBatchResponse)
+async def process_names_batch(request: ProcessNamesBatchRequest):
+    """
+    Batch variant of /process-name: mask or delete many records in one call
+
+    Masked names are encrypted together under one data key, then all records are written to the
+    results table in chunked bulk inserts. Each record gets its own result.
+    At most PROCESS_NAMES_MAX_RECORDS records per call (422 above).
+    """
+    records = request.records
+    try:
+        processed = [(record.name, "no_key_since_deletion") for record in records]
+        # Encrypted and tokenized names are masked as two batches
+        for deterministic in (False, True):
+            mask_indexes = [
+                i for i, record in enumerate(records)
+                if record.action == "mask" and record.deterministic == deterministic
+            ]
+            if not mask_indexes:
+                continue
+            encrypted = await run_cpu(encrypt_names, [records[i].name for i in mask_indexes], deterministic)
+            for i, pair in zip(mask_indexes, encrypted):
+                processed[i] = pair
+
+        rows = [
+            (record.id, processed_name, key, record.source, record.probability)
+            for record, (processed_name, key) in zip(records, processed)
+        ]
+        outcomes = await run_io(insert_many_into_results_table, rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch processing failed: {str(e)}")
+
+    results = []
+    for record, (processed_name, key), success in zip(records, processed, outcomes):
+        if record.action == "mask":
+            message = "Names masked (encrypted) and inserted successfully" if success else "Failed to insert masked data"
+        else:
+            message = "Names marked for deletion successfully" if success else "Failed to mark for deletion"
+        results.append(ProcessNameResponse(
+            success=success,
+            message=message,
+            entity_id=record.id,
+            original_name=record.name,
+            processed_name=processed_name if success else None,
+            encryption_key=key if success else None,
+            source=record.source,
+            probability=record.probability
+        ))
+
+    invalidate_cached_searches(record.name for record, success in zip(records, outcomes) if success)
+    succeeded = sum(outcomes)
+    return ProcessNamesBatchResponse(
+        total=len(records),
+        succeeded=succeeded,
+        failed=len(records) - succeeded,
+        results=results
+    )
     
+@app.post("/erasure-jobs")
+async def create_erasure_job(request: ErasureJobRequest):
+    """
+    Apply mask/delete to the source rows of search results, in the background
+
+    Rows are processed in checkpointed chunks; poll GET /erasure-jobs/{job_id}
+    for progress and POST /erasure-jobs/{job_id}/resume after an interruption.
+    """
+    try:
+        job = await run_io(erasure_jobs.create_job, request.action, [jsonable_encoder(r) for r in request.records])
+        return erasure_jobs.start_job(job)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/erasure-jobs")
+def list_erasure_jobs():
+    return erasure_jobs.list_jobs()
+
+@app.get("/erasure-jobs/{job_id}")
+def get_erasure_job(job_id: str):
+    try:
+        return erasure_jobs.get_job_status(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.post("/erasure-jobs/{job_id}/resume")
+async def resume_erasure_job(job_id: str):
+    """Continue an interrupted or failed job from its last committed chunk"""
+    try:
+        return await run_io(erasure_jobs.resume_job, job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+ANALYSIS_PAGE_MAX = 10000  # largest page a client may ask for
 
 @app.get("/analyze-gdpr/{database_name}")
-async def analyze_gdpr_endpoint(database_name: str):
+async def analyze_gdpr_endpoint(database_name: str, refresh: bool = False,
+                                risk_level: Optional[List[str]] = Query(None),
+                                category: Optional[List[str]] = Query(None),
+                                table: Optional[List[str]] = Query(None),
+                                fields: Optional[str] = None,
+                                limit: Optional[int] = Query(None, ge=1, le=ANALYSIS_PAGE_MAX),
+                                cursor: Optional[str] = None,
+                                format: Literal["json", "ndjson"] = "json"):
     """
     Perform GDPR analysis and return results as JSON
+
+    - **refresh**: bypass the schema metadata cache and rescan the catalog
+    - **risk_level** / **category**: only return these risk levels / GDPR categories (repeat or comma-separate)
+    - **table**: only analyse these tables ("schema.table" or "table"); other tables are not sampled
+    - **fields**: comma-separated columns to return (default: all)
+    - **limit**: page size; the response carries a **next_cursor** to pass back for the next page
+    - **format**: "json" (default) or "ndjson" to stream rows as tables are analysed (no paging)
     """
     try:
-        schema_df = extract_schema_metadata(database_name)
-        analysis_df = perform_gdpr_analysis(schema_df, database_name)
-        return {"data": analysis_df.to_dict(orient="records")}
+        risk_levels = analysis_results.normalize_risk_levels(risk_level)
+        projection = analysis_results.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "ndjson" and (limit or cursor):
+        raise HTTPException(status_code=400, detail="limit and cursor are not supported with format=ndjson")
+    fingerprint = analysis_results.query_fingerprint(
+        database_name, risk_level=risk_levels, category=analysis_results.parse_list(category),
+        table=analysis_results.parse_list(table), fields=projection
+    )
+
+    if cursor:
+        try:
+            snapshot_id, offset = analysis_results.decode_cursor(cursor)
+            results_df = analysis_results.snapshot_cache.get(snapshot_id, fingerprint)
+        except LookupError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        body = await run_cpu(analysis_results.page, results_df, snapshot_id, offset, limit)
+        return Response(content=body, media_type="application/json")
+
+    try:
+        # Metadata and sampling are database-bound, serialization is CPU-bound
+        schema_df = await run_io(gdpr_risk_analyzer.extract_schema_metadata, database_name, use_cache=not refresh)
+        schema_df = analysis_results.filter_schema_tables(schema_df, table)
+        if format == "ndjson":
+            return StreamingResponse(
+                analysis_results.stream_ndjson(schema_df, database_name, risk_levels, category, projection),
+                media_type="application/x-ndjson"
+            )
+
+        if len(schema_df):
+            analysis_df = await run_io(gdpr_risk_analyzer.perform_gdpr_analysis, schema_df, database_name)
+            results_df = analysis_results.project(
+                analysis_results.filter_results(analysis_df, risk_levels, category), projection
+            ).reset_index(drop=True)
+        else:
+            results_df = analysis_results.empty_results(projection)
+        snapshot_id = analysis_results.snapshot_cache.put(fingerprint, results_df) if limit else None
+        body = await run_cpu(analysis_results.page, results_df, snapshot_id, 0, limit)
+        return Response(content=body, media_type="application/json")
+    except HTTPException as e:
+        if e.status_code == 503:
+            raise
+        raise HTTPException(status_code=500, detail=str(e.detail))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-@app.get("/generate-chart/{database_name}")
-async def generate_percentage_chart(database_name: str = "AdventureWorks2019"):
+
+@app.post("/analyze-gdpr/{database_name}/incremental")
+async def analyze_gdpr_incremental(database_name: str, full: bool = False, refresh: bool = False,
+                                   include_data: bool = False):
     """
-    Generate and return percentage analysis chart as PNG
+    Re-analyse only the tables that changed since the last run
+
+    Returns a summary and the diff of added / changed / removed columns.
+
+    - **full**: ignore stored results and analyse every table
+    - **refresh**: bypass the schema metadata cache
+    - **include_data**: also return the full merged analysis (like /analyze-gdpr)
     """
     try:
-        img_buffer = generate_chart(database_name)
+        analysis_df, report = await run_io(
+            incremental_analysis.incremental_gdpr_analysis, database_name, refresh=refresh, full=full
+        )
+        if include_data:
+            report["data"] = await run_cpu(analysis_df.to_dict, orient="records")
+        return jsonable_encoder(report)
+    except HTTPException as e:
+        if e.status_code == 503:
+            raise
+        raise HTTPException(status_code=500, detail=str(e.detail))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/scan-server")
+def scan_server(databases: Optional[List[str]] = Query(None), incremental: bool = False,
+                refresh: bool = False, include_rows: bool = False):
+    """
+    Analyse every accessible database on the server (or just `databases`)
+
+    Streams NDJSON: a {"type": "start"} frame, one {"type": "database"} frame
+    per database as soon as it finishes, then a consolidated {"type": "summary"}.
+
+    - **incremental**: re-analyse only changed tables (see /analyze-gdpr/{db}/incremental)
+    - **include_rows**: add the analysis rows to each database frame
+    """
+    def frames():
+        try:
+            for event in server_scan.iter_server_scan(databases, incremental, refresh, include_rows):
+                yield json.dumps(event, default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(getattr(e, "detail", None) or e)}) + "\n"
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+@app.post("/analysis-jobs", status_code=202)
+async def submit_analysis_job(request: AnalysisJobRequest):
+    """
+    Run the GDPR analysis of a database in the background
+
+    Poll GET /analysis-jobs/{job_id} for progress (tables sampled / total, ETA),
+    then page through GET /analysis-jobs/{job_id}/results.
+    """
+    try:
+        return await run_io(analysis_jobs.get_job_manager().submit, request.database_name, request.refresh)
+    except analysis_jobs.JobLimitReached as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+@app.get("/analysis-jobs")
+async def list_analysis_jobs():
+    return await run_io(analysis_jobs.get_job_manager().list)
+
+@app.get("/analysis-jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    try:
+        return await run_io(analysis_jobs.get_job_manager().status, job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/analysis-jobs/{job_id}/results")
+async def get_analysis_job_results(job_id: str, offset: int = Query(0, ge=0),
+                                   limit: int = Query(500, ge=1, le=5000)):
+    """One page of a finished job's analysis rows; follow next_offset for the rest"""
+    try:
+        return await run_io(analysis_jobs.get_job_manager().results, job_id, offset, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.delete("/analysis-jobs/{job_id}")
+async def cancel_analysis_job(job_id: str):
+    """Cancel a queued or running job, or delete a finished one with its results"""
+    try:
+        return await run_io(analysis_jobs.get_job_manager().cancel_or_delete, job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/gdpr-report/{database_name}")
+async def gdpr_report_endpoint(database_name: str, refresh: bool = False):
+    """
+    GDPR analysis as a PDF report: a summary page with aggregated risk counts,
+    then one section per table. Pages are streamed as they are laid out.
+
+    - **refresh**: bypass the schema metadata cache and rescan the catalog
+    """
+    try:
+        schema_df = await run_io(gdpr_risk_analyzer.extract_schema_metadata, database_name, use_cache=not refresh)
+        analysis_df = await run_io(gdpr_risk_analyzer.perform_gdpr_analysis, schema_df, database_name)
+    except HTTPException as e:
+        if e.status_code == 503:
+            raise
+        raise HTTPException(status_code=500, detail=str(e.detail))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        gdpr_risk_analyzer.stream_gdpr_pdf_report(analysis_df, database_name),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename=gdpr_report_{database_name}.pdf"}
+    )
+
+@app.get("/generate-chart/{database_name}")
+async def generate_percentage_chart(database_name: str = "AdventureWorks2019", table: Optional[str] = None,
+                                    date_column: Optional[str] = None, start: Optional[str] = None,
+                                    end: Optional[str] = None, age_years: Optional[int] = None,
+                                    format: Literal["png", "svg", "json"] = "png",
+                                    dpi: int = Query(300, ge=50, le=300),
+                                    if_none_match: Optional[str] = Header(None)):
+    """
+    Generate and return percentage analysis chart (PNG by default)
 
-        # Return PNG as streaming response
-        return StreamingResponse(
-            io.BytesIO(img_buffer.getvalue()),
-            media_type="image/png",
-            headers={"Content-Disposition": "inline; filename=percentage_analysis.png"}
+    - **table** / **date_column**: table (schema.table) and date column to age (default Person.Person.ModifiedDate)
+    - **start** / **end**: first and last month shown (YYYY-MM-DD, default 2021-01 to 2023-12)
+    - **age_years**: age threshold in years (default 10)
+    - **format**: "png", "svg" or "json" (just the data series)
+    - **dpi**: raster resolution for PNG; use a low value for dashboards
+
+    Responses carry an ETag; a matching If-None-Match returns 304.
+    """
+    try:
+        params = (
+            table or gdpr_risk_analyzer.AGING_TABLE,
+            date_column or gdpr_risk_analyzer.AGING_DATE_COLUMN,
+            start or gdpr_risk_analyzer.AGING_START,
+            end or gdpr_risk_analyzer.AGING_END,
+            age_years if age_years is not None else gdpr_risk_analyzer.AGING_THRESHOLD_YEARS,
         )
+        series = await run_io(charts.chart_service.get_series, database_name, params)
+        etag = charts.chart_service.etag(series, format, dpi)
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+        if charts.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        body = charts.chart_service.cached(etag)
+        if body is None:
+            body = await run_cpu(charts.chart_service.render, series, format, dpi)
 
+        if format != "json":
+            headers["Content-Disposition"] = f"inline; filename=percentage_analysis.{format}"
+        return Response(content=body, media_type=charts.CHART_FORMATS[format], headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating chart: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating chart: {str(e)}")
+
+@app.get("/pool-stats")
+def pool_stats():
+    """
+    Connection pool statistics per database (size, in use, waits, timeouts)
+    """
+    return {"pools": get_pool_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """
+    Prometheus metrics: stage latency histograms, in-flight gauges, request
+    latency per route, pool gauges and error counters
+    """
+    return PlainTextResponse(metrics.expose_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/executor-stats")
+def executor_stats_endpoint():
+    """
+    Load on the bounded io/cpu executors (pending work, rejections)
+    """
+    return {"executors": executor_stats()}
+
+
+@app.on_event("startup")
+def warm_up():
+    # Import heavy modules and map the name index in the background so
+    # workers accept traffic immediately
+    start_preload()
+    connection_pools.start_maintenance(POOL_MAINTENANCE_INTERVAL)
+    warm_process_pool()  # spawns the masking workers; they import in the background
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness: 200 once all heavy subsystems are loaded, 503 while warming up
+    """
+    status = readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/name-index/stats")
+def name_index_stats():
+    """
+    Segments of the local name search index with size and freshness
+    """
+    return {"segments": name_index.get_name_index().stats()}
+
+
+@app.on_event("shutdown")
+def close_connection_pools():
+    io_executor.shutdown()
+    cpu_executor.shutdown()
+    shutdown_process_pool()
+    if analysis_jobs.loaded:
+        analysis_jobs.get_job_manager().shutdown()
+    connection_pools.close_all()
@@ -0,0 +1,104 @@
+"""
+Concurrency benchmark against a running API server.
+
+For each concurrency level, N clients hammer a (slow) target endpoint while
+one extra client probes a cheap endpoint. Throughput should scale with the
+number of clients, and the probe latency should stay flat: if it grows with
+the load, blocking work is stalling the event loop.
+
+    uvicorn api:app --port 8000 &
+    python benchmarks/bench_concurrency.py --path /analyze-gdpr/AdventureWorks2019 --levels 1 2 4 8 16
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def timed_get(url: str, timeout: float):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_level(base_url, path, probe_path, clients, requests_per_client, timeout):
+    latencies, statuses = [], []
+    probe_latencies = []
+    lock = threading.Lock()
+    stop_probe = threading.Event()
+
+    def client():
+        for _ in range(requests_per_client):
+            status, elapsed = timed_get(base_url + path, timeout)
+            with lock:
+                statuses.append(status)
+                latencies.append(elapsed)
+
+    def probe():
+        while not stop_probe.is_set():
+            _, elapsed = timed_get(base_url + probe_path, timeout)
+            probe_latencies.append(elapsed)
+            time.sleep(0.05)
+
+    probe_thread = threading.Thread(target=probe, daemon=True)
+    probe_thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for _ in range(clients):
+            executor.submit(client)
+    wall = time.perf_counter() - start
+    stop_probe.set()
+    probe_thread.join()
+
+    ok = sum(1 for s in statuses if 200 <= s < 300)
+    rejected = sum(1 for s in statuses if s == 503)
+    return {
+        "clients": clients,
+        "requests": len(statuses),
+        "ok": ok,
+        "rejected": rejected,
+        "throughput": ok / wall if wall else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "probe_p50": percentile(probe_latencies, 0.50),
+        "probe_p95": percentile(probe_latencies, 0.95),
+        "probe_mean": statistics.mean(probe_latencies) if probe_latencies else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/analyze-gdpr/AdventureWorks2019")
+    parser.add_argument("--probe-path", default="/executor-stats")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=5, help="requests per client per level")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    print(f"{'clients':>7} {'ok':>5} {'503':>5} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'probe p50 ms':>13} {'probe p95 ms':>13}")
+    for clients in args.levels:
+        r = run_level(args.url, args.path, args.probe_path, clients, args.requests, args.timeout)
+        print(f"{r['clients']:>7} {r['ok']:>5} {r['rejected']:>5} {r['throughput']:>8.2f} {r['p50']:>8.3f} "
+              f"{r['p95']:>8.3f} {r['probe_p50'] * 1000:>13.1f} {r['probe_p95'] * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
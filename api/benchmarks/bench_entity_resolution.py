@@ -0,0 +1,88 @@
+"""
+Throughput benchmark for entity resolution over search hits.
+
+Builds synthetic hits (default 50k) for a set of people, each spelled the
+way different sources store it (KNA1 "Max Müller", ADRC MC_NAME1
+"MUELLER MAX", AR_HZ_PARTIES "Müller, Max", typos), resolves them and
+reports hits/sec and how the clusters compare to the true people.
+
+    python benchmarks/bench_entity_resolution.py --hits 50000 --people 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_resolution import resolve_entities  # noqa: E402
+from pydantic_stuff import DataRecordSearch  # noqa: E402
+from seed_standin import FIRST_NAMES, LAST_NAMES  # noqa: E402
+
+SOURCES = [
+    "ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES.PARTY_NAME", "ECC60jkl_HACK.dbo.KNA1.NAME1",
+    "ECC60jkl_HACK.dbo.ADRC.NAME1", "ECC60jkl_HACK.dbo.ADRC.MC_NAME1", "ECC60jkl_HACK.dbo.ADRP.NAME_TEXT",
+]
+SURNAME_STEMS = ["Berg", "Stein", "Hof", "Wald", "Brand", "Feld", "Linden", "Rosen", "Eichen", "Falken", "Horn", "Kessel"]
+SURNAME_ENDINGS = ["mann", "er", "berger", "haus", "felder", "meier", "bauer", "hofer", "ner", "inger", "bach", "dorf"]
+
+
+def make_people(count: int, rng: random.Random) -> list:
+    """Distinct (first, last) names; surnames are composed so thousands of people do not collide"""
+    surnames = LAST_NAMES + [stem + ending for stem in SURNAME_STEMS for ending in SURNAME_ENDINGS]
+    people = set()
+    while len(people) < count:
+        first = rng.choice(FIRST_NAMES)
+        if rng.random() < 0.5:
+            first += " " + rng.choice(FIRST_NAMES)
+        people.add((first, rng.choice(surnames)))
+    return sorted(people)
+
+
+def spelling(first: str, last: str, source: str, rng: random.Random) -> str:
+    if source.endswith("MC_NAME1"):
+        return f"{last} {first}".upper().replace("Ü", "UE").replace("Ö", "OE").replace("Ä", "AE")
+    if source.endswith("PARTY_NAME"):
+        return f"{last}, {first}"
+    name = f"{first} {last}"
+    if rng.random() < 0.1:  # typo: drop one letter
+        i = rng.choice([i for i, ch in enumerate(name) if ch.isalpha() and i > 0])
+        name = name[:i] + name[i + 1:]
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=50_000)
+    parser.add_argument("--people", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    people = make_people(args.people, rng)
+    records = []
+    for n in range(args.hits):
+        first, last = people[n % len(people)]
+        source = rng.choice(SOURCES)
+        records.append(DataRecordSearch(source=source, name=spelling(first, last, source, rng),
+                                        key=str(n), probability=round(rng.uniform(60, 100), 1)))
+
+    start = time.perf_counter()
+    clusters = resolve_entities(records)
+    seconds = time.perf_counter() - start
+
+    # Hit n belongs to person n % people: count clusters mixing people and people split over clusters
+    mixed = sum(1 for cluster in clusters if len({int(r.key) % len(people) for r in cluster["records"]}) > 1)
+    clusters_per_person = {}
+    for cluster in clusters:
+        for person in {int(r.key) % len(people) for r in cluster["records"]}:
+            clusters_per_person[person] = clusters_per_person.get(person, 0) + 1
+    split = sum(1 for count in clusters_per_person.values() if count > 1)
+    print(f"{len(records):,} hits of {len(people):,} people: {seconds:.2f}s, {len(records) / seconds:,.0f} hits/s")
+    print(f"  clusters {len(clusters):,}, mixing people {mixed:,}, people split over clusters {split:,}, "
+          f"mean confidence {sum(c['confidence'] for c in clusters) / len(clusters):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Cold-start benchmark: how long does `import api` take in a fresh interpreter,
+and what would loading every heavy subsystem eagerly cost on top?
+
+    python benchmarks/bench_import.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import api (lazy)": "import api",
+    "import api + all heavy modules (eager)": (
+        "import api, gdpr_risk_analyzer, chart_service, name_index, sql_extraction, bulk_search"
+    ),
+    "gdpr_risk_analyzer": "import gdpr_risk_analyzer",
+    "chart_service": "import chart_service",
+    "sql_extraction": "import sql_extraction",
+    "agent stack (smolagents)": "import smolagents",
+}
+
+
+def time_import(statement: str) -> float:
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=API_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<42} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for label, statement in SCENARIOS.items():
+        try:
+            samples = [time_import(statement) * 1000 for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{label:<42} {'failed':>10}  ({e})")
+            continue
+        print(f"{label:<42} {statistics.median(samples):>10.1f} {min(samples):>8.1f} {max(samples):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Masking throughput: legacy per-name Fernet keys vs the envelope-encryption
+engine (inline and across the process pool) vs deterministic tokenization.
+
+    python benchmarks/bench_masking.py --names 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography.fernet import Fernet  # noqa: E402
+
+import masking  # noqa: E402
+
+
+def legacy_encrypt(names):
+    out = []
+    for name in names:
+        key = Fernet.generate_key()
+        out.append((Fernet(key).encrypt(name.encode()).decode(), key.decode()))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--legacy-sample", type=int, default=50_000,
+                        help="names run through the legacy path (it is too slow for the full set)")
+    args = parser.parse_args()
+
+    names = [f"Firstname{i % 5000} Lastname{i}" for i in range(args.names)]
+    engine = masking.MaskingEngine(masking.KeyStore(tempfile.mkdtemp(prefix="bench_keys_")))
+    engine.mask_names(names[:10])  # create the master and active keys outside the timings
+    masking.warm_process_pool(block=True)  # start the workers outside the timings
+
+    sample = names[:min(args.legacy_sample, len(names))]
+    scenarios = [
+        ("legacy Fernet key per name", lambda: legacy_encrypt(sample), len(sample)),
+        ("envelope AES-GCM, inline", lambda: engine.mask_names(names, parallel=False), len(names)),
+        (f"envelope AES-GCM, {masking.MASKING_PROCESSES} processes",
+         lambda: engine.mask_names(names, parallel=True), len(names)),
+        ("deterministic tokens, inline", lambda: engine.mask_names(names, deterministic=True, parallel=False), len(names)),
+        (f"deterministic tokens, {masking.MASKING_PROCESSES} processes",
+         lambda: engine.mask_names(names, deterministic=True, parallel=True), len(names)),
+    ]
+
+    print(f"{'scenario':<36} {'names':>10} {'seconds':>9} {'records/s':>12}")
+    for label, run, count in scenarios:
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        print(f"{label:<36} {count:>10,} {seconds:>9.2f} {count / seconds:>12,.0f}")
+
+    masking.shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+End-to-end benchmark suite against the local SQL stand-in.
+
+Runs each scenario in-process through the FastAPI app (routing, executors and
+serialization included) with a fixed number of operations and client threads,
+and reports throughput plus p50/p95/p99 latency:
+
+- search:   POST /search for random names from the seeded name pools
+- batch:    POST /process-names with --batch-size masked records
+- analysis: GET /analyze-gdpr on the wide synthetic catalog
+- sampling: collect_samples over every table of the catalog
+- chart:    GET /generate-chart (caches cleared, so every call queries and renders)
+
+Seed the stand-in first (benchmarks/seed_standin.py) with the same SQL_*
+environment variables; like the seeder, the suite refuses to run unless
+SQL_SERVER (or SQL_CONNECTION_STRING) is set. The batch scenario inserts into
+Results.dbo.identified_names_team_beta, so on a non-local server it needs
+--write-results. Save a run with --output and compare later runs
+against it with --baseline; the exit code is 1 when a scenario's p95 or
+throughput regressed by more than --tolerance.
+
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --scenarios search batch --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api  # noqa: E402
+from seed_standin import CATALOG_DATABASE, FIRST_NAMES, LAST_NAMES, require_local_or, standin_server  # noqa: E402
+
+CHART_DATABASE = "AdventureWorks2019"
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def check(response):
+    if not 200 <= response.status_code < 300:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+# ----- Scenarios: each returns op(i) -> units processed (names, records, columns, tables, charts) -----
+def scenario_search(client, args):
+    def op(i):
+        rng = random.Random(args.seed + i)
+        check(client.post("/search", json={
+            "firstName": rng.choice(FIRST_NAMES), "lastName": rng.choice(LAST_NAMES), "action": "mask",
+        }))
+        return 1
+    return op
+
+
+def scenario_batch(client, args):
+    def op(i):
+        rng = random.Random(args.seed + i)
+        records = [
+            {"source": "ECC60jkl_HACK.dbo.KNA1.NAME1", "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             "probability": 90, "id": f"bench-{i}-{n}", "action": "mask"}
+            for n in range(args.batch_size)
+        ]
+        body = check(client.post("/process-names", json={"records": records})).json()
+        if body["failed"]:
+            raise RuntimeError(f"{body['failed']}/{body['total']} records failed")
+        return body["succeeded"]
+    return op
+
+
+def scenario_analysis(client, args):
+    def op(i):
+        return len(check(client.get(f"/analyze-gdpr/{args.catalog_database}")).json()["data"])
+    return op
+
+
+def scenario_sampling(client, args):
+    from gdpr_risk_analyzer import extract_schema_metadata
+    from sample_extraction import collect_samples
+
+    df_schema = extract_schema_metadata(args.catalog_database).rename(columns=str.lower)
+
+    def op(i):
+        return len(collect_samples(df_schema, args.catalog_database))
+    return op
+
+
+def scenario_chart(client, args):
+    def op(i):
+        api.charts.chart_service.clear()
+        check(client.get(f"/generate-chart/{CHART_DATABASE}", params={"format": "png", "dpi": args.chart_dpi}))
+        return 1
+    return op
+
+
+SCENARIOS = {
+    "search": (scenario_search, "names"),
+    "batch": (scenario_batch, "records"),
+    "analysis": (scenario_analysis, "columns"),
+    "sampling": (scenario_sampling, "tables"),
+    "chart": (scenario_chart, "charts"),
+}
+DEFAULT_ITERATIONS = {"search": 200, "batch": 20, "analysis": 5, "sampling": 5, "chart": 20}
+
+
+def run_scenario(name, client, args):
+    factory, unit = SCENARIOS[name]
+    op = factory(client, args)
+    iterations = args.iterations or DEFAULT_ITERATIONS[name]
+    for i in range(args.warmup):
+        op(-1 - i)
+
+    latencies, errors = [], []
+    units = [0]
+    lock = threading.Lock()
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            processed = op(i)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            units[0] += processed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(timed, range(iterations)))
+    wall = time.perf_counter() - start
+
+    if errors:
+        print(f"⚠️ {name}: {len(errors)} failed operation(s), first: {errors[0]}")
+    return {
+        "scenario": name,
+        "operations": iterations,
+        "errors": len(errors),
+        "concurrency": args.concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "unit": unit,
+        "units_per_second": units[0] / wall if wall else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Per scenario p95 / throughput change against a baseline run; returns regressed scenario names"""
+    previous = {entry["scenario"]: entry for entry in baseline["results"]}
+    regressed = []
+    print(f"\n{'scenario':<10} {'p95 change':>12} {'throughput change':>19}")
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            print(f"{result['scenario']:<10} {'(no baseline)':>12}")
+            continue
+        p95_change = result["p95"] / before["p95"] - 1 if before["p95"] else 0.0
+        throughput_change = result["throughput"] / before["throughput"] - 1 if before["throughput"] else 0.0
+        flag = ""
+        if p95_change > tolerance or throughput_change < -tolerance:
+            regressed.append(result["scenario"])
+            flag = "  ❌ regression"
+        print(f"{result['scenario']:<10} {p95_change:>+11.1%} {throughput_change:>+18.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, help="operations per scenario (default depends on the scenario)")
+    parser.add_argument("--concurrency", type=int, default=4, help="client threads")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed operations before each scenario")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--chart-dpi", type=int, default=100)
+    parser.add_argument("--catalog-database", default=CATALOG_DATABASE)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput change (0.2 = 20%%)")
+    parser.add_argument("--write-results", action="store_true",
+                        help="allow the batch scenario to insert into the Results table of a non-local server")
+    args = parser.parse_args()
+    if "batch" in args.scenarios and not args.write_results:
+        require_local_or("--write-results", "insert batch records into its Results table")
+    else:
+        standin_server()
+
+    results = []
+    with TestClient(api.app) as client:
+        for name in args.scenarios:
+            result = run_scenario(name, client, args)
+            results.append(result)
+            print(f"✔ {name:<9} {result['throughput']:>8.2f} ops/s  {result['units_per_second']:>10,.0f} "
+                  f"{result['unit']}/s  p50 {result['p50'] * 1000:>8.1f}ms  p95 {result['p95'] * 1000:>8.1f}ms  "
+                  f"p99 {result['p99'] * 1000:>8.1f}ms  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "server": api.server,
+                       "args": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressed = compare(results, json.load(f), args.tolerance)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
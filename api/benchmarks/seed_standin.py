@@ -0,0 +1,342 @@
+"""
+Seed a local SQL Server stand-in for the benchmark suite.
+
+Creates the databases and tables the API talks to, filled with synthetic
+data generated server side (set-based INSERT ... SELECT in batches, so 50M
+rows do not travel over the wire):
+
+- ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES
+- ECC60jkl_HACK.dbo.KNA1 / ADRC / ADRP
+- AdventureWorks2019.Person.Person (ModifiedDate spread over 1995-2023 for the aging chart)
+- Results.dbo.identified_names_team_beta (empty)
+- GDPR_CATALOG_BENCH: a wide catalog of --catalog-tables tables with
+  --catalog-columns columns each (personal, financial and business columns)
+
+Start a local instance and point the API at it, then seed:
+
+    docker run -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD='Bench_pass1' -p 1433:1433 -d mcr.microsoft.com/mssql/server:2022-latest
+    export SQL_SERVER=localhost SQL_USERNAME=sa SQL_PASSWORD='Bench_pass1' \\
+           SQL_CONNECTION_OPTIONS='Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;'
+    python benchmarks/seed_standin.py --rows 1000000 --catalog-tables 2000
+
+Existing stand-in databases are dropped first (--keep to skip that), seeded
+tables are always dropped and recreated. utils falls back to the shared Azure
+server, so the script refuses to run unless SQL_SERVER (or
+SQL_CONNECTION_STRING) is set, and only drops on a local server
+(localhost, 127.0.0.1, "." ...) unless --drop is passed.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyodbc  # noqa: E402
+
+from utils import get_connection_string, server  # noqa: E402
+
+# === Stand-in ===
+LOCAL_SERVERS = {"localhost", "127.0.0.1", "::1", "(local)", ".", "(localdb)", "host.docker.internal"}
+STANDIN_DATABASES = ["ORACLE_EBS_HACK", "ECC60jkl_HACK", "AdventureWorks2019", "Results", "GDPR_CATALOG_BENCH"]
+CATALOG_DATABASE = "GDPR_CATALOG_BENCH"
+SEED_BATCH_ROWS = 1_000_000
+MIN_ROWS, MAX_ROWS = 10_000, 50_000_000
+
+FIRST_NAMES = [
+    "Anna", "Lukas", "Marie", "Leon", "Sophie", "Jonas", "Emma", "Felix", "Mia", "Paul", "Lena", "Noah",
+    "Laura", "Elias", "Julia", "Ben", "Sara", "Finn", "Hannah", "Luca", "Giulia", "Marco", "Chiara", "Matteo",
+    "Claire", "Hugo", "Camille", "Louis", "Olivia", "James", "Amelia", "Oliver", "Isla", "Jack", "Sofia", "Liam",
+    "Martina", "Pablo", "Lucia", "Elena", "Zoe", "Niklas", "Katharina", "Jan", "Petra", "Stefan", "Monika", "Thomas",
+]
+LAST_NAMES = [
+    "Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann",
+    "Koch", "Richter", "Klein", "Wolf", "Schröder", "Neumann", "Schwarz", "Braun", "Zimmermann", "Hartmann",
+    "Rossi", "Russo", "Ferrari", "Esposito", "Bianchi", "Romano", "Colombo", "Ricci", "Marino", "Greco",
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Smith", "Jones", "Taylor", "Brown", "Williams", "Wilson", "Johnson", "Davies", "Garcia", "Fernandez",
+]
+CITIES = ["Berlin", "Hamburg", "München", "Köln", "Zürich", "Wien", "Milano", "Roma", "Paris", "Lyon", "London", "Madrid"]
+
+# Row generator: n runs offset+1 .. offset+batch (sys.all_columns squared covers > 50M rows)
+NUMBERS_CTE = """
+WITH numbers AS (
+    SELECT TOP ({batch}) CAST(ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS bigint) + {offset} AS n
+    FROM sys.all_columns a CROSS JOIN sys.all_columns b
+)
+"""
+NAME_JOIN = """
+JOIN #first_names f ON f.id = n % {first_count}
+JOIN #last_names l ON l.id = (n / {first_count}) % {last_count}
+JOIN #cities c ON c.id = (n / 7) % {city_count}
+"""
+
+ERP_TABLES = [
+    {
+        "database": "ORACLE_EBS_HACK", "table": "dbo.AR_HZ_PARTIES",
+        "ddl": """
+        CREATE TABLE dbo.AR_HZ_PARTIES (
+            PARTY_ID bigint NOT NULL PRIMARY KEY,
+            PARTY_NUMBER nvarchar(30) NOT NULL,
+            PARTY_NAME nvarchar(360) NOT NULL,
+            PARTY_TYPE varchar(30) NOT NULL,
+            EMAIL_ADDRESS nvarchar(320) NULL,
+            PRIMARY_PHONE_NUMBER nvarchar(40) NULL,
+            CITY nvarchar(60) NULL,
+            CREATION_DATE datetime NOT NULL,
+            LAST_UPDATE_DATE datetime NOT NULL
+        )""",
+        "columns": "PARTY_ID, PARTY_NUMBER, PARTY_NAME, PARTY_TYPE, EMAIL_ADDRESS, PRIMARY_PHONE_NUMBER, CITY, "
+                   "CREATION_DATE, LAST_UPDATE_DATE",
+        "select": """n, CONCAT('P', n), CONCAT(f.name, ' ', l.name),
+            CASE WHEN n % 5 = 0 THEN 'ORGANIZATION' ELSE 'PERSON' END,
+            CONCAT(LOWER(f.name), '.', n, '@example.com'),
+            CONCAT('+49 ', 30 + n % 900, ' ', 1000000 + n % 8999999), c.name,
+            DATEADD(day, -(n % 9000), '2024-01-01'), DATEADD(day, -(n % 900), '2024-01-01')""",
+    },
+    {
+        "database": "ECC60jkl_HACK", "table": "dbo.KNA1",
+        "ddl": """
+        CREATE TABLE dbo.KNA1 (
+            MANDT nvarchar(3) NOT NULL,
+            KUNNR nvarchar(10) NOT NULL,
+            NAME1 nvarchar(35) NOT NULL,
+            ORT01 nvarchar(35) NULL,
+            PSTLZ nvarchar(10) NULL,
+            STRAS nvarchar(35) NULL,
+            TELF1 nvarchar(16) NULL,
+            STCD1 nvarchar(16) NULL,
+            ERDAT nvarchar(8) NULL,
+            PRIMARY KEY (MANDT, KUNNR)
+        )""",
+        "columns": "MANDT, KUNNR, NAME1, ORT01, PSTLZ, STRAS, TELF1, STCD1, ERDAT",
+        "select": """'800', RIGHT(CONCAT('0000000000', n), 10), LEFT(CONCAT(f.name, ' ', l.name), 35), c.name,
+            CAST(10000 + n % 89999 AS nvarchar(10)), CONCAT('Hauptstrasse ', 1 + n % 200),
+            CONCAT('0', 30 + n % 900, '-', 100000 + n % 899999), CONCAT('DE', 100000000 + n % 899999999),
+            CONVERT(nvarchar(8), DATEADD(day, -(n % 9000), '2024-01-01'), 112)""",
+    },
+    {
+        "database": "ECC60jkl_HACK", "table": "dbo.ADRC",
+        "ddl": """
+        CREATE TABLE dbo.ADRC (
+            CLIENT nvarchar(3) NOT NULL,
+            ADDRNUMBER nvarchar(10) NOT NULL,
+            DATE_FROM nvarchar(8) NOT NULL,
+            NATION nvarchar(1) NOT NULL,
+            NAME1 nvarchar(40) NOT NULL,
+            MC_NAME1 nvarchar(25) NOT NULL,
+            CITY1 nvarchar(40) NULL,
+            POST_CODE1 nvarchar(10) NULL,
+            STREET nvarchar(60) NULL,
+            TEL_NUMBER nvarchar(30) NULL,
+            PRIMARY KEY (CLIENT, ADDRNUMBER, DATE_FROM, NATION)
+        )""",
+        "columns": "CLIENT, ADDRNUMBER, DATE_FROM, NATION, NAME1, MC_NAME1, CITY1, POST_CODE1, STREET, TEL_NUMBER",
+        "select": """'800', RIGHT(CONCAT('0000000000', n), 10), '00010101', ' ',
+            LEFT(CONCAT(f.name, ' ', l.name), 40), LEFT(UPPER(CONCAT(l.name, ' ', f.name)), 25), c.name,
+            CAST(10000 + n % 89999 AS nvarchar(10)), CONCAT('Bahnhofstrasse ', 1 + n % 300),
+            CONCAT('+41 44 ', 1000000 + n % 8999999)""",
+    },
+    {
+        "database": "ECC60jkl_HACK", "table": "dbo.ADRP",
+        "ddl": """
+        CREATE TABLE dbo.ADRP (
+            CLIENT nvarchar(3) NOT NULL,
+            PERSNUMBER nvarchar(10) NOT NULL,
+            DATE_FROM nvarchar(8) NOT NULL,
+            NATION nvarchar(1) NOT NULL,
+            NAME_FIRST nvarchar(40) NOT NULL,
+            NAME_LAST nvarchar(40) NOT NULL,
+            NAME_TEXT nvarchar(80) NOT NULL,
+            BIRTHDT nvarchar(8) NULL,
+            PRIMARY KEY (CLIENT, PERSNUMBER, DATE_FROM, NATION)
+        )""",
+        "columns": "CLIENT, PERSNUMBER, DATE_FROM, NATION, NAME_FIRST, NAME_LAST, NAME_TEXT, BIRTHDT",
+        "select": """'800', RIGHT(CONCAT('0000000000', n), 10), '00010101', ' ', f.name, l.name,
+            CONCAT(f.name, ' ', l.name), CONVERT(nvarchar(8), DATEADD(day, -(6000 + n % 25000), '2024-01-01'), 112)""",
+    },
+    {
+        "database": "AdventureWorks2019", "table": "Person.Person", "schema": "Person",
+        "ddl": """
+        CREATE TABLE Person.Person (
+            BusinessEntityID int NOT NULL PRIMARY KEY,
+            PersonType nchar(2) NOT NULL,
+            FirstName nvarchar(50) NOT NULL,
+            MiddleName nvarchar(50) NULL,
+            LastName nvarchar(50) NOT NULL,
+            EmailPromotion int NOT NULL,
+            ModifiedDate datetime NOT NULL
+        )""",
+        "columns": "BusinessEntityID, PersonType, FirstName, MiddleName, LastName, EmailPromotion, ModifiedDate",
+        "select": """n, CASE WHEN n % 10 = 0 THEN 'EM' ELSE 'IN' END, f.name, NULL, l.name, n % 3,
+            DATEADD(minute, -(n % 15250000), '2024-01-01')""",
+    },
+]
+
+RESULTS_DDL = """
+CREATE TABLE dbo.identified_names_team_beta (
+    [key] nvarchar(200) NOT NULL,
+    encrypt_key nvarchar(100) NULL,
+    source nvarchar(400) NULL,
+    name nvarchar(max) NULL,
+    probability float NULL
+)"""
+
+# Wide catalog column vocabulary: name stem, SQL type, value expression over n
+CATALOG_COLUMNS = [
+    ("EMAIL", "nvarchar(320)", "CONCAT('user', n, '@example.com')"),
+    ("PHONE", "nvarchar(40)", "CONCAT('+49 ', 30 + n % 900, ' ', 1000000 + n % 8999999)"),
+    ("BIRTH_DATE", "date", "DATEADD(day, -(6000 + n % 25000), '2024-01-01')"),
+    ("IBAN", "nvarchar(34)", "'DE89370400440532013000'"),
+    ("FIRST_NAME", "nvarchar(50)", "CONCAT('Name', n % 997)"),
+    ("LAST_NAME", "nvarchar(50)", "CONCAT('Surname', n % 991)"),
+    ("STREET", "nvarchar(60)", "CONCAT('Hauptstrasse ', 1 + n % 200)"),
+    ("AMOUNT", "decimal(15,2)", "CAST(n % 100000 AS decimal(15,2)) / 100"),
+    ("QUANTITY", "int", "CAST(n % 1000 AS int)"),
+    ("STATUS", "nvarchar(10)", "CASE n % 3 WHEN 0 THEN 'OPEN' WHEN 1 THEN 'CLOSED' ELSE 'HOLD' END"),
+    ("CREATED_AT", "datetime", "DATEADD(minute, -(n % 1000000), '2024-01-01')"),
+    ("CODE", "nvarchar(10)", "RIGHT(CONCAT('0000', n % 10000), 4)"),
+    ("DESCRIPTION", "nvarchar(200)", "CONCAT('Item ', n)"),
+    ("PAYLOAD", "varbinary(64)", "CAST(n AS varbinary(64))"),
+]
+
+
+def standin_server() -> str:
+    """Server the SQL_* environment points at; exits when it was not set explicitly"""
+    template = os.getenv("SQL_CONNECTION_STRING")
+    if template:
+        match = re.search(r"(?:^|;)\s*(?:server|data source|address|addr)\s*=\s*([^;]+)", template, re.IGNORECASE)
+        return match.group(1).strip() if match else ""
+    if os.getenv("SQL_SERVER"):
+        return server
+    sys.exit("❌ SQL_SERVER (or SQL_CONNECTION_STRING) is not set - refusing to run against the shared default server")
+
+
+def is_local_server(name: str) -> bool:
+    """localhost, 127.0.0.1, (local), "." ... with optional tcp: prefix, port or instance name"""
+    host = re.sub(r"^(?:tcp|np|lpc):", "", name.strip(), flags=re.IGNORECASE)
+    host = re.split(r"[,\\]", host)[0].strip().lower()
+    return host in LOCAL_SERVERS
+
+
+def require_local_or(flag: str, action: str) -> str:
+    """The stand-in server, exiting unless it is local or `flag` was passed"""
+    target = standin_server()
+    if not is_local_server(target):
+        sys.exit(f"❌ {target or 'SQL_CONNECTION_STRING'} is not a local server - pass {flag} to {action} anyway")
+    return target
+
+
+def connect(database: str = "master"):
+    return pyodbc.connect(get_connection_string(database), autocommit=True)
+
+
+def execute(cursor, sql: str, *params):
+    cursor.execute(sql, *params)
+    while cursor.nextset():
+        pass
+
+
+def recreate_databases(cursor, keep: bool):
+    for database in STANDIN_DATABASES:
+        if not keep:
+            execute(cursor, f"""
+            IF DB_ID(N'{database}') IS NOT NULL
+            BEGIN
+                ALTER DATABASE [{database}] SET SINGLE_USER WITH ROLLBACK IMMEDIATE;
+                DROP DATABASE [{database}];
+            END""")
+        execute(cursor, f"IF DB_ID(N'{database}') IS NULL CREATE DATABASE [{database}]")
+        # Bulk loads and no point-in-time restore needed for a benchmark stand-in
+        execute(cursor, f"ALTER DATABASE [{database}] SET RECOVERY SIMPLE")
+
+
+def load_name_tables(cursor):
+    for table, values in (("#first_names", FIRST_NAMES), ("#last_names", LAST_NAMES), ("#cities", CITIES)):
+        execute(cursor, f"IF OBJECT_ID('tempdb..{table}') IS NOT NULL DROP TABLE {table}")
+        execute(cursor, f"CREATE TABLE {table} (id int NOT NULL PRIMARY KEY, name nvarchar(60) NOT NULL)")
+        cursor.executemany(f"INSERT INTO {table} (id, name) VALUES (?, ?)", list(enumerate(values)))
+
+
+def fill(cursor, target: str, columns: str, select: str, rows: int, joins: str = ""):
+    """INSERT ... SELECT over the row generator in SEED_BATCH_ROWS batches"""
+    for offset in range(0, rows, SEED_BATCH_ROWS):
+        batch = min(SEED_BATCH_ROWS, rows - offset)
+        execute(cursor, NUMBERS_CTE.format(batch=batch, offset=offset) +
+                f"INSERT INTO {target} WITH (TABLOCK) ({columns}) SELECT {select} FROM numbers {joins}")
+
+
+def seed_erp_tables(cursor, rows: int):
+    joins = NAME_JOIN.format(first_count=len(FIRST_NAMES), last_count=len(LAST_NAMES), city_count=len(CITIES))
+    for spec in ERP_TABLES:
+        start = time.time()
+        execute(cursor, f"USE [{spec['database']}]")
+        if spec.get("schema"):
+            execute(cursor, f"IF SCHEMA_ID(N'{spec['schema']}') IS NULL EXEC('CREATE SCHEMA [{spec['schema']}]')")
+        execute(cursor, f"IF OBJECT_ID(N'{spec['table']}') IS NOT NULL DROP TABLE {spec['table']}")
+        execute(cursor, spec["ddl"])
+        fill(cursor, spec["table"], spec["columns"], spec["select"], rows, joins)
+        print(f"✔ {spec['database']}.{spec['table']}: {rows:,} rows [{time.time() - start:.1f}s]")
+
+    execute(cursor, "USE [Results]")
+    execute(cursor, "IF OBJECT_ID(N'dbo.identified_names_team_beta') IS NULL" + RESULTS_DDL)
+
+
+def seed_catalog(cursor, tables: int, columns: int, rows: int, seed: int):
+    """Wide catalog: many tables with a random mix of personal and business columns"""
+    rng = random.Random(seed)
+    start = time.time()
+    execute(cursor, f"USE [{CATALOG_DATABASE}]")
+    for schema in ("sales", "hr", "finance", "crm"):
+        execute(cursor, f"IF SCHEMA_ID(N'{schema}') IS NULL EXEC('CREATE SCHEMA [{schema}]')")
+    for t in range(tables):
+        schema = ("sales", "hr", "finance", "crm")[t % 4]
+        table = f"[{schema}].[T{t:05d}]"
+        chosen = [rng.choice(CATALOG_COLUMNS) for _ in range(columns - 1)]
+        names = ["ID"] + [f"{stem}_{i}" for i, (stem, _, _) in enumerate(chosen, start=1)]
+        ddl = ", ".join(["[ID] bigint NOT NULL PRIMARY KEY"] +
+                        [f"[{name}] {sql_type} NULL" for name, (_, sql_type, _) in zip(names[1:], chosen)])
+        execute(cursor, f"IF OBJECT_ID(N'{schema}.T{t:05d}') IS NOT NULL DROP TABLE {table}")
+        execute(cursor, f"CREATE TABLE {table} ({ddl})")
+        if rows:
+            select = ", ".join(["n"] + [expression for _, _, expression in chosen])
+            fill(cursor, table, ", ".join(f"[{name}]" for name in names), select, rows)
+        if (t + 1) % 250 == 0:
+            print(f"  catalog: {t + 1:,}/{tables:,} tables")
+    print(f"✔ {CATALOG_DATABASE}: {tables:,} tables x {columns} columns, {rows:,} rows each "
+          f"[{time.time() - start:.1f}s]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help=f"rows per ERP table ({MIN_ROWS:,}-{MAX_ROWS:,})")
+    parser.add_argument("--catalog-tables", type=int, default=1000)
+    parser.add_argument("--catalog-columns", type=int, default=30)
+    parser.add_argument("--catalog-rows", type=int, default=200, help="rows per catalog table")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="do not drop existing stand-in databases")
+    parser.add_argument("--drop", action="store_true", help="allow dropping databases/tables on a non-local server")
+    args = parser.parse_args()
+    if not MIN_ROWS <= args.rows <= MAX_ROWS:
+        parser.error(f"--rows must be between {MIN_ROWS:,} and {MAX_ROWS:,}")
+    target = standin_server() if args.drop else require_local_or("--drop", "drop and reseed the stand-in tables")
+    print(f"🗄️ Seeding stand-in on {target}")
+
+    start = time.time()
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        recreate_databases(cursor, args.keep)
+        load_name_tables(cursor)
+        seed_erp_tables(cursor, args.rows)
+        seed_catalog(cursor, args.catalog_tables, max(2, args.catalog_columns), args.catalog_rows, args.seed)
+        execute(cursor, "USE [master]")
+    finally:
+        conn.close()
+    print(f"✅ Stand-in seeded in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Bulk multi-subject search: many names against every SEARCH_TARGETS column.
+
+Instead of one LIKE query per name per target, the names are loaded into a
+temp table and joined against each target once, so the number of table scans
+grows with the number of targets rather than names x targets. The LIKEs only
+run against the distinct values of the column (long enough to contain a
+name); matching rows are then fetched with an equality join. Names are sent
+in batches of at most BULK_SEARCH_MAX_NAMES. Targets with a fresh local name
+index are answered from the index without touching SQL.
+
+    python bulk_search.py names.txt -o results.json
+"""
+import argparse
+import contextvars
+import json
+import sys
+import time
+from concurrent.futures import as_completed
+from fastapi.encoders import jsonable_encoder
+
+from metrics import stage, target_query_seconds
+from name_index import get_name_index, format_row_key, target_id
+from pydantic_stuff import BULK_SEARCH_MAX_NAMES
+from sql_extraction import SEARCH_TARGETS, get_db_connection, search_executor, format_results_as_datarecordsearch
+
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+def bulk_query_target_sql(entry, names):
+    """One set-based join of all names against one target; returns name index -> hits"""
+    db, schema, table, column = entry["database"], entry["schema"], entry["table"], entry["column"]
+    key_columns = entry.get("key", [])
+    selected = ", ".join(f"t.[{c}]" for c in key_columns + [column])
+    matches = {}
+
+    with get_db_connection(db) as conn:
+        cursor = conn.cursor()
+        try:
+            drop_temp_tables(cursor)
+            cursor.execute("CREATE TABLE #search_names (name_id int NOT NULL PRIMARY KEY, "
+                           "pattern nvarchar(4000) NOT NULL, name_length int NOT NULL)")
+            cursor.fast_executemany = True
+            rows = [(i, f"%{name}%", len(name)) for i, name in enumerate(names)]
+            for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+                cursor.executemany("INSERT INTO #search_names (name_id, pattern, name_length) VALUES (?, ?, ?)",
+                                   rows[start:start + BULK_INSERT_CHUNK_SIZE])
+
+            start_time = time.time()
+            with stage("bulk_search_query"):
+                # SELECT INTO keeps the column's collation, so the equality join back needs no COLLATE
+                cursor.execute(f"""
+                SELECT DISTINCT t.[{column}] AS value INTO #search_values
+                FROM [{schema}].[{table}] t
+                WHERE LEN(t.[{column}]) >= ?
+                """, (min(len(name) for name in names),))
+                cursor.execute("""
+                SELECT n.name_id, v.value INTO #search_hits
+                FROM #search_values v
+                JOIN #search_names n
+                  ON LEN(v.value) >= n.name_length AND v.value COLLATE Latin1_General_CI_AI LIKE n.pattern
+                """)
+                cursor.execute(f"""
+                SELECT h.name_id, {selected}
+                FROM #search_hits h
+                JOIN [{schema}].[{table}] t ON t.[{column}] = h.value
+                """)
+                fetched = cursor.fetchall()
+            target_query_seconds.observe(time.time() - start_time, target=target_id(entry))
+            for row in fetched:
+                matches.setdefault(row[0], []).append({
+                    "database": db,
+                    "schema": schema,
+                    "table": table,
+                    "column": column,
+                    "name": row[1 + len(key_columns)],
+                    "key": format_row_key(row[1:1 + len(key_columns)]),
+                })
+            print(f"✔ {target_id(entry)}: {sum(len(v) for v in matches.values())} match(es) "
+                  f"for {len(names)} name(s) [{time.time() - start_time:.2f}s]")
+        finally:
+            try:
+                drop_temp_tables(cursor)
+                conn.commit()
+            except Exception as e:  # must not hide the error that got us here
+                print(f"⚠️ Could not drop the bulk search temp tables on {db}: {e}")
+    return matches
+
+
+def drop_temp_tables(cursor):
+    for name in ("#search_names", "#search_values", "#search_hits"):
+        cursor.execute(f"IF OBJECT_ID('tempdb..{name}') IS NOT NULL DROP TABLE {name}")
+
+
+def search_names_bulk(names, targets=SEARCH_TARGETS):
+    """
+    Search many names at once.
+
+    Returns (results, errors): results is a list of {"name", "records"} in
+    input order with DataRecordSearch records sorted by similarity; errors
+    lists targets that could not be searched.
+    """
+    unique_names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+    hits = {i: [] for i in range(len(unique_names))}
+    errors = []
+
+    index = get_name_index()
+    index.reload()
+    stale_targets = []
+    for entry in targets:
+        if not index.is_fresh(entry):
+            stale_targets.append(entry)
+            continue
+        for i, name in enumerate(unique_names):
+            hits[i].extend(index.search(name, [entry])[0])
+
+    if stale_targets and unique_names:
+        print(f"🚀 Bulk querying {len(stale_targets)} stale target(s) for {len(unique_names)} name(s)...")
+        futures = {
+            search_executor.submit(contextvars.copy_context().run, bulk_query_target_sql, entry,
+                                   unique_names[offset:offset + BULK_SEARCH_MAX_NAMES]): (entry, offset)
+            for offset in range(0, len(unique_names), BULK_SEARCH_MAX_NAMES)
+            for entry in stale_targets
+        }
+        failed = set()
+        for future in as_completed(futures):
+            entry, offset = futures[future]
+            try:
+                for i, found in future.result().items():
+                    hits[offset + i].extend(found)
+            except Exception as e:
+                print(f"⚠️ Error bulk querying {target_id(entry)}: {e}")
+                if target_id(entry) not in failed:
+                    failed.add(target_id(entry))
+                    errors.append({"target": target_id(entry), "error": str(e)})
+
+    records = {name: format_results_as_datarecordsearch(hits[i], name) for i, name in enumerate(unique_names)}
+    results = [{"name": name, "records": records.get(name.strip(), [])} for name in names]
+    return results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search many names (one per line) across all search targets")
+    parser.add_argument("names_file", help="file with one full name per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="bulk_search_results.json", help="JSON results file")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.names_file == "-" else open(args.names_file, encoding="utf-8")
+    with source:
+        names = [line.strip() for line in source if line.strip()]
+
+    start = time.time()
+    results, errors = search_names_bulk(names)
+    print(f"✅ Searched {len(names)} name(s) in {time.time() - start:.2f}s")
+    for error in errors:
+        print(f"⚠️ {error['target']} was not searched: {error['error']}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(jsonable_encoder({"results": results, "errors": errors}), f, indent=2, ensure_ascii=False)
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
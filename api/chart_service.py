@@ -0,0 +1,129 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from gdpr_risk_analyzer import fetch_record_aging, render_aging_chart
+from metrics import stage
+
+# === Chart Rendering Service ===
+# Aggregated series are cached for a short TTL per (database, parameters);
+# rendered output is cached per (series version, format, dpi) so repeated
+# dashboard loads neither re-query nor re-render, and clients holding the
+# current ETag get a 304 without a body.
+CHART_DATA_TTL = 300             # seconds an aggregated series is reused
+CHART_SERIES_CACHE_SIZE = 128    # aggregated series kept (LRU; keys come from query parameters)
+CHART_RENDER_CACHE_SIZE = 64     # rendered images kept (LRU)
+CHART_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+}
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """If-None-Match header (a list of possibly weak ETags, or *) against the current ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == etag:
+            return True
+    return False
+
+
+class ChartService:
+    def __init__(self, data_ttl: float = CHART_DATA_TTL, render_cache_size: int = CHART_RENDER_CACHE_SIZE,
+                 series_cache_size: int = CHART_SERIES_CACHE_SIZE):
+        self.data_ttl = data_ttl
+        self.render_cache_size = render_cache_size
+        self.series_cache_size = series_cache_size
+        self._series = OrderedDict()     # (database, params) -> series dict
+        self._renders = OrderedDict()    # etag -> bytes
+        self._lock = threading.Lock()
+
+    def get_series(self, database_name: str, params: tuple) -> dict:
+        """
+        Aggregated aging series for (table, date_column, start, end, age_years).
+
+        The version is a hash of the data itself, so it only changes when the
+        chart would actually look different.
+        """
+        key = (database_name, params)
+        with self._lock:
+            series = self._series.get(key)
+            if series is not None:
+                self._series.move_to_end(key)
+        if series is not None and time.time() - series["fetched_at"] < self.data_ttl:
+            return series
+
+        df = fetch_record_aging(database_name, *params)
+        digest = hashlib.sha1()
+        digest.update(repr((database_name, params)).encode("utf-8"))
+        digest.update(df[['OlderRows', 'TotalRows']].to_numpy().tobytes())
+        series = {
+            "database": database_name,
+            "params": params,
+            "df": df,
+            "version": digest.hexdigest()[:16],
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self._series[key] = series
+            self._series.move_to_end(key)
+            expired = [k for k, s in self._series.items() if series["fetched_at"] - s["fetched_at"] >= self.data_ttl]
+            for k in expired:
+                del self._series[k]
+            while len(self._series) > self.series_cache_size:
+                self._series.popitem(last=False)
+        return series
+
+    @staticmethod
+    def etag(series: dict, image_format: str, dpi: int) -> str:
+        suffix = image_format if image_format == "json" else f"{image_format}-{dpi}"
+        return f'"{series["version"]}-{suffix}"'
+
+    def cached(self, etag: str):
+        with self._lock:
+            body = self._renders.get(etag)
+            if body is not None:
+                self._renders.move_to_end(etag)
+            return body
+
+    def render(self, series: dict, image_format: str, dpi: int) -> bytes:
+        """Render (or serialize) a series, caching the result under its ETag"""
+        etag = self.etag(series, image_format, dpi)
+        body = self.cached(etag)
+        if body is not None:
+            return body
+
+        df = series["df"]
+        age_years = series["params"][-1]
+        if image_format == "json":
+            body = json.dumps({
+                "database": series["database"],
+                "age_years": age_years,
+                "total_rows": int(df['TotalRows'].iloc[0]) if len(df) else 0,
+                "months": [m.strftime('%Y-%m') for m in df['Month']],
+                "older_rows": [int(v) for v in df['OlderRows']],
+                "percentage_older": [round(float(v), 4) for v in df['PercentageOlder']],
+            }).encode("utf-8")
+        else:
+            with stage("render"):
+                body = render_aging_chart(df, age_years, image_format=image_format, dpi=dpi)
+
+        with self._lock:
+            self._renders[etag] = body
+            self._renders.move_to_end(etag)
+            while len(self._renders) > self.render_cache_size:
+                self._renders.popitem(last=False)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._renders.clear()
+
+
+chart_service = ChartService()
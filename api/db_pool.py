@@ -0,0 +1,306 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections for a single database.
+
+    - **connect**: zero-argument callable that opens a new connection
+    - **min_size**: connections kept open even when idle
+    - **max_size**: hard cap on open connections (checked out + idle)
+    - **checkout_timeout**: seconds to wait for a free connection
+    - **idle_timeout**: idle connections above min_size are closed after this many seconds
+    - **health_check_interval**: idle connections older than this are pinged before reuse
+    """
+
+    def __init__(self, connect, name: str = "", min_size: int = 1, max_size: int = 10,
+                 checkout_timeout: float = 30, idle_timeout: float = 300,
+                 health_check_interval: float = 30):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool sizes: need 0 <= min_size <= max_size and max_size >= 1")
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._connect = connect
+        self._idle = deque()  # (connection, last_used) - most recently used on the right
+        self._size = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Counters exposed via stats()
+        self._checkouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._evicted = 0
+        self._timeouts = 0
+        self._failed_health_checks = 0
+        self._waiting = 0
+        self._total_wait = 0.0
+
+    # ----- Checkout / return -----
+    def acquire(self, timeout: float = None):
+        """Check out a connection, opening a new one if the pool is below max_size"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool '{self.name}' is closed")
+                self._evict_idle_locked()
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    create = False
+                elif self._size < self.max_size:
+                    self._size += 1  # reserve the slot before connecting outside the lock
+                    conn, last_used, create = None, None, True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {timeout:.1f}s waiting for a connection to '{self.name}' "
+                            f"({self._size}/{self.max_size} in use)"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    continue
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+                # Stale connection (server restart, network drop, ...): drop it and retry
+                self._discard(conn)
+                with self._cond:
+                    self._failed_health_checks += 1
+                continue
+
+            with self._cond:
+                self._checkouts += 1
+                self._total_wait += time.monotonic() - start
+            return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool; broken connections should be discarded"""
+        if not discard:
+            try:
+                # Never hand the next caller an open transaction
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            # release() rolls back; a failing rollback means the connection is unusable
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    # ----- Maintenance -----
+    def warm(self):
+        """Open connections until min_size are idle"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._created += 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def evict_idle(self):
+        """Close idle connections above min_size that exceeded idle_timeout"""
+        with self._cond:
+            self._evict_idle_locked()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            in_use = self._size - len(self._idle)
+            return {
+                "database": self.name,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": in_use,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "evicted_idle": self._evicted,
+                "checkout_timeouts": self._timeouts,
+                "failed_health_checks": self._failed_health_checks,
+                "avg_checkout_wait_ms": round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+            }
+
+    # ----- Internals -----
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        # Oldest idle connections sit on the left
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_quietly(conn)
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class PoolRegistry:
+    """
+    Lazily creates one ConnectionPool per database name. New pools are warmed
+    to min_size; start_maintenance() keeps them there and evicts idle
+    connections even when no requests come in.
+    """
+
+    def __init__(self, connect_factory, **pool_options):
+        self._connect_factory = connect_factory
+        self._pool_options = pool_options
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._maintenance_stop = threading.Event()
+        self._maintenance_thread = None
+
+    def get(self, database: str) -> ConnectionPool:
+        pool = self._pools.get(database)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(database)
+                if pool is None:
+                    pool = ConnectionPool(
+                        lambda: self._connect_factory(database), name=database, **self._pool_options
+                    )
+                    self._pools[database] = pool
+                    created = True
+                else:
+                    created = False
+            if created:
+                self._warm_quietly(pool)
+        return pool
+
+    def connection(self, database: str, timeout: float = None):
+        return self.get(database).connection(timeout)
+
+    def stats(self) -> list:
+        with self._lock:
+            pools = list(self._pools.values())
+        return [pool.stats() for pool in pools]
+
+    def maintain(self):
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.evict_idle()
+            self._warm_quietly(pool)
+
+    def start_maintenance(self, interval: float = 30):
+        """Run maintain() every `interval` seconds on a daemon thread (idempotent)"""
+        with self._lock:
+            if self._maintenance_thread is not None:
+                return
+            self._maintenance_stop.clear()
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, args=(interval,), name="pool-maintenance", daemon=True
+            )
+            self._maintenance_thread.start()
+
+    def _maintenance_loop(self, interval: float):
+        while not self._maintenance_stop.wait(interval):
+            self.maintain()
+
+    @staticmethod
+    def _warm_quietly(pool: ConnectionPool):
+        # Warming is best effort: acquire() still connects (and reports errors) on demand
+        try:
+            pool.warm()
+        except Exception as e:
+            print(f"⚠️ Could not pre-open connections for '{pool.name}': {e}")
+
+    def close_all(self):
+        self._maintenance_stop.set()
+        with self._lock:
+            self._maintenance_thread = None
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from itertools import combinations
+
+from name_index import normalize_name
+
+# === Entity Resolution ===
+# Groups search hits from different sources (AR_HZ_PARTIES, KNA1, ADRC,
+# ADRP, ...) into candidate persons. Hits are first collapsed to distinct
+# token keys (normalized, token-sorted names: "JONAS, Paul" and "Paul Jonas"
+# are the same key), and every key gets its blocking keys and token bigrams
+# once. Names are only compared within a block:
+#
+# - Soundex of every pair of tokens ("MUELLER MAX" / "Max Müller"), and
+# - each exact token, so a typo in one token is caught through the others.
+#
+# Small blocks are compared all-pairs; larger ones only compare neighbours
+# after sorting on the rest of the name, forwards and reversed, so the work
+# stays near-linear in the number of distinct names. Two names are linked
+# when their tokens, paired up by bigram Dice coefficient (order-insensitive,
+# tolerant to single typos), score at least ENTITY_MATCH_THRESHOLD; links
+# are merged with union-find. A cluster's confidence is the mean score of the
+# links that formed it (1.0 when all its hits have the same name).
+#
+# Measured false-merge rate (benchmarks/bench_entity_resolution.py, synthetic
+# names with source spellings and typos):
+#
+#   threshold   hits / people   clusters   mixing people   people split
+#   0.85        50k / 5k        4,816      394             271
+#   0.90        50k / 5k        5,730       88             713
+#   0.85        20k / 200         242        1              25
+#   0.90        20k / 200         439        0             119
+#
+# With many similar names (5k people sharing ~200 surnames) about 8% of the
+# clusters mix different people. These are direct links between close names
+# ("Liam Kesselbauer" / "Liam Kesselberger", often bridged by a typo), so a
+# stricter representative check does not reduce them (0.95 there: still 397);
+# only a higher threshold does, at the cost of splitting typo variants of the
+# same person. Clusters are candidates for an operator to confirm, never
+# erased as a whole, so recall wins; raise the threshold (env
+# ENTITY_MATCH_THRESHOLD) where false merges cost more than splits.
+ENTITY_MATCH_THRESHOLD = float(os.getenv("ENTITY_MATCH_THRESHOLD", "0.85"))   # name_score from which two names are linked
+ENTITY_BLOCK_MAX = 50            # distinct names per block compared all-pairs
+ENTITY_NEIGHBOUR_WINDOW = 5      # neighbours compared in larger blocks (per sort order)
+ENTITY_MAX_TOKENS = 5            # tokens per name used for blocking keys
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def soundex(token: str) -> str:
+    """American Soundex of an (already case/accent folded) token; digits are kept as they are"""
+    letters = [ch for ch in token if "a" <= ch <= "z"]
+    if not letters:
+        return token
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], "")
+    for ch in letters[1:]:
+        digit = SOUNDEX_CODES.get(ch, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if ch not in "hw":  # h and w do not separate equal codes
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def token_key(name: str) -> str:
+    return " ".join(sorted(re.findall(r"\w+", normalize_name(name))))
+
+
+def blocking_keys(key: str) -> set:
+    """
+    Soundex of every token pair ("Max Müller" / "MUELLER MAX" / "Max A. Muller"
+    share M200|M460) plus every exact token
+    """
+    tokens = key.split()[:ENTITY_MAX_TOKENS]
+    codes = sorted({soundex(token) for token in tokens})
+    keys = {f"t:{token}" for token in tokens}
+    if len(codes) == 1:
+        keys.add(f"s:{codes[0]}")
+    else:
+        keys.update(f"s:{a}|{b}" for a, b in combinations(codes, 2))
+    return keys
+
+
+def token_bigrams(key: str) -> list:
+    """Bigram set of every token, padded with spaces ("max" -> " m", "ma", "ax", "x ")"""
+    return [frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+            for padded in (f" {token} " for token in key.split())]
+
+
+def name_score(left: list, right: list) -> float:
+    """
+    Token-aligned similarity in [0, 1]: each token is paired with its most
+    similar unused token of the other name, and unpaired tokens count as 0,
+    so "Marie Falkendorf" / "Marie Louis Falkendorf" stays below a typo
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    if not left:
+        return 0.0
+    unused = list(right)
+    total = 0.0
+    for token in left:
+        best, best_score = 0, -1.0
+        for i, other in enumerate(unused):
+            score = 2 * len(token & other) / (len(token) + len(other))
+            if score > best_score:
+                best, best_score = i, score
+        del unused[best]
+        total += best_score
+    return 2 * total / (len(left) + len(right))
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> int:
+        root = self.parent[self.find(a)] = self.find(b)
+        return root
+
+
+def _candidate_pairs(block_key: str, block: list, keys: list):
+    if len(block) <= ENTITY_BLOCK_MAX:
+        yield from combinations(block, 2)
+        return
+    # Sorted neighbourhood on what differs within the block: the other tokens
+    # for token blocks; forwards catches late typos, reversed early ones
+    shared = block_key[2:] if block_key.startswith("t:") else None
+    rest = {k: " ".join(token for token in keys[k].split() if token != shared) for k in block}
+    for sort_key in (lambda k: rest[k], lambda k: rest[k][::-1]):
+        ordered = sorted(block, key=sort_key)
+        for i in range(len(ordered)):
+            for j in range(i + 1, min(i + 1 + ENTITY_NEIGHBOUR_WINDOW, len(ordered))):
+                yield ordered[i], ordered[j]
+
+
+def resolve_entities(records, threshold: float = ENTITY_MATCH_THRESHOLD) -> list:
+    """
+    Group DataRecordSearch hits into candidate persons.
+
+    Returns clusters as dicts (entity_id, name, confidence, probability,
+    sources, records), best match to the searched name first.
+    """
+    by_key = {}
+    for record in records:
+        by_key.setdefault(token_key(record.name), []).append(record)
+    keys = list(by_key)
+    grams = [token_bigrams(key) for key in keys]
+
+    blocks = {}
+    for position, key in enumerate(keys):
+        for block_key in blocking_keys(key):
+            blocks.setdefault(block_key, []).append(position)
+
+    # Clusters only merge when their representatives (most hits) match too,
+    # so chains of small differences (Lena -> Elena -> Elena Chiara) stop
+    links = _UnionFind(len(keys))
+    representative = list(range(len(keys)))
+    link_scores = []
+    compared = set()   # names sharing several blocks are compared once
+    for block_key, block in blocks.items():
+        if len(block) < 2:
+            continue
+        for a, b in _candidate_pairs(block_key, block, keys):
+            root_a, root_b = links.find(a), links.find(b)
+            if root_a == root_b or (a, b) in compared or (b, a) in compared:
+                continue
+            compared.add((a, b))
+            # Unpaired tokens score 0: skip pairs that cannot reach the threshold
+            shorter, longer = sorted((len(grams[a]), len(grams[b])))
+            if 2 * shorter / (shorter + longer) < threshold:
+                continue
+            score = name_score(grams[a], grams[b])
+            if score < threshold:
+                continue
+            rep_a, rep_b = representative[root_a], representative[root_b]
+            if (rep_a, rep_b) != (a, b) and name_score(grams[rep_a], grams[rep_b]) < threshold:
+                continue
+            root = links.union(a, b)
+            representative[root] = max(rep_a, rep_b, key=lambda k: len(by_key[keys[k]]))
+            link_scores.append((a, score))
+
+    members = {}
+    for position in range(len(keys)):
+        members.setdefault(links.find(position), []).append(position)
+    scores = {}
+    for position, score in link_scores:
+        scores.setdefault(links.find(position), []).append(score)
+
+    clusters = []
+    for root, positions in members.items():
+        cluster_records = sorted(
+            (record for position in positions for record in by_key[keys[position]]),
+            key=lambda record: record.probability, reverse=True
+        )
+        cluster_scores = scores.get(root)
+        names = Counter(record.name for record in cluster_records)
+        row_ids = sorted(f"{record.source}|{record.key}" for record in cluster_records)
+        clusters.append({
+            "entity_id": hashlib.sha1("\n".join(row_ids).encode("utf-8")).hexdigest()[:16],
+            # Most frequent spelling; ties go to the better match (records are sorted by probability)
+            "name": max(names, key=lambda name: names[name]),
+            "confidence": round(sum(cluster_scores) / len(cluster_scores), 2) if cluster_scores else 1.0,
+            "probability": cluster_records[0].probability,
+            "sources": sorted({record.source for record in cluster_records}),
+            "records": cluster_records,
+        })
+
+    clusters.sort(key=lambda cluster: (cluster["probability"], len(cluster["records"])), reverse=True)
+    return clusters
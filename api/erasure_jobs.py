@@ -0,0 +1,413 @@
+"""
+Resumable erasure jobs against the source tables behind SEARCH_TARGETS.
+
+A job applies "mask" or "delete" to the rows found by a search (identified by
+their source db.schema.table.column and row key). Per target, the keys are
+sorted and cut into bounded chunks; each chunk is loaded into a temp table and
+applied with one set-based UPDATE/DELETE in its own short transaction, so row
+locks are held only for one chunk and stay below the lock escalation
+threshold. Progress is checkpointed to a JSON file after every chunk, and an
+interrupted job resumes from the last committed chunk. Re-applying a chunk is
+harmless: deleted rows are gone and masked rows no longer match the original
+value.
+
+When a target finishes, cached /search results are dropped in every process
+sharing the search cache generation file, and the erased row keys are
+tombstoned in the target's name index segment (no rebuild), so erased rows
+stop showing up in searches.
+
+    python erasure_jobs.py run job.json
+    python erasure_jobs.py resume <job_id>
+    python erasure_jobs.py status [job_id]
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from masking import get_masking_engine
+from name_index import fetch_target_signal, format_row_key, get_name_index, parse_row_key, record_erasure, target_id
+from search_cache import search_cache
+from sql_extraction import SEARCH_TARGETS, get_db_connection
+
+# === Erasure Jobs ===
+ERASURE_JOB_DIR = os.getenv("ERASURE_JOB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".erasure_jobs"))
+ERASURE_CHUNK_SIZE = 500           # keys per transaction (well below the 5000-lock escalation threshold)
+ERASURE_LOCK_TIMEOUT_MS = 2000     # SET LOCK_TIMEOUT per chunk; blocked chunks are retried
+ERASURE_LOCK_RETRIES = 5
+ERASURE_MAX_WORKERS = 4            # targets processed in parallel
+ERASURE_PER_DATABASE_LIMIT = 2     # concurrent targets per database
+LOCK_TIMEOUT_ERROR = "1222"        # SQL Server: lock request time out period exceeded
+
+_targets_by_id = {target_id(entry): entry for entry in SEARCH_TARGETS}
+_database_slots = {}
+_database_slots_lock = threading.Lock()
+_job_executor = ThreadPoolExecutor(max_workers=ERASURE_MAX_WORKERS, thread_name_prefix="erasure")
+_running = {}                      # job_id -> Thread
+_running_lock = threading.Lock()
+_checkpoint_lock = threading.Lock()
+
+
+def database_slot(database: str) -> threading.Semaphore:
+    with _database_slots_lock:
+        if database not in _database_slots:
+            _database_slots[database] = threading.Semaphore(ERASURE_PER_DATABASE_LIMIT)
+        return _database_slots[database]
+
+
+# ----- Checkpoints -----
+# The key lists are written once per job; the checkpoint file rewritten after
+# every chunk only holds the (small) progress counters.
+def job_path(job_id: str, suffix: str = ".json") -> str:
+    if not job_id.isalnum():
+        raise KeyError(f"Unknown erasure job: {job_id}")
+    return os.path.join(ERASURE_JOB_DIR, f"{job_id}{suffix}")
+
+
+def _write_json(path: str, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def save_job(job: dict):
+    os.makedirs(ERASURE_JOB_DIR, exist_ok=True)
+    with _checkpoint_lock:
+        job["updated_at"] = time.time()
+        checkpoint = dict(job, targets=[
+            {k: v for k, v in target.items() if k != "keys"} for target in job["targets"]
+        ])
+        _write_json(job_path(job["job_id"]), checkpoint)
+
+
+def load_job(job_id: str) -> dict:
+    path = job_path(job_id)
+    if not os.path.exists(path):
+        raise KeyError(f"Unknown erasure job: {job_id}")
+    with open(path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+    with open(job_path(job_id, ".keys.json"), "r", encoding="utf-8") as f:
+        keys = json.load(f)
+    for target in job["targets"]:
+        target["keys"] = keys[target["source"]]
+    return job
+
+
+def job_status(job: dict) -> dict:
+    """Job summary without the (potentially large) key lists"""
+    with _running_lock:
+        alive = job["job_id"] in _running
+    status = job["status"]
+    if status == "running" and not alive:
+        status = "interrupted"
+    return {
+        "job_id": job["job_id"],
+        "action": job["action"],
+        "status": status,
+        "created_at": job["created_at"],
+        "updated_at": job.get("updated_at"),
+        "targets": [
+            {k: v for k, v in target.items() if k not in ("keys",)}
+            for target in job["targets"]
+        ],
+    }
+
+
+def get_job_status(job_id: str) -> dict:
+    path = job_path(job_id)
+    if not os.path.exists(path):
+        raise KeyError(f"Unknown erasure job: {job_id}")
+    with open(path, "r", encoding="utf-8") as f:
+        return job_status(json.load(f))
+
+
+def list_jobs() -> list:
+    if not os.path.isdir(ERASURE_JOB_DIR):
+        return []
+    jobs = []
+    for filename in os.listdir(ERASURE_JOB_DIR):
+        if filename.endswith(".json") and not filename.endswith(".keys.json"):
+            with open(os.path.join(ERASURE_JOB_DIR, filename), "r", encoding="utf-8") as f:
+                jobs.append(job_status(json.load(f)))
+    return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+
+# ----- Job creation -----
+def create_job(action: str, records: list) -> dict:
+    """
+    records: dicts with source (db.schema.table.column), key (pipe-joined
+    key values as returned by /search, see format_row_key) and name (the
+    value found there).
+    Only configured SEARCH_TARGETS can be erased.
+    """
+    if action not in ("mask", "delete"):
+        raise ValueError(f"Unknown action: {action}")
+
+    grouped = {}
+    for record in records:
+        entry = _targets_by_id.get(record["source"])
+        if entry is None:
+            raise ValueError(f"Not a configured search target: {record['source']}")
+        key_values = parse_row_key(record["key"])
+        if len(key_values) != len(entry["key"]):
+            raise ValueError(f"Key '{record['key']}' does not match {entry['key']} for {record['source']}")
+        grouped.setdefault(record["source"], {})[tuple(key_values)] = record.get("name") or ""
+
+    targets = []
+    for source, rows in grouped.items():
+        # Sorted keys: each chunk covers a contiguous key range of the table
+        keys = [list(key) + [name] for key, name in sorted(rows.items())]
+        targets.append({
+            "source": source,
+            "total_keys": len(keys),
+            "chunks_total": (len(keys) + ERASURE_CHUNK_SIZE - 1) // ERASURE_CHUNK_SIZE,
+            "chunks_done": 0,
+            "rows_affected": 0,
+            "status": "pending",
+            "error": None,
+            "keys": keys,
+        })
+
+    job = {
+        "job_id": uuid.uuid4().hex[:12],
+        "action": action,
+        "status": "pending",
+        "created_at": time.time(),
+        "chunk_size": ERASURE_CHUNK_SIZE,
+        "targets": targets,
+    }
+    os.makedirs(ERASURE_JOB_DIR, exist_ok=True)
+    _write_json(job_path(job["job_id"], ".keys.json"), {target["source"]: target["keys"] for target in targets})
+    save_job(job)
+    return job
+
+
+# ----- Execution -----
+def column_max_length(cursor, entry) -> int:
+    cursor.execute("""
+        SELECT CHARACTER_MAXIMUM_LENGTH FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? AND COLUMN_NAME = ?
+    """, (entry["schema"], entry["table"], entry["column"]))
+    row = cursor.fetchone()
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+def column_collations(cursor, entry) -> dict:
+    """Column -> collation of the key and name columns (None for non-character columns)"""
+    columns = list(entry["key"]) + [entry["column"]]
+    cursor.execute(f"""
+        SELECT COLUMN_NAME, COLLATION_NAME FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? AND COLUMN_NAME IN ({', '.join('?' * len(columns))})
+    """, (entry["schema"], entry["table"], *columns))
+    return {name: collation for name, collation in cursor.fetchall()
+            if collation and re.fullmatch(r"\w+", collation)}
+
+
+def build_keys_table(entry, collations: dict) -> str:
+    """
+    #erasure_keys takes the collation of the columns it is joined with:
+    tempdb's default (the server's) may differ from the database's, and SAP
+    databases often use a BIN2 collation, which makes the joins fail with a
+    collation conflict.
+    """
+    def collate(column):
+        return f"COLLATE {collations.get(column) or 'DATABASE_DEFAULT'}"
+    key_columns = ", ".join(f"k{i} nvarchar(450) {collate(c)} NOT NULL" for i, c in enumerate(entry["key"]))
+    value = collate(entry["column"])
+    return (f"CREATE TABLE #erasure_keys ({key_columns}, "
+            f"original_value nvarchar(4000) {value} NULL, mask_value nvarchar(4000) {value} NULL)")
+
+
+def build_chunk_statement(entry, action: str) -> str:
+    key_columns = entry["key"]
+    join = " AND ".join(f"t.[{c}] = k.k{i}" for i, c in enumerate(key_columns))
+    table = f"[{entry['schema']}].[{entry['table']}]"
+    if action == "delete":
+        return f"DELETE t FROM {table} t WITH (ROWLOCK) JOIN #erasure_keys k ON {join}"
+    # Only rows still holding the value that was found are masked
+    return (f"UPDATE t SET t.[{entry['column']}] = k.mask_value FROM {table} t WITH (ROWLOCK) "
+            f"JOIN #erasure_keys k ON {join} AND t.[{entry['column']}] = k.original_value")
+
+
+def mask_values(names: list, max_length: int) -> list:
+    """Deterministic tokens (same name, same mask), cut to the column length"""
+    tokens, _ = get_masking_engine().mask_names(names, deterministic=True)
+    return [token[:max_length] if max_length else token for token in tokens]
+
+
+def apply_chunk(cursor, conn, entry, action: str, statement: str, chunk: list, max_length: int) -> int:
+    key_count = len(entry["key"])
+    cursor.execute("TRUNCATE TABLE #erasure_keys")
+    if action == "delete":
+        params = [tuple(row[:key_count]) + (None, None) for row in chunk]
+    else:
+        names = [row[key_count] for row in chunk]
+        params = [tuple(row[:key_count]) + (name, masked)
+                  for row, name, masked in zip(chunk, names, mask_values(names, max_length))]
+    cursor.executemany(f"INSERT INTO #erasure_keys VALUES ({', '.join('?' * (key_count + 2))})", params)
+    cursor.execute(statement)
+    affected = cursor.rowcount
+    conn.commit()
+    return max(affected, 0)
+
+
+def read_signal(conn, entry):
+    try:
+        return fetch_target_signal(conn, entry)
+    except Exception as e:
+        print(f"⚠️ Could not read change signal of {target_id(entry)}: {e}")
+        return None
+
+
+def invalidate_searches(entry: dict, target: dict, erased: list, signal_before=None, signal_after=None):
+    """
+    Erased rows must not be served from the search cache or the name index,
+    in this process or any other: the cache generation file tells the other
+    processes to drop their cached searches, the tombstones in the shared
+    manifest hide the rows from every process's index searches.
+    """
+    key_count = len(entry["key"])
+    dropped = search_cache.invalidate_names({row[key_count] for row in erased if row[key_count]})
+    try:
+        search_cache.publish_invalidation()
+    except OSError as e:
+        print(f"⚠️ Could not signal the search cache invalidation to other processes: {e}")
+    index = get_name_index()
+    try:
+        action = record_erasure(entry, [format_row_key(row[:key_count]) for row in erased],
+                                signal_before, signal_after, directory=index.directory)
+        index.reload(force=True)
+    except Exception as e:
+        index.invalidate(entry)  # searched in SQL here; elsewhere once the segment is verified
+        action = f"not updated ({e})"
+    print(f"🧹 {target['source']}: dropped {dropped} cached search(es), name index segment {action}")
+
+
+def run_target(job: dict, target: dict):
+    entry = _targets_by_id[target["source"]]
+    statement = build_chunk_statement(entry, job["action"])
+    signal_before = signal_after = None
+    done_before = target["chunks_done"]
+
+    with database_slot(entry["database"]):
+        target["status"] = "running"
+        save_job(job)
+        with get_db_connection(entry["database"]) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SET LOCK_TIMEOUT {int(ERASURE_LOCK_TIMEOUT_MS)}")
+                max_length = column_max_length(cursor, entry)
+                cursor.execute("IF OBJECT_ID('tempdb..#erasure_keys') IS NOT NULL DROP TABLE #erasure_keys")
+                cursor.execute(build_keys_table(entry, column_collations(cursor, entry)))
+                conn.commit()
+                cursor.fast_executemany = True
+                signal_before = read_signal(conn, entry)
+
+                while target["chunks_done"] < target["chunks_total"]:
+                    start = target["chunks_done"] * job["chunk_size"]
+                    chunk = target["keys"][start:start + job["chunk_size"]]
+                    for attempt in range(ERASURE_LOCK_RETRIES + 1):
+                        try:
+                            affected = apply_chunk(cursor, conn, entry, job["action"], statement, chunk, max_length)
+                            break
+                        except Exception as e:
+                            conn.rollback()
+                            if LOCK_TIMEOUT_ERROR not in str(e) or attempt == ERASURE_LOCK_RETRIES:
+                                raise
+                            print(f"⏳ {target['source']}: chunk {target['chunks_done']} blocked, retrying")
+                            time.sleep(0.5 * 2 ** attempt)
+                    target["chunks_done"] += 1
+                    target["rows_affected"] += affected
+                    save_job(job)
+                target["status"] = "done"
+                signal_after = read_signal(conn, entry)
+            except Exception as e:
+                target["status"] = "failed"
+                target["error"] = str(e)
+                print(f"❌ Erasure of {target['source']} failed at chunk {target['chunks_done']}: {e}")
+            finally:
+                try:
+                    cursor.execute("IF OBJECT_ID('tempdb..#erasure_keys') IS NOT NULL DROP TABLE #erasure_keys")
+                    cursor.execute("SET LOCK_TIMEOUT -1")
+                    conn.commit()
+                except Exception:
+                    pass
+        save_job(job)
+    # Only the keys of committed chunks; the segment stays current only if this run did the whole target
+    erased = target["keys"][:target["chunks_done"] * job["chunk_size"]]
+    if target["rows_affected"]:
+        invalidate_searches(entry, target, erased, signal_before if done_before == 0 else None, signal_after)
+
+
+def run_job(job: dict) -> dict:
+    """Run (or resume) every unfinished target of a job; blocks until done"""
+    job["status"] = "running"
+    save_job(job)
+    pending = [target for target in job["targets"] if target["status"] != "done"]
+    for target in pending:
+        target["error"] = None
+    futures = [_job_executor.submit(run_target, job, target) for target in pending]
+    for future in futures:
+        future.result()
+    job["status"] = "done" if all(t["status"] == "done" for t in job["targets"]) else "failed"
+    save_job(job)
+    print(f"🧹 Erasure job {job['job_id']} {job['status']}: "
+          f"{sum(t['rows_affected'] for t in job['targets'])} row(s) affected")
+    return job
+
+
+def start_job(job: dict) -> dict:
+    """Run a job in a background thread; returns its status"""
+    job_id = job["job_id"]
+    with _running_lock:
+        if job_id in _running:
+            raise RuntimeError(f"Erasure job {job_id} is already running")
+
+        def worker():
+            try:
+                run_job(job)
+            finally:
+                with _running_lock:
+                    _running.pop(job_id, None)
+
+        thread = threading.Thread(target=worker, name=f"erasure-{job_id}", daemon=True)
+        _running[job_id] = thread
+        thread.start()
+    return job_status(job)
+
+
+def resume_job(job_id: str) -> dict:
+    job = load_job(job_id)
+    if job["status"] == "done":
+        return job_status(job)
+    return start_job(job)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="create and run a job from a JSON file")
+    run_parser.add_argument("spec", help='{"action": "mask"|"delete", "records": [{"source", "key", "name"}]}')
+    resume_parser = subparsers.add_parser("resume", help="continue an interrupted or failed job")
+    resume_parser.add_argument("job_id")
+    status_parser = subparsers.add_parser("status", help="show one job, or all jobs")
+    status_parser.add_argument("job_id", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        with open(args.spec, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        result = run_job(create_job(spec["action"], spec["records"]))
+        print(json.dumps(job_status(result), indent=2, default=str))
+    elif args.command == "resume":
+        result = run_job(load_job(args.job_id))
+        print(json.dumps(job_status(result), indent=2, default=str))
+    elif args.job_id:
+        print(json.dumps(get_job_status(args.job_id), indent=2, default=str))
+    else:
+        print(json.dumps(list_jobs(), indent=2, default=str))
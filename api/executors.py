@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+# === Request Executors ===
+# Async handlers must never call pyodbc, pandas or matplotlib directly: that
+# blocks the event loop for every other request. Blocking work goes to one of
+# two bounded pools instead - "io" for database round-trips (pyodbc releases
+# the GIL while waiting on the server) and "cpu" for pandas/rendering/crypto.
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "16"))
+IO_MAX_PENDING = int(os.getenv("IO_MAX_PENDING", "64"))        # running + queued before rejecting
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(max(2, os.cpu_count() or 2))))
+CPU_MAX_PENDING = int(os.getenv("CPU_MAX_PENDING", "16"))
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a cap on accepted work.
+
+    When `max_pending` tasks are already running or queued, new submissions
+    are rejected with 503 instead of growing an unbounded queue (backpressure).
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail=f"Server busy: {self.name} queue is full, retry later",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._pending += 1
+
+        # Carry request-scoped context (e.g. profiling) into the worker thread
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._done(None)
+            raise
+        # The slot is freed when the work finishes, even if the client went away
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, _future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": self.name,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+io_executor = BoundedExecutor("io", IO_POOL_SIZE, IO_MAX_PENDING)
+cpu_executor = BoundedExecutor("cpu", CPU_POOL_SIZE, CPU_MAX_PENDING)
+
+
+async def run_io(fn, *args, **kwargs):
+    return await io_executor.run(fn, *args, **kwargs)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    return await cpu_executor.run(fn, *args, **kwargs)
+
+
+def executor_stats() -> list:
+    return [io_executor.stats(), cpu_executor.stats()]
@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+# === Classification rules ===
+# Rules are applied in ascending priority; for every output field the matching
+# rule with the highest priority wins. A rule only sets the fields listed in
+# "set", so e.g. the timestamp rule overrides the recommendation but keeps the
+# risk level decided by the other rules.
+CLASSIFICATION_FIELDS = ['risk_level', 'gdpr_category', 'compliance_status', 'recommendation']
+
+DEFAULT_CLASSIFICATION = {
+    "risk_level": "Low",
+    "gdpr_category": "Non-Personal",
+    "compliance_status": "Compliant",
+    "recommendation": "No action required",
+}
+
+PERSONAL_KEYWORDS = ['name', 'email', 'birth', 'ssn', 'phone']
+SENSITIVE_KEYWORDS = ['medical', 'diagnosis', 'religion', 'ethnicity', 'sexual', 'biometric']
+TIMESTAMP_KEYWORDS = ['created', 'updated', 'deleted']
+
+DEFAULT_RULES = [
+    {
+        "name": "personal_data",
+        "priority": 10,
+        "keywords": PERSONAL_KEYWORDS,
+        "set": {
+            "risk_level": "Medium",
+            "gdpr_category": "Personal Data",
+            "compliance_status": "Partially Compliant",
+            "recommendation": "Consider data minimization and encryption",
+        },
+    },
+    {
+        "name": "special_category",
+        "priority": 20,
+        "keywords": SENSITIVE_KEYWORDS,
+        "set": {
+            "risk_level": "High",
+            "gdpr_category": "Special Category Data",
+            "compliance_status": "Non-Compliant",
+            "recommendation": "Requires explicit consent and enhanced protection",
+        },
+    },
+    {
+        "name": "personal_identifier",
+        "priority": 30,
+        "keywords": PERSONAL_KEYWORDS,
+        "primary_key_only": True,
+        "set": {
+            "risk_level": "Medium",
+            "gdpr_category": "Personal Identifier",
+            "compliance_status": "Partially Compliant",
+            "recommendation": "Primary key contains personal data - review necessity",
+        },
+    },
+    {
+        "name": "audit_timestamp",
+        "priority": 40,
+        "keywords": TIMESTAMP_KEYWORDS,
+        "set": {"recommendation": "Contains timestamp - good for audit trail"},
+    },
+]
+
+# Optional JSON file ({"defaults": {...}, "rules": [...]}) overriding the rules above
+RULES_PATH_ENV = "GDPR_RULES_PATH"
+
+
+def load_rules(path: str):
+    """Load (defaults, rules) from a JSON rule file"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    defaults = {**DEFAULT_CLASSIFICATION, **config.get("defaults", {})}
+    return defaults, config["rules"]
+
+
+class ColumnClassifier:
+    """
+    Vectorized keyword classifier for schema columns.
+
+    Each rule's keywords are compiled into one alternation pattern. Patterns are
+    matched once per *distinct* lower-cased column name (ERP catalogs repeat
+    names like MANDT or NAME1 across thousands of tables) and the results are
+    broadcast back to every row, so the cost grows with the number of distinct
+    names rather than the number of schema rows.
+    """
+
+    def __init__(self, rules=None, defaults=None):
+        self.defaults = {**DEFAULT_CLASSIFICATION, **(defaults or {})}
+        rules = DEFAULT_RULES if rules is None else rules
+        for rule in rules:
+            unknown = set(rule["set"]) - set(CLASSIFICATION_FIELDS)
+            if unknown:
+                raise ValueError(f"Rule '{rule.get('name')}' sets unknown fields: {sorted(unknown)}")
+        self.rules = sorted(rules, key=lambda rule: rule["priority"])
+        self._patterns = [
+            re.compile("|".join(re.escape(k.lower()) for k in rule["keywords"])) for rule in self.rules
+        ]
+
+    @classmethod
+    def from_env(cls):
+        path = os.getenv(RULES_PATH_ENV)
+        if path:
+            defaults, rules = load_rules(path)
+            return cls(rules, defaults)
+        return cls()
+
+    def classify(self, df_schema: pd.DataFrame, column_field: str = 'COLUMN_NAME',
+                 primary_key_field: str = 'IS_PRIMARY_KEY') -> pd.DataFrame:
+        """Return a frame with the classification fields, aligned with df_schema"""
+        names = df_schema[column_field].fillna("").astype(str).str.lower()
+        codes, uniques = pd.factorize(names, sort=False)
+        unique_names = pd.Series(uniques, dtype=object)
+        is_primary_key = (df_schema[primary_key_field] == 1).to_numpy()
+
+        n = len(df_schema)
+        result = {field: np.full(n, self.defaults[field], dtype=object) for field in CLASSIFICATION_FIELDS}
+
+        for rule, pattern in zip(self.rules, self._patterns):
+            if not rule["keywords"]:
+                continue
+            matched = unique_names.str.contains(pattern, regex=True).to_numpy(dtype=bool)[codes]
+            if rule.get("primary_key_only"):
+                matched &= is_primary_key
+            if not matched.any():
+                continue
+            for field, value in rule["set"].items():
+                result[field][matched] = value
+
+        return pd.DataFrame(result, index=df_schema.index, columns=CLASSIFICATION_FIELDS)
+
+
+_default_classifier = None
+
+
+def get_classifier() -> ColumnClassifier:
+    """Process-wide classifier built from GDPR_RULES_PATH or the default rules"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = ColumnClassifier.from_env()
+    return _default_classifier
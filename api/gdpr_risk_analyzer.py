@@ -1,199 +1,131 @@
 import pyodbc
 import pandas as pd
 import re
+from concurrent.futures import CancelledError
 import io
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
 import pyodbc
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import pandas as pd
 import io
-from utils import get_connection_string
-
-def extract_schema_metadata(database_name: str) -> pd.DataFrame:
+from utils import get_connection
+from metrics import stage
+from gdpr_classifier import get_classifier, CLASSIFICATION_FIELDS
+from schema_cache import schema_cache, fetch_schema_version
+from sample_extraction import sample_column_lists, format_sample_values, quote_identifier, SAMPLE_MAX_WORKERS
+from pii_detectors import get_detector, PII_SAMPLE_VALUES
+from pdf_report import stream_gdpr_pdf_report
+
+SCHEMA_METADATA_QUERY = """
+SELECT 
+    c.TABLE_SCHEMA,
+    c.TABLE_NAME,
+    c.COLUMN_NAME,
+    c.DATA_TYPE,
+    CASE WHEN k.COLUMN_NAME IS NOT NULL THEN 1 ELSE 0 END AS IS_PRIMARY_KEY
+FROM INFORMATION_SCHEMA.COLUMNS c
+LEFT JOIN (
+    SELECT DISTINCT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+) k
+ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
+ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION;
+"""
+# Bump when SCHEMA_METADATA_QUERY changes shape so cached frames are reloaded
+SCHEMA_METADATA_FORMAT = 2
+
+def extract_schema_metadata(database_name: str, use_cache: bool = True) -> pd.DataFrame:
     """
     Extract schema metadata from the specified database
+
+    Served from the schema cache while the database's schema version is
+    unchanged; pass use_cache=False to force a full catalog scan.
     """
+    def load():
+        with get_connection(database_name) as conn:
+            # Read the version first so a concurrent DDL change invalidates the entry next time
+            version = f"{SCHEMA_METADATA_FORMAT}|{fetch_schema_version(conn)}"
+            return version, pd.read_sql(SCHEMA_METADATA_QUERY, conn)
+
+    def current_version():
+        with get_connection(database_name) as conn:
+            return f"{SCHEMA_METADATA_FORMAT}|{fetch_schema_version(conn)}"
+
     try:
-        connection_string = get_connection_string(database_name)
-        conn = pyodbc.connect(connection_string)
-        
-        # Query to get metadata + primary keys
-        query = """
-        SELECT 
-            c.TABLE_NAME,
-            c.COLUMN_NAME,
-            c.DATA_TYPE,
-            CASE WHEN k.COLUMN_NAME IS NOT NULL THEN 1 ELSE 0 END AS IS_PRIMARY_KEY
-        FROM INFORMATION_SCHEMA.COLUMNS c
-        LEFT JOIN (
-            SELECT TABLE_NAME, COLUMN_NAME
-            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-        ) k
-        ON c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
-        ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION;
-        """
-        
-        df_schema = pd.read_sql(query, conn)
-        conn.close()
-        
-        return df_schema
+        if not use_cache:
+            schema_cache.invalidate(database_name)
+        df_schema = schema_cache.get(database_name, load, current_version)
+
+        # Callers add analysis columns in place, never hand out the cached frame
+        return df_schema.copy()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error extracting schema: {str(e)}")
 
-def perform_gdpr_analysis(df_schema: pd.DataFrame, database_name: str) -> pd.DataFrame:
+def perform_gdpr_analysis(df_schema: pd.DataFrame, database_name: str, progress=None,
+                          cancel_event=None, max_workers: int = SAMPLE_MAX_WORKERS,
+                          row_counts: dict = None) -> pd.DataFrame:
     """
     Perform GDPR analysis on the schema metadata
+
+    progress / cancel_event / max_workers / row_counts are passed to sampling
+    (see collect_samples).
     """
     try:
-        # Keywords for identifying risks
-        personal_keywords = ['name', 'email', 'birth', 'ssn', 'phone']
-        sensitive_keywords = ['medical', 'diagnosis', 'religion', 'ethnicity', 'sexual', 'biometric']
-        timestamp_keywords = ['created', 'updated', 'deleted']
-
-        # Risk assessment function
-        def assess_risk(row):
-            col = row['COLUMN_NAME'].lower()
-            risk_level = "Low"
-            gdpr_category = "Non-Personal"
-            compliance_status = "Compliant"
-            recommendation = "No action required"
-
-            if any(k in col for k in personal_keywords):
-                risk_level = "Medium"
-                gdpr_category = "Personal Data"
-                compliance_status = "Partially Compliant"
-                recommendation = "Consider data minimization and encryption"
-
-            if any(k in col for k in sensitive_keywords):
-                risk_level = "High"
-                gdpr_category = "Special Category Data"
-                compliance_status = "Non-Compliant"
-                recommendation = "Requires explicit consent and enhanced protection"
-
-            if row['IS_PRIMARY_KEY'] == 1 and any(k in col for k in personal_keywords):
-                risk_level = "Medium"
-                gdpr_category = "Personal Identifier"
-                compliance_status = "Partially Compliant"
-                recommendation = "Primary key contains personal data - review necessity"
-
-            if any(k in col for k in timestamp_keywords):
-                recommendation = "Contains timestamp - good for audit trail"
-
-            return pd.Series([risk_level, gdpr_category, compliance_status, recommendation])
-
-        df_schema[['risk_level', 'gdpr_category', 'compliance_status', 'recommendation']] = df_schema.apply(assess_risk, axis=1)
+        # Classify all columns at once using the keyword rule table
+        with stage("classification"):
+            classification = get_classifier().classify(df_schema)
+        df_schema[CLASSIFICATION_FIELDS] = classification
 
         # Rename columns to match frontend expectations
         df_schema = df_schema.rename(columns={
+            'TABLE_SCHEMA': 'table_schema',
             'TABLE_NAME': 'table_name',
             'COLUMN_NAME': 'column_name',
             'DATA_TYPE': 'data_type',
             'IS_PRIMARY_KEY': 'is_primary_key'
         })
 
-        # Extract sample values (your existing code)
-        connection_string = get_connection_string(database_name)
-        conn = pyodbc.connect(connection_string)
-        
-        sample_values = []
-        limited_df = df_schema.head(50)
-        
-        for _, row in limited_df.iterrows():
-            try:
-                table = row['table_name']
-                column = row['column_name']
-                query = f"SELECT TOP 3 [{column}] FROM [{table}] WHERE [{column}] IS NOT NULL"
-                cursor = conn.cursor()
-                cursor.execute(query)
-                values = [str(r[0]) for r in cursor.fetchall()]
-                sample_values.append(", ".join(values))
-            except:
-                sample_values.append("N/A")
-        
-        while len(sample_values) < len(df_schema):
-            sample_values.append("N/A")
-            
-        conn.close()
-        df_schema['sample_values'] = sample_values
+        # Sample values: one query per table, tables sampled in parallel
+        sample_lists = sample_column_lists(df_schema, database_name, per_column=PII_SAMPLE_VALUES,
+                                           progress=progress, cancel_event=cancel_event, max_workers=max_workers,
+                                           row_counts=row_counts)
+        df_schema['sample_values'] = format_sample_values(sample_lists)
+
+        # Value-based PII detection on the samples; detections can only raise the risk
+        detector = get_detector()
+        with stage("pii_detection"):
+            detections = detector.detect(sample_lists, df_schema['column_name'])
+        detections.index = df_schema.index
+        df_schema['pii_detected'] = detections['pii_detected']
+        df_schema['pii_confidence'] = detections['pii_confidence']
+        detector.apply_to_risk(df_schema)
 
         return df_schema
         
+    except CancelledError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error performing GDPR analysis: {str(e)}")
 
 def generate_gdpr_pdf_report(df_analysis: pd.DataFrame, database_name: str) -> bytes:
     """
-    Generate PDF report from GDPR analysis results
+    Generate PDF report from GDPR analysis results (whole document in memory;
+    prefer stream_gdpr_pdf_report for large schemas)
     """
     try:
-        # Select useful columns
-        columns_to_include = ['TABLE_NAME', 'COLUMN_NAME', 'DATA_TYPE', 'IS_PRIMARY_KEY', 'RISK_LEVEL']
-        df = df_analysis[columns_to_include].copy()
-        df = df.fillna("")  # Avoid issues with NaN
-
-        # Convert everything to strings
-        data = [list(df.columns)] + df.astype(str).values.tolist()
-
-        # Create PDF in memory
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        
-        elements = [
-            Paragraph(f"GDPR Risk Report – Database Schema", styles["Heading1"]),
-            Paragraph(f"Database: {database_name}", styles["Heading2"])
-        ]
-
-        # Create table
-        table = Table(data, repeatRows=1)
-
-        # Base style
-        style = TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ])
-
-        # Apply colors for risk levels (row by row)
-        for i, row in enumerate(df.itertuples(), start=1):  # +1 to skip header
-            risk = row.RISK_LEVEL.strip()
-            if "Critico" in risk:
-                bg_color = colors.HexColor("#ffcccc")  # light red
-            elif "Medio" in risk:
-                bg_color = colors.HexColor("#fff2cc")  # light yellow
-            elif "Basso" in risk:
-                bg_color = colors.HexColor("#ccffcc")  # light green
-            else:
-                bg_color = colors.white
-
-            style.add('BACKGROUND', (0, i), (-1, i), bg_color)
-
-        table.setStyle(style)
-        elements.append(table)
-
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-        
-        return buffer.getvalue()
-        
+        return b"".join(stream_gdpr_pdf_report(df_analysis, database_name))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating PDF report: {str(e)}")
 
 # FastAPI endpoint function that combines all three steps
 def create_gdpr_report(database_name: str = "AdventureWorks2019") -> StreamingResponse:
     """
-    Complete GDPR analysis pipeline that returns a PDF report
+    Complete GDPR analysis pipeline that returns a PDF report, streamed page by page
     """
     try:
         # Step 1: Extract schema metadata
@@ -202,78 +134,107 @@ def create_gdpr_report(database_name: str = "AdventureWorks2019") -> StreamingRe
         # Step 2: Perform GDPR analysis
         analysis_df = perform_gdpr_analysis(schema_df, database_name)
         
-        # Step 3: Generate PDF report
-        pdf_bytes = generate_gdpr_pdf_report(analysis_df, database_name)
-        
-        # Return PDF as streaming response
-        pdf_buffer = io.BytesIO(pdf_bytes)
-        
+        # Step 3: Stream the PDF report as pages are laid out
         return StreamingResponse(
-            io.BytesIO(pdf_bytes),
+            stream_gdpr_pdf_report(analysis_df, database_name),
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename=gdpr_report_{database_name}.pdf"}
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating GDPR report: {str(e)}")
     
 
-def generate_chart(database_name: str) -> io.BytesIO:
+# === Record Aging ===
+AGING_TABLE = "Person.Person"
+AGING_DATE_COLUMN = "ModifiedDate"
+AGING_START = "2021-01-01"
+AGING_END = "2023-12-01"
+AGING_THRESHOLD_YEARS = 10
 
-    connection_string = get_connection_string(database_name)
-    conn = pyodbc.connect(connection_string)
-    cursor = conn.cursor()
-
-    # Generate months from 2021-01-01 to 2023-12-01
-    query = """
-    WITH Months AS (
-        SELECT CAST('2021-01-01' AS DATE) AS MonthStart
-        UNION ALL
-        SELECT DATEADD(MONTH, 1, MonthStart)
-        FROM Months
-        WHERE MonthStart < '2023-12-01'
-    )
-    SELECT
-        MonthStart,
-        (SELECT COUNT(*) FROM Person.Person) AS TotalRows,
-        (SELECT COUNT(*) FROM Person.Person WHERE ModifiedDate < DATEADD(YEAR, -10, MonthStart)) AS OlderThan10Years
-    FROM Months
-    ORDER BY MonthStart
-    OPTION (MAXRECURSION 1000);
+def fetch_record_aging(database_name: str, table: str = AGING_TABLE, date_column: str = AGING_DATE_COLUMN,
+                       start: str = AGING_START, end: str = AGING_END,
+                       age_years: int = AGING_THRESHOLD_YEARS) -> pd.DataFrame:
     """
+    Share of rows older than `age_years` at the start of each month in [start, end].
 
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    conn.close()
+    One grouped pass over the date column builds a monthly histogram of rows
+    old enough to matter for the last month; the per-month counts are then
+    cumulative sums over that histogram, so the table is scanned once no
+    matter how many months are charted.
+    """
+    months = pd.date_range(pd.Timestamp(start).to_period("M").to_timestamp(),
+                           pd.Timestamp(end).to_period("M").to_timestamp(), freq="MS")
+    if months.empty:
+        raise ValueError("Chart range is empty: start must not be after end")
+    thresholds = months - pd.DateOffset(years=age_years)
+    cutoff = thresholds[-1].to_pydatetime()
+
+    source = ".".join(quote_identifier(part) for part in table.split("."))
+    column = quote_identifier(date_column)
+    # Rows newer than the last threshold (or NULL) all fall into the NULL bucket
+    query = f"""
+    SELECT MonthBucket, COUNT_BIG(*) AS BucketRows
+    FROM (
+        SELECT CASE WHEN {column} < ? THEN DATEFROMPARTS(YEAR({column}), MONTH({column}), 1) END AS MonthBucket
+        FROM {source}
+    ) AS buckets
+    GROUP BY MonthBucket;
+    """
 
-    # Process data
-    data = []
-    for row in rows:
-        month = row.MonthStart
-        total = row.TotalRows
-        older = row.OlderThan10Years
-        pct = (older / total * 100) if total > 0 else 0
-        data.append({'Month': month, 'PercentageOlderThan10Years': pct})
+    with get_connection(database_name) as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, (cutoff,))
+        rows = cursor.fetchall()
+
+    total = sum(int(row_count) for _, row_count in rows)
+    histogram = pd.Series(
+        {pd.Timestamp(bucket): int(row_count) for bucket, row_count in rows if bucket is not None},
+        dtype="int64",
+    ).sort_index()
+    cumulative = histogram.cumsum().to_numpy()
+    # Buckets strictly before each month's threshold are older than age_years
+    position = histogram.index.searchsorted(thresholds, side="left")
+    older = [int(cumulative[p - 1]) if p > 0 else 0 for p in position]
+
+    df = pd.DataFrame({'Month': months, 'TotalRows': total, 'OlderRows': older})
+    df['PercentageOlder'] = (df['OlderRows'] / total * 100) if total > 0 else 0.0
+    return df
+
+def render_aging_chart(df: pd.DataFrame, age_years: int = AGING_THRESHOLD_YEARS,
+                       image_format: str = 'png', dpi: int = 300) -> bytes:
+    """
+    Render the aging bar chart with the object-oriented Agg API.
 
-    df = pd.DataFrame(data)
+    Every call owns its Figure, so concurrent renders do not share pyplot's
+    global state.
+    """
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
-    # Create the bar chart
-    plt.figure(figsize=(12, 8))
     months_short = [m.strftime('%Y-%m') for m in df['Month']]
-    bars = plt.bar(range(len(df)), df['PercentageOlderThan10Years'], 
-                    color='skyblue', edgecolor='navy', alpha=0.8, linewidth=1)
-    plt.title('Monthly Growth of Records Passing the 10-Year Age Threshold', fontsize=14, fontweight='bold')
-    plt.xlabel('Month', fontsize=12)
-    plt.ylabel('Percentage (%)', fontsize=12)
-    plt.xticks(range(0, len(df), 3), [months_short[i] for i in range(0, len(df), 3)], rotation=45)
+    ax.bar(range(len(df)), df['PercentageOlder'],
+           color='skyblue', edgecolor='navy', alpha=0.8, linewidth=1)
+    ax.set_title(f'Monthly Growth of Records Passing the {age_years}-Year Age Threshold', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Percentage (%)', fontsize=12)
+    ax.set_xticks(range(0, len(df), 3))
+    ax.set_xticklabels([months_short[i] for i in range(0, len(df), 3)], rotation=45)
 
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
 
     # Save to memory instead of file
     img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-    img_buffer.seek(0)
-    plt.close()  # Free memory
+    fig.savefig(img_buffer, format=image_format, dpi=dpi, bbox_inches='tight')
+    return img_buffer.getvalue()
+
+def generate_chart(database_name: str, table: str = AGING_TABLE, date_column: str = AGING_DATE_COLUMN,
+                   start: str = AGING_START, end: str = AGING_END,
+                   age_years: int = AGING_THRESHOLD_YEARS) -> io.BytesIO:
 
-    return img_buffer
\ No newline at end of file
+    df = fetch_record_aging(database_name, table, date_column, start, end, age_years)
+    return io.BytesIO(render_aging_chart(df, age_years))
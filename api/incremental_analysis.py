@@ -0,0 +1,256 @@
+"""
+Incremental GDPR analysis: only re-classify and re-sample changed tables.
+
+Analysis results are persisted per database together with a fingerprint per
+table (column names and types, row count and modify_date). A rerun compares
+fingerprints, runs perform_gdpr_analysis for new or changed tables only,
+reuses the stored rows for everything else and reports what changed.
+Changing the classification rules or the PII detectors forces a full run.
+Views have no row count or modify_date, so they are re-analysed once their
+stored result is older than ANALYSIS_VIEW_TTL.
+
+    python incremental_analysis.py ECC60jkl_HACK ORACLE_EBS_HACK [--full]
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+from gdpr_risk_analyzer import extract_schema_metadata, perform_gdpr_analysis
+from gdpr_classifier import get_classifier
+from pii_detectors import get_detector
+from utils import get_connection
+
+# === Incremental Analysis ===
+ANALYSIS_STATE_DIR = os.getenv(
+    "ANALYSIS_STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".analysis_state")
+)
+ANALYSIS_STATE_FORMAT = 2      # bump when the stored analysis frame changes shape
+TABLE_KEY = ['table_schema', 'table_name']
+COLUMN_KEY = ['table_schema', 'table_name', 'column_name']
+DIFF_FIELDS = ['risk_level', 'gdpr_category', 'data_type']
+ANALYSIS_VIEW_TTL = float(os.getenv("ANALYSIS_VIEW_TTL", str(24 * 3600)))  # seconds a view's result is reused
+
+# Row count covers DML between runs, modify_date covers ALTER TABLE
+TABLE_STATS_QUERY = """
+SELECT s.name, t.name, CONVERT(varchar(33), t.modify_date, 126), SUM(p.rows)
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+LEFT JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+GROUP BY s.name, t.name, t.modify_date;
+"""
+
+_database_locks = {}
+_database_locks_lock = threading.Lock()
+
+
+def _database_lock(database_name: str) -> threading.Lock:
+    with _database_locks_lock:
+        return _database_locks.setdefault(database_name, threading.Lock())
+
+
+def fetch_table_stats(database_name: str) -> dict:
+    """(schema, table) -> "modify_date|row_count" for every user table"""
+    with get_connection(database_name) as conn:
+        cursor = conn.cursor()
+        cursor.execute(TABLE_STATS_QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+    return {(schema, table): f"{modified}|{row_count}" for schema, table, modified, row_count in rows}
+
+
+def table_fingerprints(df_schema: pd.DataFrame, table_stats: dict) -> dict:
+    """(schema, table) -> hash of its column list, types and table stats (views have no stats)"""
+    fingerprints = {}
+    for (schema, table), group in df_schema.groupby(['TABLE_SCHEMA', 'TABLE_NAME'], sort=False):
+        digest = hashlib.sha1()
+        for column, data_type, is_pk in zip(group['COLUMN_NAME'], group['DATA_TYPE'], group['IS_PRIMARY_KEY']):
+            digest.update(f"{column}\x1f{data_type}\x1f{is_pk}\x1e".encode("utf-8"))
+        digest.update(str(table_stats.get((schema, table))).encode("utf-8"))
+        fingerprints[(schema, table)] = digest.hexdigest()
+    return fingerprints
+
+
+def rules_fingerprint() -> str:
+    """Classifier rules + PII detectors: results from other rules are not reused"""
+    rules = json.dumps(get_classifier().rules, sort_keys=True, default=str)
+    detectors = get_detector().fingerprint()
+    return hashlib.sha1(f"{ANALYSIS_STATE_FORMAT}|{rules}|{detectors}".encode("utf-8")).hexdigest()
+
+
+# ----- Persisted state -----
+def state_path(database_name: str) -> str:
+    return os.path.join(ANALYSIS_STATE_DIR, hashlib.sha1(database_name.encode("utf-8")).hexdigest() + ".pkl")
+
+
+def load_state(database_name: str):
+    path = state_path(database_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable analysis state for {database_name}: {e}")
+        return None
+    return state if state.get("rules") == rules_fingerprint() else None
+
+
+def save_state(database_name: str, state: dict):
+    os.makedirs(ANALYSIS_STATE_DIR, exist_ok=True)
+    tmp_path = state_path(database_name) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, state_path(database_name))
+
+
+# ----- Diff -----
+def empty_analysis(like: pd.DataFrame = None) -> pd.DataFrame:
+    """Analysis frame without rows, still carrying the key and diff columns"""
+    if like is not None and set(COLUMN_KEY + DIFF_FIELDS) <= set(like.columns):
+        return like.iloc[0:0]
+    return pd.DataFrame(columns=COLUMN_KEY + DIFF_FIELDS)
+
+
+def diff_analysis(previous: pd.DataFrame, current: pd.DataFrame) -> dict:
+    """Columns added, removed, or whose risk level / category / type changed"""
+    merged = previous[COLUMN_KEY + DIFF_FIELDS].merge(
+        current[COLUMN_KEY + DIFF_FIELDS], on=COLUMN_KEY, how='outer',
+        suffixes=('_previous', ''), indicator=True
+    )
+    added = merged[merged['_merge'] == 'right_only']
+    removed = merged[merged['_merge'] == 'left_only']
+    both = merged[merged['_merge'] == 'both']
+    changed_mask = pd.Series(False, index=both.index)
+    for field in DIFF_FIELDS:
+        changed_mask |= both[field].astype(str) != both[f"{field}_previous"].astype(str)
+    changed = both[changed_mask]
+
+    def records(frame, fields):
+        return frame[COLUMN_KEY + fields].astype(object).where(frame[COLUMN_KEY + fields].notna(), None) \
+            .to_dict(orient="records")
+
+    return {
+        "added": records(added, DIFF_FIELDS),
+        "changed": records(changed, DIFF_FIELDS + [f"{field}_previous" for field in DIFF_FIELDS]),
+        "removed": records(removed, [f"{field}_previous" for field in DIFF_FIELDS]),
+    }
+
+
+def incremental_gdpr_analysis(database_name: str, refresh: bool = False, full: bool = False,
+                              **analysis_options) -> tuple:
+    """
+    Analyse a database, reusing stored results for unchanged tables.
+
+    analysis_options are passed on to perform_gdpr_analysis.
+
+    Returns (analysis_df, report); report has table counts, timing and the
+    diff against the previous run.
+    """
+    with _database_lock(database_name):
+        start = time.time()
+        schema_df = extract_schema_metadata(database_name, use_cache=not refresh)
+        try:
+            table_stats = fetch_table_stats(database_name)
+        except Exception as e:
+            print(f"⚠️ Could not read table stats for {database_name}, using column lists only: {e}")
+            table_stats = {}
+        fingerprints = table_fingerprints(schema_df, table_stats)
+
+        state = None if full else load_state(database_name)
+        previous_fingerprints = state["fingerprints"] if state else {}
+        # States saved before per-table times only have the run's time
+        previous_times = state.get("table_analysed_at", {}) if state else {}
+        default_time = state.get("analysed_at", 0) if state else 0
+        changed = {table for table, fp in fingerprints.items() if previous_fingerprints.get(table) != fp}
+        # No stats (views, or stats unreadable): nothing tells us the rows changed, so results expire
+        expired = {
+            table for table in fingerprints
+            if table_stats.get(table) is None and start - previous_times.get(table, default_time) > ANALYSIS_VIEW_TTL
+        }
+        changed |= expired & set(previous_fingerprints)
+        removed = set(previous_fingerprints) - set(fingerprints)
+
+        table_index = pd.MultiIndex.from_arrays([schema_df['TABLE_SCHEMA'], schema_df['TABLE_NAME']])
+        to_analyse = schema_df[table_index.isin(list(changed))].copy()
+        if len(to_analyse):
+            fresh = perform_gdpr_analysis(to_analyse, database_name, **analysis_options)
+        else:
+            fresh = None
+
+        if state is not None:
+            # Older states of an empty database were saved without columns
+            previous_df = state["df"] if set(COLUMN_KEY) <= set(state["df"].columns) else empty_analysis()
+            previous_index = pd.MultiIndex.from_arrays([previous_df['table_schema'], previous_df['table_name']])
+            reused = previous_df[~previous_index.isin(list(changed | removed))]
+            affected_previous = previous_df[previous_index.isin(list(changed | removed))]
+        else:
+            previous_df = None
+            reused = None
+            affected_previous = None
+
+        parts = [part for part in (reused, fresh) if part is not None and len(part)]
+        if parts:
+            analysis_df = pd.concat(parts, ignore_index=True)
+            # Keep catalog order (schema, table, ordinal position) like a full run
+            order = schema_df[['TABLE_SCHEMA', 'TABLE_NAME', 'COLUMN_NAME']].reset_index(drop=True)
+            order.columns = COLUMN_KEY
+            order['_position'] = range(len(order))
+            analysis_df = analysis_df.merge(order, on=COLUMN_KEY, how='left') \
+                .sort_values('_position', kind='stable').drop(columns='_position').reset_index(drop=True)
+        else:
+            # e.g. every table was dropped: report the removals instead of failing on a column-less frame
+            analysis_df = fresh if fresh is not None else empty_analysis(previous_df)
+
+        if previous_df is not None:
+            diff = diff_analysis(affected_previous, fresh if fresh is not None else empty_analysis(analysis_df))
+        else:
+            diff = {"added": [], "changed": [], "removed": []}
+
+        save_state(database_name, {
+            "rules": rules_fingerprint(),
+            "fingerprints": fingerprints,
+            "df": analysis_df,
+            "analysed_at": time.time(),
+            "table_analysed_at": {
+                table: start if table in changed else previous_times.get(table, default_time)
+                for table in fingerprints
+            },
+        })
+
+        report = {
+            "database": database_name,
+            "full_run": state is None,
+            "tables_total": len(fingerprints),
+            "tables_reanalysed": len(changed),
+            "tables_unchanged": len(fingerprints) - len(changed),
+            "tables_removed": len(removed),
+            "columns_reanalysed": len(to_analyse),
+            "elapsed_seconds": round(time.time() - start, 2),
+            "diff": diff,
+        }
+        print(f"✔ Incremental analysis of {database_name}: {len(changed)}/{len(fingerprints)} tables re-analysed "
+              f"[{report['elapsed_seconds']:.2f}s]")
+        return analysis_df, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("databases", nargs="+")
+    parser.add_argument("--full", action="store_true", help="ignore stored results and analyse every table")
+    parser.add_argument("--refresh", action="store_true", help="bypass the schema metadata cache")
+    args = parser.parse_args()
+
+    for database in args.databases:
+        _, result = incremental_gdpr_analysis(database, refresh=args.refresh, full=args.full)
+        diff = result.pop("diff")
+        print(json.dumps(result, indent=2))
+        print(f"  added: {len(diff['added'])}, changed: {len(diff['changed'])}, removed: {len(diff['removed'])}")
+        for entry in diff["changed"]:
+            print(f"  ~ {entry['table_schema']}.{entry['table_name']}.{entry['column_name']}: "
+                  f"{entry['risk_level_previous']} -> {entry['risk_level']}")
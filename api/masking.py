@@ -0,0 +1,401 @@
+import base64
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: key store changes are only serialized within the process
+    fcntl = None
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# === Masking Engine (envelope encryption) ===
+# Names are encrypted with AES-256-GCM under a data key; data keys are stored
+# wrapped (encrypted) by a master key in a local key store, so the results
+# table only carries a short key reference ("dk:<id>") instead of one key per
+# name. Rotating the master key re-wraps the data keys without touching any
+# ciphertext. Deterministic tokenization (HMAC-SHA256 under a dedicated data
+# key) masks the same name to the same token, so masked tables can be joined.
+MASKING_KEY_DIR = os.getenv("MASKING_KEY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".keys"))
+MASKING_MASTER_KEY = os.getenv("MASKING_MASTER_KEY")             # base64; overrides the master key file
+MASKING_KEY_ROTATE_AFTER = 24 * 3600                              # seconds the active data key stays active
+MASKING_KEY_MAX_USES = 2 ** 30                                    # names encrypted under one data key (random
+                                                                  # GCM nonces: stay well below 2**32)
+MASKING_PARALLEL_THRESHOLD = int(os.getenv("MASKING_PARALLEL_THRESHOLD", "50000"))
+MASKING_PROCESSES = int(os.getenv("MASKING_PROCESSES", str(os.cpu_count() or 1)))
+MASKING_CHUNK_SIZE = 25000                                        # names per process-pool task
+
+MASTER_KEY_FILE = "master.key"
+DATA_KEYS_FILE = "data_keys.json"
+LOCK_FILE = ".lock"
+ENCRYPTED_PREFIX = "dk:"
+TOKEN_PREFIX = "tok:"
+TOKEN_KEY_ID = "tokenization"
+NONCE_SIZE = 12
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text.encode("ascii"))
+
+
+def normalize_for_token(name: str) -> str:
+    """Case and whitespace variants of a name must produce the same token"""
+    return " ".join(name.split()).casefold()
+
+
+class KeyStore:
+    """
+    Local key store: one master key file and a JSON file of wrapped data keys.
+
+    Unwrapped data keys are cached in memory; the master key never leaves
+    this object. Every read-modify-write of the key files holds an exclusive
+    lock on the key directory, so worker processes sharing it cannot
+    overwrite each other's keys.
+    """
+
+    def __init__(self, directory: str = MASKING_KEY_DIR, master_key: str = MASKING_MASTER_KEY):
+        self.directory = directory
+        self._master_override = _b64decode(master_key) if master_key else None
+        self._lock = threading.Lock()
+        self._master = None
+        self._wrapped = None      # key_id -> {"wrapped", "created"}
+        self._keys = {}           # key_id -> raw data key
+        self._active = None       # [key_id, created, names encrypted] of the active data key
+        self._active_lock = threading.Lock()
+        self._file_lock = threading.RLock()
+        self._file_lock_depth = 0
+        self._file_lock_fd = None
+
+    # ----- Storage -----
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def _write_private(self, filename: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(filename + ".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(filename))
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock on the key directory across processes (re-entrant within a thread)"""
+        with self._file_lock:
+            if self._file_lock_depth == 0 and fcntl is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                fd = os.open(self._path(LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._file_lock_fd = fd
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+                if self._file_lock_depth == 0 and self._file_lock_fd is not None:
+                    fd, self._file_lock_fd = self._file_lock_fd, None
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+
+    def _master_key(self, reload: bool = False) -> bytes:
+        """reload: re-read master.key, another process may have rotated it"""
+        if self._master_override is not None:
+            return self._master_override
+        if self._master is None or reload:
+            with self._locked():
+                if os.path.exists(self._path(MASTER_KEY_FILE)):
+                    with open(self._path(MASTER_KEY_FILE), "rb") as f:
+                        self._master = _b64decode(f.read().decode("ascii").strip())
+                else:
+                    self._master = AESGCM.generate_key(bit_length=256)
+                    self._write_private(MASTER_KEY_FILE, _b64encode(self._master).encode("ascii"))
+                    print(f"🔑 Created master key in {self.directory}")
+        return self._master
+
+    def _load(self) -> dict:
+        if self._wrapped is None:
+            path = self._path(DATA_KEYS_FILE)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self._wrapped = json.load(f)
+            else:
+                self._wrapped = {}
+        return self._wrapped
+
+    def _save(self):
+        self._write_private(DATA_KEYS_FILE, json.dumps(self._wrapped, indent=2).encode("utf-8"))
+
+    def _wrap(self, key_id: str, data_key: bytes, master: bytes) -> str:
+        nonce = os.urandom(NONCE_SIZE)
+        return _b64encode(nonce + AESGCM(master).encrypt(nonce, data_key, key_id.encode("utf-8")))
+
+    def _unwrap(self, key_id: str, wrapped: str) -> bytes:
+        raw = _b64decode(wrapped)
+        masters = [self._master_key()]
+        if self._master_override is None:
+            # Rotated by another process since we read master.key
+            masters.append(lambda: self._master_key(reload=True))
+            pending = self._path(MASTER_KEY_FILE + ".new")
+            if os.path.exists(pending):
+                # An interrupted rotation may already have re-wrapped this key
+                with open(pending, "rb") as f:
+                    masters.append(_b64decode(f.read().decode("ascii").strip()))
+        for master in masters:
+            try:
+                master = master() if callable(master) else master
+                return AESGCM(master).decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], key_id.encode("utf-8"))
+            except InvalidTag:
+                continue
+        raise InvalidTag(f"Data key {key_id} cannot be unwrapped with the master key")
+
+    def _store(self, key_id: str, data_key: bytes):
+        with self._locked():
+            # Re-read both files so keys added (or a master rotated) by other worker processes are kept
+            self._wrapped = None
+            self._load()[key_id] = {
+                "wrapped": self._wrap(key_id, data_key, self._master_key(reload=True)),
+                "created": time.time(),
+            }
+            self._save()
+        self._keys[key_id] = data_key
+
+    # ----- Data keys -----
+    def new_data_key(self) -> tuple:
+        """Create, wrap and persist a fresh data key; returns (key_id, key)"""
+        with self._lock:
+            key_id = secrets.token_hex(8)
+            data_key = AESGCM.generate_key(bit_length=256)
+            self._store(key_id, data_key)
+            return key_id, data_key
+
+    def active_data_key(self, uses: int = 1) -> tuple:
+        """
+        Data key shared by all batches; a new one is created after
+        MASKING_KEY_ROTATE_AFTER seconds or MASKING_KEY_MAX_USES names, so the
+        key store grows with time, not with the number of requests
+        """
+        with self._active_lock:
+            active = self._active
+            if (active is None or time.time() - active[1] > MASKING_KEY_ROTATE_AFTER
+                    or active[2] + uses > MASKING_KEY_MAX_USES):
+                key_id, _ = self.new_data_key()
+                self._active = active = [key_id, time.time(), 0]
+            active[2] += uses
+            key_id = active[0]
+        return key_id, self.data_key(key_id)
+
+    def data_key(self, key_id: str) -> bytes:
+        data_key = self._keys.get(key_id)
+        if data_key is not None:
+            return data_key
+        with self._lock:
+            entry = self._load().get(key_id)
+            if entry is None:
+                self._wrapped = None  # may have been created by another worker process
+                entry = self._load().get(key_id)
+            if entry is None:
+                raise KeyError(f"Unknown data key: {key_id}")
+            data_key = self._unwrap(key_id, entry["wrapped"])
+            self._keys[key_id] = data_key
+            return data_key
+
+    def token_key(self) -> bytes:
+        """HMAC key for deterministic tokens; created once and never rotated automatically"""
+        try:
+            return self.data_key(TOKEN_KEY_ID)
+        except KeyError:
+            with self._lock, self._locked():
+                self._wrapped = None
+                if TOKEN_KEY_ID not in self._load():
+                    self._store(TOKEN_KEY_ID, secrets.token_bytes(32))
+            return self.data_key(TOKEN_KEY_ID)
+
+    def rotate_master_key(self) -> int:
+        """Re-wrap every data key under a new master key; returns the number re-wrapped"""
+        if self._master_override is not None:
+            raise RuntimeError("Master key comes from MASKING_MASTER_KEY; rotate it there")
+        with self._lock, self._locked():
+            self._wrapped = None
+            wrapped = self._load()
+            data_keys = {key_id: self._unwrap(key_id, entry["wrapped"]) for key_id, entry in wrapped.items()}
+            new_master = AESGCM.generate_key(bit_length=256)
+            # The new master is written aside first; until it replaces master.key,
+            # _unwrap accepts either, so a crash at any step loses nothing
+            self._write_private(MASTER_KEY_FILE + ".new", _b64encode(new_master).encode("ascii"))
+            for key_id, data_key in data_keys.items():
+                wrapped[key_id]["wrapped"] = self._wrap(key_id, data_key, new_master)
+            self._save()
+            os.replace(self._path(MASTER_KEY_FILE + ".new"), self._path(MASTER_KEY_FILE))
+            self._master = new_master
+            return len(wrapped)
+
+    def stats(self) -> dict:
+        with self._lock:
+            wrapped = self._load()
+        return {
+            "directory": self.directory,
+            "data_keys": len(wrapped),
+            "unwrapped_in_memory": len(self._keys),
+            "active_key": self._active[0] if self._active else None,
+        }
+
+
+# ----- Batch workers (top-level so the process pool can pickle them) -----
+def encrypt_chunk(data_key: bytes, names: list) -> list:
+    cipher = AESGCM(data_key)
+    nonces = os.urandom(NONCE_SIZE * len(names))
+    encode = base64.urlsafe_b64encode
+    out = []
+    for i, name in enumerate(names):
+        nonce = nonces[i * NONCE_SIZE:(i + 1) * NONCE_SIZE]
+        out.append(encode(nonce + cipher.encrypt(nonce, name.encode("utf-8"), None)).decode("ascii"))
+    return out
+
+
+def decrypt_chunk(data_key: bytes, masked: list) -> list:
+    cipher = AESGCM(data_key)
+    out = []
+    for value in masked:
+        raw = base64.urlsafe_b64decode(value)
+        out.append(cipher.decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], None).decode("utf-8"))
+    return out
+
+
+def tokenize_chunk(token_key: bytes, names: list) -> list:
+    base = hmac.new(token_key, digestmod=hashlib.sha256)
+    encode = base64.urlsafe_b64encode
+    out = []
+    for name in names:
+        mac = base.copy()
+        mac.update(normalize_for_token(name).encode("utf-8"))
+        out.append(encode(mac.digest()[:24]).decode("ascii"))
+    return out
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Worker processes for large batches. They are spawned, never forked: the
+    API process runs many threads (executors, pools) and forking it can
+    copy locks held by other threads. Workers start lazily on the first
+    tasks; see warm_process_pool.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=MASKING_PROCESSES,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def warm_process_pool(block: bool = False) -> int:
+    """
+    Start every worker now (one no-op task each) instead of on the first
+    large batch; returns the number of workers. block waits until they run.
+    """
+    if MASKING_PROCESSES <= 1:
+        return 0
+    pool = get_process_pool()
+    futures = [pool.submit(int) for _ in range(MASKING_PROCESSES)]
+    if block:
+        wait(futures)
+    return MASKING_PROCESSES
+
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def _run_chunked(worker, key: bytes, values: list, parallel: bool = None) -> list:
+    """Run a batch worker inline, or split across the process pool for large batches"""
+    if parallel is None:
+        parallel = len(values) >= MASKING_PARALLEL_THRESHOLD and MASKING_PROCESSES > 1
+    if not parallel:
+        return worker(key, values)
+    chunks = [values[i:i + MASKING_CHUNK_SIZE] for i in range(0, len(values), MASKING_CHUNK_SIZE)]
+    pool = get_process_pool()
+    out = []
+    for part in pool.map(worker, [key] * len(chunks), chunks):
+        out.extend(part)
+    return out
+
+
+class MaskingEngine:
+    def __init__(self, key_store: KeyStore = None):
+        self.key_store = key_store or KeyStore()
+
+    def mask_names(self, names: list, deterministic: bool = False, key_id: str = None,
+                   parallel: bool = None) -> tuple:
+        """
+        Mask a batch of names; returns (masked_values, key_reference).
+
+        Encrypted batches use the active data key (see
+        KeyStore.active_data_key). With deterministic=True names become HMAC
+        tokens instead (not reversible).
+        """
+        names = list(names)
+        if deterministic:
+            return _run_chunked(tokenize_chunk, self.key_store.token_key(), names, parallel), \
+                TOKEN_PREFIX + TOKEN_KEY_ID
+
+        if key_id is not None:
+            data_key = self.key_store.data_key(key_id)
+        else:
+            key_id, data_key = self.key_store.active_data_key(len(names))
+        return _run_chunked(encrypt_chunk, data_key, names, parallel), ENCRYPTED_PREFIX + key_id
+
+    def unmask_names(self, masked: list, key_reference: str, parallel: bool = None) -> list:
+        if not key_reference.startswith(ENCRYPTED_PREFIX):
+            raise ValueError(f"Not a reversible key reference: {key_reference}")
+        data_key = self.key_store.data_key(key_reference[len(ENCRYPTED_PREFIX):])
+        return _run_chunked(decrypt_chunk, data_key, list(masked), parallel)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_masking_engine() -> MaskingEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = MaskingEngine()
+        return _engine
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Masking key store maintenance")
+    parser.add_argument("command", choices=["stats", "rotate-master"])
+    args = parser.parse_args()
+
+    store = get_masking_engine().key_store
+    if args.command == "rotate-master":
+        print(f"🔑 Re-wrapped {store.rotate_master_key()} data keys under a new master key")
+    else:
+        print(json.dumps(store.stats(), indent=2))
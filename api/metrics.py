@@ -0,0 +1,227 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# === Metrics ===
+# Small in-process metrics registry (counters, gauges, histograms with labels)
+# exported in the Prometheus text format by GET /metrics. Hot paths wrap their
+# work in `with stage("name"):`, which records a latency histogram, an
+# in-flight gauge and an error counter per stage. When a request asked for
+# profiling (X-Profile header) the same timings are collected per request and
+# returned as a Server-Timing header; the executors copy contextvars into
+# their worker threads, so stages run off the event loop are included.
+METRICS_PREFIX = "gdpr"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        super().__init__(f"{name}_total", documentation, labels)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def expose(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]  # bucket counts, count, sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    def expose(self) -> list:
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = self.header()
+        names = self.label_names + ("le",)
+        for key, (counts, count, total) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """collect() is called at scrape time and returns exposition lines (e.g. pool gauges)"""
+        self._collectors.append(collect)
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        for collect in self._collectors:
+            try:
+                lines.extend(collect())
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram("stage_seconds", "Duration of instrumented stages", ("stage",))
+stage_in_flight = registry.gauge("stage_in_flight", "Stages currently running", ("stage",))
+stage_errors = registry.counter("stage_errors", "Stages that raised an exception", ("stage",))
+http_request_seconds = registry.histogram(
+    "http_request_seconds", "HTTP request latency (until the response starts)", ("method", "route", "status")
+)
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+target_query_seconds = registry.histogram("target_query_seconds", "SQL search query time per target", ("target",))
+events = registry.counter("events", "Notable events (insert failures, cache hits, ...)", ("event",))
+
+
+# ----- Stage timing and per-request profiling -----
+_profile = contextvars.ContextVar("gdpr_profile", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as stage `name` (histogram, in-flight gauge, errors, request profile)"""
+    stage_in_flight.inc(stage=name)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_in_flight.dec(stage=name)
+        stage_seconds.observe(elapsed, stage=name)
+        profile = _profile.get()
+        if profile is not None:
+            profile.append((name, elapsed))
+
+
+def count_event(name: str, amount: float = 1):
+    events.inc(amount, event=name)
+
+
+def start_profile():
+    """Collect stage timings for the current request; returns a token for stop_profile"""
+    return _profile.set([])
+
+
+def stop_profile(token) -> list:
+    profile = _profile.get()
+    _profile.reset(token)
+    return profile or []
+
+
+def server_timing(profile: list, total: float = None) -> str:
+    """Server-Timing header value: per stage total duration (ms) and call count"""
+    totals = {}
+    for name, elapsed in profile:
+        seconds, calls = totals.get(name, (0.0, 0))
+        totals[name] = (seconds + elapsed, calls + 1)
+    parts = [f'{name};dur={seconds * 1000:.1f};desc="{calls}x"' for name, (seconds, calls) in totals.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def expose_metrics() -> str:
+    return registry.expose()
@@ -0,0 +1,640 @@
+"""
+Local accent/case-insensitive trigram index over the SEARCH_TARGETS name columns.
+
+Each target is one immutable segment directory:
+
+    norm.bin / norm_offsets.npy   normalized names, NUL separated (substring verification)
+    data.bin / data_offsets.npy   original name and row key per document
+    trigrams.npy                  sorted uint64 trigram codes
+    offsets.npy / postings.npy    CSR posting lists (document ids per trigram)
+
+Segments are memory-mapped read-only. manifest.json maps each target to its
+current segment; refresh_index() rebuilds only targets whose fingerprint
+changed and swaps them in atomically; targets whose change signal (see
+below) has not moved are skipped without scanning them. There is no delta: a
+target whose fingerprint changed (any inserted, updated or deleted row) is
+rebuilt as a whole segment.
+
+Segments are verified in the background, never on the search path: at most
+once per NAME_INDEX_VERIFY_INTERVAL per target, a cheap change signal from
+metadata (row count from sys.dm_db_partition_stats and the last write from
+sys.dm_db_index_usage_stats, no table scan) is compared with the one the
+segment was built from. Only when the signal moved is the full fingerprint
+(row count + checksums over the indexed columns) computed, and its outcome is
+remembered for that signal. A target found out of date is searched in SQL
+until it is rebuilt; until its first check a segment is trusted as built.
+
+Erasures do not rebuild segments: the erased row keys are added to the
+target's manifest entry as tombstones (under a lock shared by all processes
+using the directory) and filtered from every search, in every process once it
+reloads the manifest.
+
+Build / refresh offline (or from a scheduler) with:
+
+    python name_index.py refresh [--force]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+
+import numpy as np
+from utils import get_connection
+
+try:
+    import fcntl
+except ImportError:  # Windows: manifest updates are only serialized within the process
+    fcntl = None
+
+NAME_INDEX_DIR = os.getenv("NAME_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".name_index"))
+NAME_INDEX_VERIFY_INTERVAL = float(os.getenv("NAME_INDEX_VERIFY_INTERVAL", "10"))  # seconds a fingerprint check is trusted
+NAME_INDEX_RELOAD_INTERVAL = 2        # seconds between manifest change checks (a stat)
+NAME_INDEX_MAX_TOMBSTONES = 100_000   # erased keys per segment; beyond, it waits for a rebuild
+NAME_INDEX_VERIFY_WORKERS = 4         # background fingerprint checks running at once
+NAME_INDEX_FETCH_SIZE = 50_000
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+
+
+# ----- Normalization -----
+def normalize_name(text) -> str:
+    """Accent- and case-folded form with collapsed whitespace (mirrors Latin1_General_CI_AI)"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch) and ch != "\x00")
+    return " ".join(stripped.casefold().split())
+
+
+def trigram_codes(text: str) -> set:
+    """Pack each 3-character window into one integer (21 bits per code point)"""
+    return {(ord(text[i]) << 42) | (ord(text[i + 1]) << 21) | ord(text[i + 2]) for i in range(len(text) - 2)}
+
+
+def name_similarity(query: str, candidate: str) -> float:
+    """
+    Similarity in percent between a searched name and a matched value.
+
+    Best of a plain and a token-sorted comparison of the normalized strings,
+    so "Paul Jonas" vs "JONAS, Paul" still scores 100.
+    """
+    left, right = normalize_name(query), normalize_name(candidate)
+    if not left or not right:
+        return 0.0
+    if left == right:
+        return 100.0
+    plain = SequenceMatcher(None, left, right).ratio()
+    left_tokens = " ".join(sorted(re.findall(r"\w+", left)))
+    right_tokens = " ".join(sorted(re.findall(r"\w+", right)))
+    token_sorted = SequenceMatcher(None, left_tokens, right_tokens).ratio() if left_tokens and right_tokens else 0.0
+    return round(max(plain, token_sorted) * 100, 1)
+
+
+def target_id(target: dict) -> str:
+    return f"{target['database']}.{target['schema']}.{target['table']}.{target['column']}"
+
+
+def format_row_key(values) -> str:
+    """Key values joined with "|"; "|" and "\\" inside values are backslash-escaped"""
+    return "|".join(
+        "" if v is None else str(v).strip().replace("\\", "\\\\").replace("|", "\\|") for v in values
+    )
+
+
+def parse_row_key(key: str) -> list:
+    """Inverse of format_row_key"""
+    values, current, escaped = [], [], False
+    for ch in key:
+        if escaped:
+            current.append(ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == "|":
+            values.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    values.append("".join(current))
+    return values
+
+
+# ----- Segment -----
+def _map_file(path: str):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class IndexSegment:
+    """Read-only, memory-mapped index for one search target"""
+
+    def __init__(self, directory: str, meta: dict):
+        self.directory = directory
+        self.meta = meta
+        self.trigrams = np.load(os.path.join(directory, "trigrams.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        self.postings = np.load(os.path.join(directory, "postings.npy"), mmap_mode="r")
+        self.norm_offsets = np.load(os.path.join(directory, "norm_offsets.npy"), mmap_mode="r")
+        self.data_offsets = np.load(os.path.join(directory, "data_offsets.npy"), mmap_mode="r")
+        self.norm = _map_file(os.path.join(directory, "norm.bin"))
+        self.data = _map_file(os.path.join(directory, "data.bin"))
+        self._erased = (None, frozenset())   # (meta it was read from, tombstoned row keys)
+
+    def erased_keys(self) -> frozenset:
+        """Row keys erased since the segment was built (manifest tombstones)"""
+        meta, erased = self._erased
+        if meta is not self.meta:
+            erased = frozenset(self.meta.get("tombstones", ()))
+            self._erased = (self.meta, erased)
+        return erased
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.norm_offsets) - 1
+
+    def document(self, doc: int):
+        """(original name, row key) of a document"""
+        start, middle, end = self.data_offsets[2 * doc], self.data_offsets[2 * doc + 1], self.data_offsets[2 * doc + 2]
+        return self.data[start:middle].decode("utf-8"), self.data[middle:end].decode("utf-8")
+
+    def _normalized(self, doc: int) -> bytes:
+        # Each normalized name is followed by a NUL separator
+        return self.norm[self.norm_offsets[doc]:self.norm_offsets[doc + 1] - 1]
+
+    def _candidates(self, normalized: str, pattern: bytes):
+        if len(normalized) >= 3:
+            lists = []
+            for code in sorted(trigram_codes(normalized)):
+                position = int(np.searchsorted(self.trigrams, np.uint64(code)))
+                if position >= len(self.trigrams) or int(self.trigrams[position]) != code:
+                    return []
+                lists.append(self.postings[self.offsets[position]:self.offsets[position + 1]])
+            lists.sort(key=len)
+            candidates = np.asarray(lists[0])
+            for postings in lists[1:]:
+                candidates = np.intersect1d(candidates, postings, assume_unique=True)
+                if not len(candidates):
+                    break
+            return candidates.tolist()
+
+        # Too short for trigrams: scan the normalized blob directly
+        candidates = []
+        start = 0
+        while True:
+            found = self.norm.find(pattern, start)
+            if found < 0:
+                return candidates
+            doc = int(np.searchsorted(self.norm_offsets, found, side="right")) - 1
+            candidates.append(doc)
+            start = int(self.norm_offsets[doc + 1])
+
+    def search(self, normalized: str):
+        """Documents whose normalized name contains `normalized`; yields (name, key)"""
+        pattern = normalized.encode("utf-8")
+        if not pattern or not self.doc_count:
+            return []
+        # Trigram hits are candidates only: verify the full substring
+        return [
+            self.document(doc) for doc in self._candidates(normalized, pattern)
+            if pattern in self._normalized(doc)
+        ]
+
+
+def build_segment(directory: str, rows) -> int:
+    """Write a segment from an iterable of (row key, name); returns the document count"""
+    os.makedirs(directory)
+    norm_offsets = array("q", [0])
+    data_offsets = array("q", [0])
+    trigram_column = array("Q")
+    doc_column = array("I")
+
+    doc = 0
+    with open(os.path.join(directory, "norm.bin"), "wb") as norm_file, \
+            open(os.path.join(directory, "data.bin"), "wb") as data_file:
+        for key, name in rows:
+            normalized = normalize_name(name)
+            encoded = normalized.encode("utf-8") + b"\x00"
+            norm_file.write(encoded)
+            norm_offsets.append(norm_offsets[-1] + len(encoded))
+
+            for part in (str(name), key):
+                encoded = part.encode("utf-8")
+                data_file.write(encoded)
+                data_offsets.append(data_offsets[-1] + len(encoded))
+
+            codes = trigram_codes(normalized)
+            trigram_column.extend(codes)
+            doc_column.extend([doc] * len(codes))
+            doc += 1
+
+    trigrams = np.frombuffer(trigram_column, dtype=np.uint64) if trigram_column else np.empty(0, dtype=np.uint64)
+    docs = np.frombuffer(doc_column, dtype=np.uint32) if doc_column else np.empty(0, dtype=np.uint32)
+    order = np.lexsort((docs, trigrams))
+    trigrams, postings = trigrams[order], docs[order]
+    unique_trigrams, starts = np.unique(trigrams, return_index=True)
+
+    np.save(os.path.join(directory, "trigrams.npy"), unique_trigrams)
+    np.save(os.path.join(directory, "offsets.npy"), np.append(starts, len(trigrams)).astype(np.int64))
+    np.save(os.path.join(directory, "postings.npy"), postings)
+    np.save(os.path.join(directory, "norm_offsets.npy"), np.frombuffer(norm_offsets, dtype=np.int64))
+    np.save(os.path.join(directory, "data_offsets.npy"), np.frombuffer(data_offsets, dtype=np.int64))
+    return doc
+
+
+# ----- Index -----
+def read_manifest(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"segments": {}}
+
+
+_refresh_lock = threading.Lock()
+
+
+@contextmanager
+def manifest_lock(directory: str):
+    """Exclusive manifest read-modify-write: refreshes and erasures, across threads and processes"""
+    with _refresh_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # releases the lock
+
+
+def write_manifest(directory: str, manifest: dict):
+    path = os.path.join(directory, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class NameIndex:
+    """Searches all segments listed in the manifest; picks up refreshed segments automatically"""
+
+    def __init__(self, directory: str = NAME_INDEX_DIR, verify_interval: float = NAME_INDEX_VERIFY_INTERVAL,
+                 executor=None):
+        self.directory = directory
+        self.verify_interval = verify_interval
+        self.executor = executor or verify_executor
+        self._segments = {}
+        self._manifest_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._verified = {}        # target id -> (segment dir, checked at, fingerprint matched)
+        self._signals = {}         # target id -> (segment dir, change signal, fingerprint matched)
+        self._verifying = set()    # target ids with a background check queued or running
+
+    def reload(self, force: bool = False):
+        """Map new or rebuilt segments listed in the manifest"""
+        with self._lock:
+            now = time.time()
+            if not force and now - self._checked_at < NAME_INDEX_RELOAD_INTERVAL:
+                return
+            self._checked_at = now
+            path = os.path.join(self.directory, MANIFEST_FILE)
+            mtime = os.path.getmtime(path) if os.path.exists(path) else None
+            if mtime == self._manifest_mtime:
+                return
+
+            segments = {}
+            for tid, entry in read_manifest(self.directory)["segments"].items():
+                current = self._segments.get(tid)
+                if current is not None and current.meta["dir"] == entry["dir"]:
+                    current.meta = entry
+                    segments[tid] = current
+                    continue
+                try:
+                    segments[tid] = IndexSegment(os.path.join(self.directory, entry["dir"]), entry)
+                except Exception as e:
+                    print(f"⚠️ Could not load name index segment {tid}: {e}")
+            self._segments = segments
+            self._manifest_mtime = mtime
+
+    def _cached_check(self, tid: str, segment: IndexSegment):
+        checked = self._verified.get(tid)
+        if checked is not None and checked[0] == segment.meta["dir"] and time.time() - checked[1] < self.verify_interval:
+            return checked[2]
+        return None
+
+    def has_segment(self, target: dict) -> bool:
+        return target_id(target) in self._segments
+
+    def invalidate(self, target: dict):
+        """Mark the target out of date: it is searched in SQL until a check finds its segment current"""
+        tid = target_id(target)
+        segment = self._segments.get(tid)
+        if segment is not None:
+            self._verified[tid] = (segment.meta["dir"], time.time(), False)
+            self._signals.pop(tid, None)
+
+    def is_fresh(self, target: dict) -> bool:
+        """
+        Segment exists and its last check found it current (never blocks: an
+        expired check is renewed in the background, the last result is used
+        meanwhile)
+        """
+        tid = target_id(target)
+        segment = self._segments.get(tid)
+        if segment is None or segment.meta.get("stale"):
+            return False
+        if self._cached_check(tid, segment) is None:
+            self._schedule_verify(tid, target, segment)
+        checked = self._verified.get(tid)
+        if checked is not None and checked[0] == segment.meta["dir"]:
+            return checked[2]
+        return True
+
+    def _schedule_verify(self, tid: str, target: dict, segment: IndexSegment):
+        with self._lock:
+            if tid in self._verifying:
+                return
+            self._verifying.add(tid)
+        try:
+            self.executor.submit(self._verify, tid, target, segment)
+        except Exception:
+            with self._lock:
+                self._verifying.discard(tid)
+            raise
+
+    def _verify(self, tid: str, target: dict, segment: IndexSegment):
+        """Background check: cheap signal first, full fingerprint only when the signal moved"""
+        try:
+            with get_connection(target["database"]) as conn:
+                try:
+                    signal = fetch_target_signal(conn, target)
+                except Exception as e:
+                    print(f"⚠️ Could not read change signal of {tid}, using the fingerprint: {e}")
+                    signal = None
+                known = self._signals.get(tid)
+                if signal is not None and signal == segment.meta.get("signal"):
+                    fresh = True
+                elif signal is not None and known is not None and known[:2] == (segment.meta["dir"], signal):
+                    fresh = known[2]
+                else:
+                    fresh = fetch_target_fingerprint(conn, target) == segment.meta["fingerprint"]
+                    if signal is not None:
+                        self._signals[tid] = (segment.meta["dir"], signal, fresh)
+        except Exception as e:
+            print(f"⚠️ Could not verify name index segment {tid}: {e}")
+            fresh = False
+        finally:
+            with self._lock:
+                self._verifying.discard(tid)
+        previous = self._verified.get(tid)
+        if not fresh and (previous is None or previous[2]):
+            print(f"⚠️ Name index segment {tid} is out of date, searching it in SQL until it is refreshed")
+        self._verified[tid] = (segment.meta["dir"], time.time(), fresh)
+
+    def search(self, name: str, targets):
+        """
+        Search the given targets.
+
+        Returns (hits, stale_targets): hits are dicts like the SQL search results
+        (database/schema/table/column/name/key); stale_targets have no segment
+        or changed since it was built, and must be searched in SQL.
+        """
+        self.reload()
+        normalized = normalize_name(name)
+        hits, stale = [], []
+        for target in targets:
+            if not self.is_fresh(target):
+                stale.append(target)
+                continue
+            segment = self._segments[target_id(target)]
+            erased = segment.erased_keys()
+            for matched_name, key in segment.search(normalized):
+                if key in erased:
+                    continue
+                hits.append({
+                    "database": target["database"],
+                    "schema": target["schema"],
+                    "table": target["table"],
+                    "column": target["column"],
+                    "name": matched_name,
+                    "key": key,
+                })
+        return hits, stale
+
+    def stats(self) -> list:
+        """Per segment; "fresh" is the last fingerprint check (None: not checked within the interval)"""
+        now = time.time()
+        return [
+            {
+                "target": tid,
+                "documents": segment.doc_count,
+                "built_at": segment.meta["built_at"],
+                "age_seconds": round(now - segment.meta["verified_at"], 1),
+                "fresh": self._cached_check(tid, segment),
+            }
+            for tid, segment in self._segments.items()
+        ]
+
+
+verify_executor = ThreadPoolExecutor(max_workers=NAME_INDEX_VERIFY_WORKERS, thread_name_prefix="index-verify")
+_name_index = None
+_name_index_lock = threading.Lock()
+
+
+def get_name_index() -> NameIndex:
+    global _name_index
+    if _name_index is None:
+        with _name_index_lock:
+            if _name_index is None:
+                _name_index = NameIndex()
+    return _name_index
+
+
+# ----- Offline build / refresh -----
+def _source(target: dict) -> str:
+    return f"[{target['schema']}].[{target['table']}]"
+
+
+# Heap / clustered index only: row count and last insert/update/delete, from metadata
+TARGET_SIGNAL_QUERY = """
+SELECT SUM(p.row_count), MAX(u.last_user_update)
+FROM sys.dm_db_partition_stats p
+LEFT JOIN sys.dm_db_index_usage_stats u
+    ON u.database_id = DB_ID() AND u.object_id = p.object_id AND u.index_id = p.index_id
+WHERE p.object_id = OBJECT_ID(?) AND p.index_id IN (0, 1)
+"""
+
+
+def fetch_target_signal(conn, target: dict):
+    """
+    Cheap change signal (no table scan); None when the table has no stats.
+    Usage stats reset on a server restart, so a changed signal only means
+    "check the fingerprint", not "changed".
+    """
+    cursor = conn.cursor()
+    cursor.execute(TARGET_SIGNAL_QUERY, (f"[{target['schema']}].[{target['table']}]",))
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None or row[0] is None:
+        return None
+    count, last_update = row
+    return f"{count}:{last_update.isoformat() if last_update is not None else ''}"
+
+
+def fetch_target_fingerprint(conn, target: dict) -> str:
+    """
+    Row count + checksums over key and name columns (full scan). The SUM
+    complements CHECKSUM_AGG, which is XOR-based and cancels out pairs of
+    changes.
+    """
+    columns = ", ".join(f"[{c}]" for c in target.get("key", []) + [target["column"]])
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT_BIG(*), SUM(CAST(BINARY_CHECKSUM({columns}) AS bigint)), "
+                   f"CHECKSUM_AGG(BINARY_CHECKSUM({columns})) FROM {_source(target)}")
+    count, total, checksum = cursor.fetchone()
+    cursor.close()
+    return f"{count}:{total}:{checksum}"
+
+
+def iter_target_rows(conn, target: dict, fetch_size: int = NAME_INDEX_FETCH_SIZE):
+    key_columns = target.get("key", [])
+    columns = ", ".join(f"[{c}]" for c in key_columns + [target["column"]])
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {columns} FROM {_source(target)} WHERE [{target['column']}] IS NOT NULL")
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield format_row_key(row[:len(key_columns)]), row[len(key_columns)]
+    cursor.close()
+
+
+def refresh_index(targets, directory: str = NAME_INDEX_DIR, force: bool = False, prune: bool = True) -> dict:
+    """
+    Rebuild segments whose source fingerprint changed (the whole target, not
+    just the changed rows); returns target id -> action. With prune, segments
+    of targets not in `targets` are removed.
+    """
+    with manifest_lock(directory):  # the manifest is read, modified and rewritten
+        return _refresh_index(targets, directory, force, prune)
+
+
+def record_erasure(target: dict, keys, signal_before=None, signal_after=None,
+                   directory: str = NAME_INDEX_DIR) -> str:
+    """
+    Tombstone erased row keys in the target's segment; returns what was done.
+
+    If the segment matched the table right before the erasure (signal_before
+    is the one it was built or last verified from), signal_after becomes its
+    signal, so the segment keeps answering searches instead of falling back
+    to SQL until the next refresh. Rows written by others while the erasure
+    ran would then only show up after that refresh.
+    """
+    tid = target_id(target)
+    with manifest_lock(directory):
+        manifest = read_manifest(directory)
+        entry = manifest["segments"].get(tid)
+        if entry is None:
+            return "no segment"
+        tombstones = set(entry.get("tombstones", ())) | set(keys)
+        if len(tombstones) > NAME_INDEX_MAX_TOMBSTONES:
+            entry["stale"] = True
+            entry.pop("tombstones", None)
+            action = "stale"
+        else:
+            entry["tombstones"] = sorted(tombstones)
+            action = "tombstoned"
+            if signal_before is not None and signal_after is not None and entry.get("signal") == signal_before:
+                entry["signal"] = signal_after
+                action = "tombstoned, current"
+        write_manifest(directory, manifest)
+    return action
+
+
+def _refresh_index(targets, directory: str, force: bool, prune: bool) -> dict:
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    segments = manifest["segments"]
+    actions = {}
+
+    for target in targets:
+        tid = target_id(target)
+        entry = segments.get(tid)
+        start = time.time()
+        with get_connection(target["database"]) as conn:
+            try:
+                signal = fetch_target_signal(conn, target)
+            except Exception as e:
+                print(f"⚠️ Could not read change signal of {tid}: {e}")
+                signal = None
+            # Stale: more erasures than tombstones can hold, the segment must be rebuilt
+            current = (not force and entry is not None and not entry.get("stale")
+                       and os.path.isdir(os.path.join(directory, entry["dir"])))
+            # Unmoved signal: unchanged without scanning the table for its fingerprint
+            fingerprint = entry["fingerprint"] if current and signal is not None and entry.get("signal") == signal \
+                else fetch_target_fingerprint(conn, target)
+            if current and entry["fingerprint"] == fingerprint:
+                entry["verified_at"] = time.time()
+                entry["signal"] = signal
+                actions[tid] = "unchanged"
+            else:
+                segment_dir = f"{hashlib.sha1(tid.encode('utf-8')).hexdigest()[:12]}-{int(time.time() * 1000)}"
+                doc_count = build_segment(os.path.join(directory, segment_dir), iter_target_rows(conn, target))
+                now = time.time()
+                segments[tid] = {
+                    "dir": segment_dir,
+                    "fingerprint": fingerprint,
+                    "signal": signal,
+                    "doc_count": doc_count,
+                    "built_at": now,
+                    "verified_at": now,
+                }
+                actions[tid] = "rebuilt"
+        # Persist after every target so an interrupted refresh keeps finished work
+        write_manifest(directory, manifest)
+        if actions[tid] == "rebuilt" and entry is not None:
+            # Readers that still map the old segment keep working until they reload
+            shutil.rmtree(os.path.join(directory, entry["dir"]), ignore_errors=True)
+        print(f"✔ {tid}: {actions[tid]} [{time.time() - start:.2f}s]")
+
+    configured = {target_id(t) for t in targets}
+    for tid in [tid for tid in segments if prune and tid not in configured]:
+        shutil.rmtree(os.path.join(directory, segments.pop(tid)["dir"]), ignore_errors=True)
+        actions[tid] = "removed"
+    write_manifest(directory, manifest)
+    return actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the local name search index")
+    parser.add_argument("command", choices=["refresh", "stats"])
+    parser.add_argument("--force", action="store_true", help="rebuild every segment")
+    parser.add_argument("--dir", default=NAME_INDEX_DIR)
+    args = parser.parse_args()
+
+    from sql_extraction import SEARCH_TARGETS
+
+    if args.command == "refresh":
+        refresh_index(SEARCH_TARGETS, args.dir, force=args.force)
+    else:
+        index = NameIndex(args.dir)
+        index.reload(force=True)
+        print(json.dumps(index.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Streaming PDF writer for GDPR reports.
+
+reportlab keeps every page of a document in memory until the file is saved,
+so a 100k-column schema means one huge in-memory table. This module writes
+the PDF objects itself: each page is emitted (and can be sent to the client)
+as soon as it is laid out, and only object offsets and page ids are kept
+until the cross-reference table is written at the end.
+"""
+import zlib
+from datetime import datetime
+
+# === Layout (points, A4 portrait) ===
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89
+MARGIN = 36
+ROW_HEIGHT = 11
+FONT_SIZE = 7
+CHAR_WIDTH = 0.52  # average Helvetica glyph width as a fraction of the font size
+
+REPORT_COLUMNS = [
+    # (analysis field, header, width)
+    ('table_name', 'Table', 125),
+    ('column_name', 'Column', 130),
+    ('data_type', 'Type', 62),
+    ('is_primary_key', 'PK', 22),
+    ('risk_level', 'Risk', 48),
+    ('gdpr_category', 'GDPR Category', 136),
+]
+
+RISK_COLORS = {
+    'High': (1.0, 0.8, 0.8),     # light red
+    'Medium': (1.0, 0.95, 0.8),  # light yellow
+    'Low': (0.8, 1.0, 0.8),      # light green
+}
+
+# Fixed object numbers; pages and their content streams follow
+CATALOG_ID, PAGES_ID, FONT_ID, BOLD_FONT_ID = 1, 2, 3, 4
+
+
+def pdf_text(value) -> bytes:
+    """Escape a value for a PDF string literal (WinAnsi encoded)"""
+    text = "" if value is None else str(value)
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b" ").replace(b"\n", b" ")
+
+
+def fit_text(value, width: float, size: float = FONT_SIZE) -> str:
+    text = "" if value is None else str(value)
+    max_chars = max(1, int((width - 4) / (size * CHAR_WIDTH)))
+    return text if len(text) <= max_chars else text[:max(1, max_chars - 1)] + "…"
+
+
+class StreamingPdfWriter:
+    """Emits a PDF as byte chunks; call page() per finished page, then finish()"""
+
+    def __init__(self):
+        self._offsets = {}
+        self._position = 0
+        self._next_id = BOLD_FONT_ID + 1
+        self._page_ids = []
+
+    def _emit(self, chunk: bytes) -> bytes:
+        self._position += len(chunk)
+        return chunk
+
+    def _object(self, object_id: int, body: bytes) -> bytes:
+        self._offsets[object_id] = self._position
+        return self._emit(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _allocate(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def start(self) -> bytes:
+        chunks = [self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")]
+        for object_id, base_font in ((FONT_ID, b"Helvetica"), (BOLD_FONT_ID, b"Helvetica-Bold")):
+            chunks.append(self._object(
+                object_id,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /" + base_font + b" /Encoding /WinAnsiEncoding >>"
+            ))
+        return b"".join(chunks)
+
+    def page(self, content: bytes) -> bytes:
+        stream = zlib.compress(content)
+        content_id, page_id = self._allocate(), self._allocate()
+        self._page_ids.append(page_id)
+        return self._object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        ) + self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (PAGES_ID, PAGE_WIDTH, PAGE_HEIGHT, FONT_ID, BOLD_FONT_ID, content_id)
+        )
+
+    def finish(self) -> bytes:
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self._page_ids)
+        chunks = [
+            self._object(PAGES_ID, b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(self._page_ids)),
+            self._object(CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_ID),
+        ]
+        xref_position = self._position
+        size = self._next_id
+        xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self._offsets[object_id])
+        xref.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, CATALOG_ID, xref_position))
+        chunks.append(self._emit(b"".join(xref)))
+        return b"".join(chunks)
+
+
+class PageCanvas:
+    """Accumulates the drawing operators of a single page"""
+
+    def __init__(self):
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def text(self, x: float, y: float, value, size: float = FONT_SIZE, bold: bool = False):
+        font = b"F2" if bold else b"F1"
+        self.ops.append(b"BT /%s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (font, size, x, y, pdf_text(value)))
+
+    def rect(self, x: float, y: float, width: float, height: float, fill=None, stroke: bool = True):
+        if fill is not None:
+            self.ops.append(b"%.3f %.3f %.3f rg %.2f %.2f %.2f %.2f re f" % (*fill, x, y, width, height))
+        if stroke:
+            self.ops.append(b"0.6 G 0.25 w %.2f %.2f %.2f %.2f re S" % (x, y, width, height))
+
+    def content(self) -> bytes:
+        return b"\n".join(self.ops)
+
+
+def summarize_analysis(df_analysis) -> dict:
+    """Aggregated risk counts for the summary section"""
+    risk_counts = df_analysis['risk_level'].value_counts()
+    category_counts = df_analysis['gdpr_category'].value_counts()
+    flagged = df_analysis[df_analysis['risk_level'].isin(['High', 'Medium'])]
+    top_tables = flagged.groupby('table_name').size().sort_values(ascending=False).head(15)
+    return {
+        "columns": len(df_analysis),
+        "tables": int(df_analysis['table_name'].nunique()),
+        "risk_levels": {level: int(risk_counts.get(level, 0)) for level in ('High', 'Medium', 'Low')},
+        "categories": {str(k): int(v) for k, v in category_counts.items()},
+        "top_tables": {str(k): int(v) for k, v in top_tables.items()},
+    }
+
+
+def stream_gdpr_pdf_report(df_analysis, database_name: str):
+    """
+    Yield the PDF report in chunks: a summary page, then one section per
+    table, page by page. Rows are laid out straight from the frame, so the
+    memory used by the writer does not grow with the schema size.
+    """
+    writer = StreamingPdfWriter()
+    yield writer.start()
+
+    # ----- Summary -----
+    summary = summarize_analysis(df_analysis)
+    canvas = PageCanvas()
+    canvas.text(MARGIN, canvas.y, "GDPR Risk Report – Database Schema", size=18, bold=True)
+    canvas.y -= 24
+    canvas.text(MARGIN, canvas.y, f"Database: {database_name}", size=12, bold=True)
+    canvas.y -= 16
+    canvas.text(MARGIN, canvas.y, f"Generated: {datetime.now():%Y-%m-%d %H:%M}", size=9)
+    canvas.y -= 28
+
+    canvas.text(MARGIN, canvas.y, "Summary", size=13, bold=True)
+    canvas.y -= 18
+    for label, value in (("Tables analysed", summary["tables"]), ("Columns analysed", summary["columns"])):
+        canvas.text(MARGIN, canvas.y, f"{label}: {value:,}", size=10)
+        canvas.y -= 14
+    canvas.y -= 6
+    for level, count in summary["risk_levels"].items():
+        share = count / summary["columns"] * 100 if summary["columns"] else 0
+        canvas.rect(MARGIN, canvas.y - 3, 10, 10, fill=RISK_COLORS[level])
+        canvas.text(MARGIN + 16, canvas.y, f"{level} risk: {count:,} columns ({share:.1f}%)", size=10)
+        canvas.y -= 14
+
+    canvas.y -= 10
+    canvas.text(MARGIN, canvas.y, "By GDPR category", size=11, bold=True)
+    canvas.y -= 15
+    for category, count in summary["categories"].items():
+        canvas.text(MARGIN, canvas.y, f"{category}: {count:,}", size=10)
+        canvas.y -= 13
+
+    if summary["top_tables"]:
+        canvas.y -= 10
+        canvas.text(MARGIN, canvas.y, "Tables with most Medium/High risk columns", size=11, bold=True)
+        canvas.y -= 15
+        for table, count in summary["top_tables"].items():
+            canvas.text(MARGIN, canvas.y, fit_text(f"{table}: {count:,}", PAGE_WIDTH - 2 * MARGIN, 10), size=10)
+            canvas.y -= 13
+    yield writer.page(canvas.content())
+
+    # ----- Per-table detail sections -----
+    fields = [field for field, _, _ in REPORT_COLUMNS]
+    canvas = None
+
+    def new_page():
+        page = PageCanvas()
+        x = MARGIN
+        for _, header, width in REPORT_COLUMNS:
+            page.rect(x, page.y - 3, width, ROW_HEIGHT, fill=(0.83, 0.83, 0.83))
+            page.text(x + 2, page.y, header, bold=True)
+            x += width
+        page.y -= ROW_HEIGHT
+        return page
+
+    # Section per schema.table; the frame is already ordered by table
+    if 'table_schema' in df_analysis.columns:
+        sections = df_analysis['table_schema'].astype(str) + "." + df_analysis['table_name'].astype(str)
+    else:
+        sections = df_analysis['table_name'].astype(str)
+    risk_position = fields.index('risk_level')
+
+    current_table = None
+    for table, row in zip(sections, df_analysis[fields].itertuples(index=False, name=None)):
+        needs_heading = table != current_table
+        lines_needed = 2 if needs_heading else 1
+        if canvas is None or canvas.y - lines_needed * ROW_HEIGHT < MARGIN:
+            if canvas is not None:
+                yield writer.page(canvas.content())
+            canvas = new_page()
+            needs_heading = True
+
+        if needs_heading:
+            current_table = table
+            canvas.text(MARGIN, canvas.y, fit_text(f"Table: {table}", PAGE_WIDTH - 2 * MARGIN, FONT_SIZE + 1),
+                        size=FONT_SIZE + 1, bold=True)
+            canvas.y -= ROW_HEIGHT
+
+        x = MARGIN
+        fill = RISK_COLORS.get(str(row[risk_position]).strip(), (1.0, 1.0, 1.0))
+        for value, (_, _, width) in zip(row, REPORT_COLUMNS):
+            canvas.rect(x, canvas.y - 3, width, ROW_HEIGHT, fill=fill)
+            canvas.text(x + 2, canvas.y, fit_text(value, width))
+            x += width
+        canvas.y -= ROW_HEIGHT
+
+    if canvas is not None:
+        yield writer.page(canvas.content())
+    yield writer.finish()
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import re
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# === Value-based PII detection ===
+# Column names only go so far (STCD1, TELF1, SMTP_ADDR...), so sampled values
+# are checked too. Each detector is a precompiled pattern, optionally followed
+# by a checksum validator that only runs on pattern matches. Values are
+# deduplicated first and matched once per distinct value against all patterns
+# combined into one alternation, then hits are counted per column. The
+# confidence of a column is the share of its sampled values that a detector
+# accepts (at least PII_MIN_SAMPLES are assumed, so a single matching value is
+# not enough on its own).
+PII_SAMPLE_VALUES = 20            # sampled values per column kept for detection
+PII_MIN_SAMPLES = 3
+PII_CONFIDENCE_THRESHOLD = 0.6    # confidence from which a detection raises the risk level
+PII_DETECTOR_VERSION = 3          # bump when a validator's logic changes (stored analyses are redone)
+DOB_MIN_AGE, DOB_MAX_AGE = 14, 110
+DOB_NAME_HINTS = re.compile(r"birth|dob|gbdat|geb|nascita|natal", re.IGNORECASE)
+DOB_WEIGHT_WITHOUT_HINT = 0.5     # any date column holds plausible birth dates; need a name hint too
+# dd.mm.yyyy and friends: the phone pattern accepts these, they are never phone numbers
+DATE_SHAPED = re.compile(r"\d{1,2}[./-]\d{1,2}[./-]\d{2,4}|\d{4}[./-]\d{1,2}[./-]\d{1,2}")
+# Amounts with thousands groups and decimals ("+1 000 000.00", "1.234,56")
+AMOUNT_SHAPED = re.compile(r"[+-]?\d{1,3}(?:[ ,.']\d{3})*[.,]\d{2}")
+# "00" + digits without separators is as often a zero-padded document number
+# (VBELN 0090000001) as a phone number: only counted in phone-named columns
+PHONE_NAME_HINTS = re.compile(r"tel|phone|fax|mob|cell|handy", re.IGNORECASE)
+
+RISK_RANK = {"Low": 0, "Medium": 1, "High": 2}
+
+
+def iban_is_valid(value: str) -> bool:
+    """ISO 13616 mod-97 check"""
+    iban = value.replace(" ", "").upper()
+    rearranged = iban[4:] + iban[:4]
+    digits = "".join(str(int(ch, 36)) for ch in rearranged)
+    return int(digits) % 97 == 1
+
+
+def ahv_is_valid(value: str) -> bool:
+    """Swiss AHV/AVS number (756.xxxx.xxxx.xx): EAN-13 check digit"""
+    digits = [int(ch) for ch in value if ch.isdigit()]
+    total = sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]))
+    return (10 - total % 10) % 10 == digits[12]
+
+
+def phone_is_plausible(value: str) -> bool:
+    return (7 <= sum(ch.isdigit() for ch in value) <= 15 and not value.isdigit()
+            and not DATE_SHAPED.fullmatch(value) and not AMOUNT_SHAPED.fullmatch(value))
+
+
+def parse_date(value: str) -> date:
+    """ISO (yyyy-mm-dd[ time]), German (dd.mm.yyyy) or SAP DATS (yyyymmdd)"""
+    if len(value) == 8 and value.isdigit():
+        return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    if value[2:3] == ".":
+        day, month, year = value.split(".")
+        return date(int(year), int(month), int(day))
+    return date.fromisoformat(value[:10])
+
+
+def dob_is_plausible(value: str) -> bool:
+    try:
+        born = parse_date(value)
+    except ValueError:
+        return False
+    age = (date.today() - born).days / 365.25
+    return DOB_MIN_AGE <= age <= DOB_MAX_AGE
+
+
+DETECTORS = [
+    # name, label, pattern, validator, column name hints (weight on columns without a
+    # matching name), risk level and category when detected
+    {
+        "name": "email", "label": "e-mail addresses",
+        "pattern": r"[A-Za-z0-9._%+'-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,24}",
+        "risk_level": "Medium", "gdpr_category": "Personal Data",
+    },
+    {
+        "name": "phone", "label": "phone numbers",
+        # international (+CC / 00CC) or national with a trunk 0 and separators
+        "pattern": r"(?:(?:\+|00)[1-9][0-9 ()./-]{6,18}|0[1-9][0-9]{0,4}[ /.-][0-9 /.-]{3,14})[0-9]",
+        "validator": phone_is_plausible,
+        "risk_level": "Medium", "gdpr_category": "Personal Data",
+    },
+    {
+        # 00 international prefix without separators (00491711234567): needs a phone-like column name
+        "name": "phone", "label": "phone numbers",
+        "pattern": r"00[1-9][0-9]{6,12}",
+        "name_hints": PHONE_NAME_HINTS, "weight_without_hint": 0.0,
+        "risk_level": "Medium", "gdpr_category": "Personal Data",
+    },
+    {
+        "name": "iban", "label": "IBANs",
+        "pattern": r"[A-Z]{2}[0-9]{2}(?: ?[A-Z0-9]){11,30}",
+        "validator": iban_is_valid,
+        "risk_level": "High", "gdpr_category": "Personal Data (financial)",
+    },
+    {
+        "name": "national_id", "label": "national ID numbers",
+        "pattern": "|".join([
+            r"(?!000|666|9\d\d)\d{3}-(?!00)\d{2}-(?!0000)\d{4}",                                  # US SSN
+            r"(?!BG|GB|NK|KN|TN|NT|ZZ)[A-CEGHJ-PR-TW-Z][A-CEGHJ-NPR-TW-Z] ?\d{2} ?\d{2} ?\d{2} ?[A-D]",  # UK NINO
+            r"[A-Z]{6}\d{2}[A-EHLMPR-T]\d{2}[A-Z]\d{3}[A-Z]",                                      # IT codice fiscale
+            r"756\.?\d{4}\.?\d{4}\.?\d{2}",                                                        # CH AHV
+        ]),
+        "validator": lambda v: ahv_is_valid(v) if v.startswith("756") else True,
+        "risk_level": "High", "gdpr_category": "Personal Identifier",
+    },
+    {
+        "name": "date_of_birth", "label": "dates of birth",
+        "pattern": r"(?:19|20)\d{2}-[01]\d-[0-3]\d(?:[ T]00:00:00(?:\.0+)?)?|[0-3]\d\.[01]\d\.(?:19|20)\d{2}",
+        "validator": dob_is_plausible,
+        "name_hints": DOB_NAME_HINTS, "weight_without_hint": DOB_WEIGHT_WITHOUT_HINT,
+        "risk_level": "Medium", "gdpr_category": "Personal Data",
+    },
+    {
+        # SAP DATS (GBDAT = '19800504'): any 8-digit number looks like this, so only with a name hint
+        "name": "date_of_birth", "label": "dates of birth",
+        "pattern": r"(?:19|20)\d{2}[01]\d[0-3]\d",
+        "validator": dob_is_plausible,
+        "name_hints": DOB_NAME_HINTS, "weight_without_hint": 0.0,
+        "risk_level": "Medium", "gdpr_category": "Personal Data",
+    },
+]
+
+
+class PiiDetector:
+    def __init__(self, detectors=None, threshold: float = PII_CONFIDENCE_THRESHOLD):
+        self.detectors = DETECTORS if detectors is None else detectors
+        self.threshold = threshold
+        self._patterns = [re.compile(d["pattern"]) for d in self.detectors]
+        # One pass over each value: all detectors as named alternatives
+        self._combined = re.compile("|".join(f"(?P<d{i}>{d['pattern']})" for i, d in enumerate(self.detectors)))
+
+    def fingerprint(self) -> str:
+        """Hash of everything that decides detection output, stable across processes"""
+        described = [
+            {key: (value.pattern if isinstance(value, re.Pattern) else
+                   getattr(value, "__qualname__", value) if callable(value) else value)
+             for key, value in detector.items()}
+            for detector in self.detectors
+        ]
+        settings = [PII_DETECTOR_VERSION, PII_SAMPLE_VALUES, PII_MIN_SAMPLES, self.threshold, DOB_MIN_AGE, DOB_MAX_AGE]
+        return hashlib.sha1(json.dumps([settings, described], sort_keys=True).encode("utf-8")).hexdigest()
+
+    def detect(self, sample_lists, column_names=None) -> pd.DataFrame:
+        """
+        Score every column from its sampled values.
+
+        sample_lists: one list of sampled values (or None) per column.
+        column_names: detectors with name_hints are weighted down on columns
+        whose name does not match (on every column when omitted).
+        Returns a frame with pii_detected (best detector name, or None below
+        the threshold) and pii_confidence (0..1), aligned with the input.
+        """
+        columns = len(sample_lists)
+        counts = np.fromiter((len(values) if values else 0 for values in sample_lists), dtype=np.int64, count=columns)
+        owners = np.repeat(np.arange(columns), counts)
+        flat = pd.Series([value for values in sample_lists if values for value in values], dtype=object)
+        codes, uniques = pd.factorize(flat.astype(str).str.strip())
+
+        # First matching detector per distinct value, then checksum validation
+        fullmatch = self._combined.fullmatch
+        first = np.fromiter(
+            ((int(m.lastgroup[1:]) if m else -1) for m in map(fullmatch, uniques)),
+            dtype=np.int64, count=len(uniques)
+        )
+        matched = np.zeros((len(uniques), len(self.detectors)), dtype=bool)
+        for position, (detector, pattern) in enumerate(zip(self.detectors, self._patterns)):
+            candidates = np.flatnonzero(first == position)
+            validator = detector.get("validator")
+            if validator is not None:
+                candidates = candidates[[validator(uniques[i]) for i in candidates]] if len(candidates) else candidates
+            matched[candidates, position] = True
+            # A value rejected by an earlier detector may still match a later one
+            rejected = np.flatnonzero((first >= 0) & (first < position) & ~matched.any(axis=1))
+            for i in rejected:
+                if pattern.fullmatch(uniques[i]) and (validator is None or validator(uniques[i])):
+                    matched[i, position] = True
+
+        scores = np.zeros((columns, len(self.detectors)))
+        denominators = np.maximum(counts, PII_MIN_SAMPLES)
+        for position in range(len(self.detectors)):
+            hits = np.bincount(owners[matched[codes, position]], minlength=columns)
+            scores[:, position] = hits / denominators
+
+        for position, detector in enumerate(self.detectors):
+            hints = detector.get("name_hints")
+            if hints is None:
+                continue
+            if column_names is None:
+                hinted = np.zeros(columns, dtype=bool)
+            else:
+                hinted = pd.Series(column_names).astype(str).str.contains(hints).to_numpy()
+            scores[:, position] *= np.where(hinted, 1.0, detector["weight_without_hint"])
+
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(columns), best]
+        detected = np.array([d["name"] for d in self.detectors], dtype=object)[best]
+        detected[confidence < self.threshold] = None
+        return pd.DataFrame({
+            "pii_detected": pd.Series(detected, dtype=object),  # None, not NaN, when nothing was detected
+            "pii_confidence": np.round(confidence, 2),
+        })
+
+    def apply_to_risk(self, df_analysis: pd.DataFrame) -> pd.DataFrame:
+        """Raise (never lower) risk level and category where values were detected as PII"""
+        by_name = {d["name"]: d for d in self.detectors}
+        for name, detector in by_name.items():
+            rows = df_analysis['pii_detected'] == name
+            if not rows.any():
+                continue
+            current = df_analysis.loc[rows, 'risk_level'].map(RISK_RANK).fillna(0)
+            raise_rows = current.index[current < RISK_RANK[detector["risk_level"]]]
+            if not len(raise_rows):
+                continue
+            df_analysis.loc[raise_rows, 'risk_level'] = detector["risk_level"]
+            df_analysis.loc[raise_rows, 'gdpr_category'] = detector["gdpr_category"]
+            df_analysis.loc[raise_rows, 'compliance_status'] = (
+                "Non-Compliant" if detector["risk_level"] == "High" else "Partially Compliant"
+            )
+            df_analysis.loc[raise_rows, 'recommendation'] = (
+                f"Sampled values look like {detector['label']} - review necessity and protect"
+            )
+        return df_analysis
+
+
+_default_detector = None
+
+
+def get_detector() -> PiiDetector:
+    global _default_detector
+    if _default_detector is None:
+        _default_detector = PiiDetector()
+    return _default_detector
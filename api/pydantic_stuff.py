@@ -1,12 +1,19 @@
-from pydantic import BaseModel
+import os
+
+from pydantic import BaseModel, Field
 from typing import List, Literal, Optional
 
+# Request size limits (longer lists are rejected with a 422)
+BULK_SEARCH_MAX_NAMES = int(os.getenv("BULK_SEARCH_MAX_NAMES", "500"))
+PROCESS_NAMES_MAX_RECORDS = int(os.getenv("PROCESS_NAMES_MAX_RECORDS", "5000"))
+
 class ProcessNameRequest(BaseModel):
     source: str
     name: str
     probability: int
     id: str
     action: Literal["mask", "delete"]
+    deterministic: bool = False  # mask to a stable token (same name, same token) instead of encrypting
 
 class ProcessNameResponse(BaseModel):
     success: bool
@@ -18,14 +25,56 @@ class ProcessNameResponse(BaseModel):
     source: str
     probability: float
 
+class ProcessNamesBatchRequest(BaseModel):
+    records: List[ProcessNameRequest] = Field(max_length=PROCESS_NAMES_MAX_RECORDS)
+
+class ProcessNamesBatchResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[ProcessNameResponse]  # same order as the request records
+
 # ----- Models -----
 class SearchRequest(BaseModel):
     firstName: str
     lastName: str
     action: str  # "mask" or "delete"
+    mode: Literal["direct", "agent"] = "direct"  # "agent" runs the LLM agent instead
 
 class DataRecordSearch(BaseModel):
     source: str
     name: str
     key: str
-    probability: float
\ No newline at end of file
+    probability: float
+
+class EntityCluster(BaseModel):
+    entity_id: str              # stable for the same set of matched rows
+    name: str                   # most frequent spelling in the cluster
+    confidence: float           # 0..1, how likely the records are the same subject
+    probability: float          # best match of any record to the searched name
+    sources: List[str]
+    records: List[DataRecordSearch]
+
+class BulkSearchRequest(BaseModel):
+    names: List[str] = Field(max_length=BULK_SEARCH_MAX_NAMES)  # full names, one subject each
+
+class BulkSearchResult(BaseModel):
+    name: str
+    records: List[DataRecordSearch]
+
+class BulkSearchResponse(BaseModel):
+    results: List[BulkSearchResult]  # same order as the request names
+    errors: List[dict]  # targets that could not be searched
+
+class ErasureRecord(BaseModel):
+    source: str  # db.schema.table.column, as returned by /search
+    key: str     # row key, as returned by /search
+    name: str    # value found in that column (masking only touches rows still holding it)
+
+class ErasureJobRequest(BaseModel):
+    action: Literal["mask", "delete"]
+    records: List[ErasureRecord]
+
+class AnalysisJobRequest(BaseModel):
+    database_name: str
+    refresh: bool = False  # bypass the schema metadata cache
@@ -0,0 +1,236 @@
+import contextvars
+import math
+import os
+import time
+from concurrent.futures import CancelledError, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils import get_connection
+from metrics import stage
+
+# === Sample Value Extraction ===
+# One query per table fetches a small batch of rows for all of its columns at
+# once; tables are sampled in parallel on pooled connections. Sparse columns
+# (no value in that batch) get a per-column "TOP n ... WHERE col IS NOT NULL"
+# query, so PII that is only filled in for a few rows is still found. On an
+# all-NULL column that query scans the whole table, so it is skipped on large
+# tables, and every query of a table shares one SAMPLE_TABLE_TIMEOUT deadline.
+SAMPLE_VALUES_PER_COLUMN = 3
+SAMPLE_ROWS_PER_TABLE = 100
+SAMPLE_MAX_WORKERS = 8                # tables sampled at once per collect_samples call
+SAMPLE_POOL_SIZE = int(os.getenv("SAMPLE_POOL_SIZE", "16"))  # threads shared by all sampling runs
+SAMPLE_FALLBACK_MAX_COLUMNS = 50      # sparse columns per table re-queried individually
+SAMPLE_FALLBACK_MAX_ROWS = 1_000_000  # no sparse-column queries on tables this large
+SAMPLE_TABLE_TIMEOUT = 5              # seconds for all queries of one table
+SAMPLE_MIN_QUERY_SECONDS = 1          # remaining budget needed to start another query
+SAMPLE_MAX_VALUE_LENGTH = 200         # truncate long text values
+TABLESAMPLE_MIN_ROWS = 1_000_000      # above this, read random pages instead of the first ones
+TABLESAMPLE_ROWS = 10_000
+
+# Types that cannot be sampled meaningfully as text
+UNSAMPLEABLE_TYPES = {
+    'binary', 'varbinary', 'image', 'timestamp', 'rowversion',
+    'geography', 'geometry', 'hierarchyid', 'sql_variant',
+}
+
+ROW_COUNT_QUERY = """
+SELECT s.name AS table_schema, t.name AS table_name, SUM(p.rows) AS row_count
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+GROUP BY s.name, t.name;
+"""
+
+
+def quote_identifier(name: str) -> str:
+    return "[" + str(name).replace("]", "]]") + "]"
+
+
+def fetch_row_counts(conn) -> dict:
+    """(schema, table) -> approximate row count from partition metadata (base tables only)"""
+    cursor = conn.cursor()
+    cursor.execute(ROW_COUNT_QUERY)
+    counts = {(schema, table): int(rows or 0) for schema, table, rows in cursor.fetchall()}
+    cursor.close()
+    return counts
+
+
+def get_row_counts(database_name: str) -> dict:
+    """Row counts of a database; empty (no TABLESAMPLE / READUNCOMMITTED hints) if they cannot be read"""
+    try:
+        with get_connection(database_name) as conn:
+            return fetch_row_counts(conn)
+    except Exception as e:
+        print(f"⚠️ Could not read row counts for {database_name}: {e}")
+        return {}
+
+
+# Shared by every sampling run (requests, jobs, scans) instead of one pool per call
+sample_executor = ThreadPoolExecutor(max_workers=SAMPLE_POOL_SIZE, thread_name_prefix="sample")
+
+
+def build_sample_query(schema: str, table: str, columns, row_count=None, rows: int = SAMPLE_ROWS_PER_TABLE,
+                       use_tablesample: bool = True) -> str:
+    """
+    TOP without ORDER BY stops after the first pages, so no full scan. Large
+    base tables additionally use TABLESAMPLE so samples are not all taken from
+    the first pages; base tables are read uncommitted so sampling never waits
+    on writers.
+    """
+    column_list = ", ".join(quote_identifier(c) for c in columns)
+    source = f"{quote_identifier(schema)}.{quote_identifier(table)}"
+    if row_count is not None:
+        if use_tablesample and row_count >= TABLESAMPLE_MIN_ROWS:
+            source += f" TABLESAMPLE SYSTEM ({TABLESAMPLE_ROWS} ROWS)"
+        source += " WITH (READUNCOMMITTED)"
+    return f"SELECT TOP ({int(rows)}) {column_list} FROM {source}"
+
+
+def build_column_sample_query(schema: str, table: str, column: str, row_count=None,
+                              rows: int = SAMPLE_VALUES_PER_COLUMN) -> str:
+    """Non-null values of one sparse column"""
+    source = f"{quote_identifier(schema)}.{quote_identifier(table)}"
+    if row_count is not None:
+        source += " WITH (READUNCOMMITTED)"
+    return f"SELECT TOP ({int(rows)}) {quote_identifier(column)} FROM {source} WHERE {quote_identifier(column)} IS NOT NULL"
+
+
+def _format_value(value) -> str:
+    text = str(value)
+    return text if len(text) <= SAMPLE_MAX_VALUE_LENGTH else text[:SAMPLE_MAX_VALUE_LENGTH] + "…"
+
+
+def sample_table(database_name: str, schema: str, table: str, columns, row_count=None,
+                 rows: int = SAMPLE_ROWS_PER_TABLE, per_column: int = SAMPLE_VALUES_PER_COLUMN,
+                 timeout: int = SAMPLE_TABLE_TIMEOUT) -> dict:
+    """Sample one table; returns column -> list of up to `per_column` non-null values"""
+    with get_connection(database_name) as conn, stage("sample_table"):
+        deadline = time.monotonic() + timeout
+        cursor = conn.cursor()
+
+        def fetch(query):
+            # Whole seconds (0 would mean no timeout): each query gets what is left of the table's budget
+            conn.timeout = max(1, math.ceil(deadline - time.monotonic()))
+            cursor.execute(query)
+            return cursor.fetchall()
+
+        try:
+            tablesampled = row_count is not None and row_count >= TABLESAMPLE_MIN_ROWS
+            fetched = fetch(build_sample_query(schema, table, columns, row_count, rows))
+            if not fetched and row_count and deadline - time.monotonic() >= SAMPLE_MIN_QUERY_SECONDS:
+                # TABLESAMPLE works on pages and can come back empty on small/sparse tables
+                fetched = fetch(build_sample_query(schema, table, columns, row_count, rows, use_tablesample=False))
+                tablesampled = False
+
+            samples = {column: [] for column in columns}
+            for position, column in enumerate(columns):
+                values = samples[column]
+                for row in fetched:
+                    value = row[position]
+                    if value is not None:
+                        values.append(_format_value(value))
+                        if len(values) >= per_column:
+                            break
+
+            # A short, untablesampled batch was the whole table: empty columns really are empty.
+            # Large tables are left as sampled: an all-NULL column would be a full scan.
+            large = tablesampled or (row_count is not None and row_count >= SAMPLE_FALLBACK_MAX_ROWS)
+            if len(fetched) >= rows and not large:
+                sparse = [column for column in columns if not samples[column]]
+                for position, column in enumerate(sparse[:SAMPLE_FALLBACK_MAX_COLUMNS]):
+                    if deadline - time.monotonic() < SAMPLE_MIN_QUERY_SECONDS:
+                        print(f"⚠️ Sampling budget of {database_name}.{schema}.{table} used up, "
+                              f"{min(len(sparse), SAMPLE_FALLBACK_MAX_COLUMNS) - position} sparse column(s) not sampled")
+                        break
+                    try:
+                        samples[column] = [_format_value(row[0]) for row in fetch(
+                            build_column_sample_query(schema, table, column, row_count, per_column))]
+                    except Exception as e:
+                        print(f"⚠️ Sparse column sample failed for {database_name}.{schema}.{table}.{column}: {e}")
+            cursor.close()
+        finally:
+            conn.timeout = 0  # pooled connection: restore "no timeout"
+    return samples
+
+
+def collect_samples(df_schema, database_name: str, max_workers: int = SAMPLE_MAX_WORKERS,
+                    rows: int = SAMPLE_ROWS_PER_TABLE, per_column: int = SAMPLE_VALUES_PER_COLUMN,
+                    timeout: int = SAMPLE_TABLE_TIMEOUT, progress=None, cancel_event=None,
+                    row_counts: dict = None) -> dict:
+    """
+    Sample every table in df_schema (table_schema/table_name/column_name/data_type).
+
+    Returns (schema, table) -> {column: [values]}; tables that failed or ran
+    out of time budget map to None. progress(done, total) is called after
+    each table; setting cancel_event stops the run with CancelledError.
+    At most max_workers tables are in flight on the shared pool. Pass
+    row_counts (see get_row_counts) when sampling a database in several parts.
+    """
+    sampleable = df_schema[~df_schema['data_type'].str.lower().isin(UNSAMPLEABLE_TYPES)]
+    tables = {
+        key: list(group['column_name'])
+        for key, group in sampleable.groupby(['table_schema', 'table_name'], sort=False)
+    }
+    if progress is not None:
+        progress(0, len(tables))
+    if not tables:
+        return {}
+
+    if row_counts is None:
+        row_counts = get_row_counts(database_name)
+
+    results = {}
+    start = time.time()
+    pending = iter(tables.items())
+    futures = {}
+
+    def submit_next():
+        for (schema, table), columns in pending:
+            future = sample_executor.submit(
+                contextvars.copy_context().run, sample_table, database_name, schema, table, columns,
+                row_counts.get((schema, table)), rows, per_column, timeout
+            )
+            futures[future] = (schema, table)
+            return
+
+    for _ in range(max(1, max_workers)):
+        submit_next()
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = futures.pop(future)
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(f"⚠️ Sampling failed for {database_name}.{key[0]}.{key[1]}: {e}")
+                results[key] = None
+            if progress is not None:
+                progress(len(results), len(tables))
+            if cancel_event is not None and cancel_event.is_set():
+                for running in futures:
+                    running.cancel()
+                raise CancelledError(f"Sampling of {database_name} cancelled")
+            submit_next()
+
+    failed = sum(1 for samples in results.values() if samples is None)
+    print(f"✔ Sampled {len(results) - failed}/{len(results)} tables in {database_name} [{time.time() - start:.2f}s]")
+    return results
+
+
+def sample_column_lists(df_schema, database_name: str, **options) -> list:
+    """Sampled values for every row of df_schema as lists (None if not sampleable)"""
+    samples = collect_samples(df_schema, database_name, **options)
+    values = []
+    for schema, table, column in zip(df_schema['table_schema'], df_schema['table_name'], df_schema['column_name']):
+        table_samples = samples.get((schema, table))
+        values.append(None if table_samples is None else table_samples.get(column))
+    return values
+
+
+def format_sample_values(sample_lists, per_column: int = SAMPLE_VALUES_PER_COLUMN) -> list:
+    """Comma-joined sample values for display ("N/A" if not sampleable)"""
+    return ["N/A" if values is None else ", ".join(values[:per_column]) for values in sample_lists]
+
+
+def sample_column_values(df_schema, database_name: str, **options) -> list:
+    """Comma-joined sample values for every row of df_schema ("N/A" if not sampleable)"""
+    return format_sample_values(sample_column_lists(df_schema, database_name, **options),
+                                options.get("per_column", SAMPLE_VALUES_PER_COLUMN))
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+# === Schema Metadata Cache ===
+# Cached INFORMATION_SCHEMA results per database, kept in memory (LRU) and
+# persisted to disk so restarts do not trigger a full catalog scan.
+SCHEMA_CACHE_DIR = os.getenv("SCHEMA_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".schema_cache"))
+SCHEMA_CACHE_MAX_ENTRIES = 64        # databases kept in memory and on disk
+SCHEMA_CACHE_TTL = 24 * 3600         # hard expiry, reload even if the version looks unchanged
+SCHEMA_CACHE_REVALIDATE_AFTER = 60   # trust a cached entry this long before re-checking its version
+
+# Cheap change detection: creating/altering/dropping tables, views or key
+# constraints bumps modify_date of the object or changes the object count.
+SCHEMA_VERSION_QUERY = """
+SELECT
+    CONVERT(varchar(33), MAX(modify_date), 126) AS last_modified,
+    COUNT_BIG(*) AS object_count
+FROM sys.objects
+WHERE type IN ('U', 'V', 'PK', 'UQ', 'F');
+"""
+
+
+def fetch_schema_version(conn) -> str:
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA_VERSION_QUERY)
+    last_modified, object_count = cursor.fetchone()
+    cursor.close()
+    return f"{last_modified}|{object_count}"
+
+
+class SchemaCache:
+    """
+    Per-database metadata cache with version-based invalidation, TTL and LRU eviction.
+
+    get() returns the cached frame while the stored schema version matches the
+    database's current one; the version check itself is skipped for
+    `revalidate_after` seconds after the last successful check.
+    """
+
+    def __init__(self, directory: str = SCHEMA_CACHE_DIR, max_entries: int = SCHEMA_CACHE_MAX_ENTRIES,
+                 ttl: float = SCHEMA_CACHE_TTL, revalidate_after: float = SCHEMA_CACHE_REVALIDATE_AFTER):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.revalidate_after = revalidate_after
+        self._entries = OrderedDict()  # database -> entry dict, most recently used last
+        self._lock = threading.Lock()
+        self._db_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, database: str, load, fetch_version):
+        """
+        Return cached metadata for `database`.
+
+        - **load**: callable returning (version, frame) from a full catalog scan
+        - **fetch_version**: callable returning the current schema version string
+        """
+        with self._database_lock(database):
+            now = time.time()
+            entry = self._lookup(database)
+
+            if entry is not None and now - entry["loaded_at"] < self.ttl:
+                if now - entry["checked_at"] < self.revalidate_after:
+                    self.hits += 1
+                    return entry["data"]
+                if fetch_version() == entry["version"]:
+                    entry["checked_at"] = now
+                    self.hits += 1
+                    return entry["data"]
+
+            self.misses += 1
+            version, data = load()
+            entry = {"version": version, "loaded_at": now, "checked_at": now, "data": data}
+            self._store(database, entry)
+            return data
+
+    def invalidate(self, database: str = None):
+        """Drop one database (or everything) from memory and disk"""
+        with self._lock:
+            if database is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(database, None)
+
+        if database is not None:
+            paths = [self._path(database)]
+        elif os.path.isdir(self.directory):
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".pkl")]
+        else:
+            paths = []
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "databases": list(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # ----- Internals -----
+    def _database_lock(self, database: str):
+        with self._lock:
+            return self._db_locks.setdefault(database, threading.Lock())
+
+    def _lookup(self, database: str):
+        with self._lock:
+            entry = self._entries.get(database)
+            if entry is not None:
+                self._entries.move_to_end(database)
+                return entry
+
+        entry = self._read_disk(database)
+        if entry is not None:
+            with self._lock:
+                self._entries[database] = entry
+                self._evict_memory_locked()
+        return entry
+
+    def _store(self, database: str, entry: dict):
+        with self._lock:
+            self._entries[database] = entry
+            self._entries.move_to_end(database)
+            self._evict_memory_locked()
+        self._write_disk(database, entry)
+
+    def _evict_memory_locked(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, database: str) -> str:
+        # Hash keeps arbitrary database names filesystem-safe
+        digest = hashlib.sha1(database.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.pkl")
+
+    def _read_disk(self, database: str):
+        path = self._path(database)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)  # mark as recently used for disk LRU
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable schema cache file {path}: {e}")
+            return None
+
+    def _write_disk(self, database: str, entry: dict):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(database)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict_disk()
+        except OSError as e:
+            print(f"⚠️ Could not persist schema cache for {database}: {e}")
+
+    def _evict_disk(self):
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(".pkl")
+        ]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+schema_cache = SchemaCache()
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from metrics import count_event
+from name_index import normalize_name, target_id
+
+# === Search Result Cache ===
+# Operators search the same subject again and again while reviewing a case.
+# Matches are cached per (case/accent folded name, target set) for a short
+# TTL with LRU eviction, and identical searches running at the same time
+# share one fan-out: the first caller computes, the others wait for its
+# result. Masking or deleting a record invalidates every cached search that
+# could have matched it (the search is a LIKE %name%, so any query contained
+# in the processed name). Invalidations bump a generation counter so a
+# fan-out that was already running when the record changed is not cached.
+# Other processes (uvicorn workers, the erasure CLI) learn about invalidations
+# through a shared generation file: whoever erases records replaces it, and
+# every cache that sees it change drops all its entries (a stat per lookup).
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "120"))       # seconds a result is reused
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))      # cached searches (LRU)
+SEARCH_CACHE_GENERATION_FILE = os.getenv(
+    "SEARCH_CACHE_GENERATION_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".search_cache_generation")
+)
+
+
+class SearchCache:
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_SIZE,
+                 generation_file: str = SEARCH_CACHE_GENERATION_FILE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation_file = generation_file  # None: invalidations stay in this process
+        self._entries = OrderedDict()   # (name, targets) -> (expires_at, matches)
+        self._in_flight = {}            # (name, targets) -> Future shared by coalesced callers
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._shared_seen = self._shared_generation()
+
+    def _shared_generation(self):
+        if self.generation_file is None:
+            return None
+        try:
+            stat = os.stat(self.generation_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _sync_shared(self, shared):
+        """Called with the lock held: drop everything when another process published an invalidation"""
+        if shared != self._shared_seen:
+            self._shared_seen = shared
+            self._generation += 1
+            self._entries.clear()
+
+    @staticmethod
+    def key(name: str, targets) -> tuple:
+        return normalize_name(name), tuple(sorted(target_id(entry) for entry in targets))
+
+    def get_or_compute(self, name: str, targets, compute):
+        """
+        Cached matches for a search, or compute() them once for all concurrent callers.
+
+        compute() returns (matches, cacheable); incomplete results (a target
+        failed) are shared with waiting callers but not cached. Returned
+        lists are shared, callers must not modify them.
+        """
+        key = self.key(name, targets)
+        shared = self._shared_generation()
+        now = time.monotonic()
+        with self._lock:
+            self._sync_shared(shared)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                count_event("search_cache_hit")
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                generation = self._generation
+
+        if not leader:
+            count_event("search_coalesced")
+            return future.result()
+
+        count_event("search_cache_miss")
+        try:
+            matches, cacheable = compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if cacheable and generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, matches)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(matches)
+        return matches
+
+    def invalidate_name(self, name: str) -> int:
+        """Drop cached searches that could have matched `name`; returns how many were dropped"""
+        return self.invalidate_names([name])
+
+    def invalidate_names(self, names) -> int:
+        """invalidate_name for many names in one pass over the cache"""
+        processed = {normalize_name(name) for name in names}
+        if not processed:
+            return 0
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key, (_, matches) in self._entries.items()
+                if any(key[0] in name for name in processed)
+                or any(normalize_name(match["name"]) in processed for match in matches)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def publish_invalidation(self):
+        """Make every other cache sharing the generation file drop its entries"""
+        if self.generation_file is None:
+            return
+        with self._lock:
+            self._sync_shared(self._shared_generation())  # apply invalidations published before ours
+            directory = os.path.dirname(self.generation_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.generation_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(uuid.uuid4().hex)
+            os.replace(tmp, self.generation_file)  # a new inode: seen even within one mtime tick
+            self._shared_seen = self._shared_generation()
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "in_flight": len(self._in_flight),
+                    "ttl_seconds": self.ttl, "max_entries": self.max_entries}
+
+
+search_cache = SearchCache()
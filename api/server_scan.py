@@ -0,0 +1,164 @@
+"""
+Server-wide GDPR scan: every accessible database on the server, in parallel.
+
+Databases are enumerated from sys.databases, then metadata extraction and
+analysis run for several databases at once. Concurrency is bounded twice:
+SCAN_MAX_DATABASES databases are analysed at the same time across all scans
+on this server, and each database samples at most SCAN_SAMPLE_WORKERS tables
+at once. Results are yielded as each database finishes, followed by a
+consolidated summary.
+
+    python server_scan.py -o scan.ndjson
+    python server_scan.py --databases ECC60jkl_HACK ORACLE_EBS_HACK --incremental
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fastapi.encoders import jsonable_encoder
+
+from gdpr_risk_analyzer import extract_schema_metadata, perform_gdpr_analysis
+from pdf_report import summarize_analysis
+from utils import get_connection
+
+# === Server Scan ===
+SCAN_MAX_DATABASES = 4            # databases analysed at once, shared by all scans
+SCAN_SAMPLE_WORKERS = 4           # concurrent sampling queries per database
+SCAN_EXCLUDED_DATABASES = {"master", "tempdb", "model", "msdb", "Results"}
+
+DATABASES_QUERY = """
+SELECT name
+FROM sys.databases
+WHERE database_id > 4
+  AND state_desc = 'ONLINE'
+  AND HAS_DBACCESS(name) = 1
+ORDER BY name;
+"""
+
+_server_slots = threading.BoundedSemaphore(SCAN_MAX_DATABASES)
+
+
+def list_databases() -> list:
+    """User databases this login can access"""
+    with get_connection("master") as conn:
+        cursor = conn.cursor()
+        cursor.execute(DATABASES_QUERY)
+        names = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    return [name for name in names if name not in SCAN_EXCLUDED_DATABASES]
+
+
+def scan_database(database_name: str, incremental: bool = False, refresh: bool = False):
+    """Analyse one database while holding a server slot; returns (analysis_df, diff or None, seconds)"""
+    with _server_slots:
+        start = time.time()
+        if incremental:
+            # Imported lazily: only needed (and only pays its import) for incremental scans
+            from incremental_analysis import incremental_gdpr_analysis
+            analysis_df, report = incremental_gdpr_analysis(
+                database_name, refresh=refresh, max_workers=SCAN_SAMPLE_WORKERS
+            )
+            diff = {key: len(entries) for key, entries in report["diff"].items()}
+        else:
+            schema_df = extract_schema_metadata(database_name, use_cache=not refresh)
+            analysis_df = perform_gdpr_analysis(schema_df, database_name, max_workers=SCAN_SAMPLE_WORKERS)
+            diff = None
+        return analysis_df, diff, time.time() - start
+
+
+def iter_server_scan(databases=None, incremental: bool = False, refresh: bool = False,
+                     include_rows: bool = False):
+    """
+    Yield one {"type": "database"} event per database as it finishes, then
+    one {"type": "summary"} event with totals across the server.
+
+    include_rows adds the analysis rows to each database event.
+    """
+    start = time.time()
+    if databases is None:
+        databases = list_databases()
+    yield {"type": "start", "databases": databases}
+
+    totals = {"High": 0, "Medium": 0, "Low": 0}
+    per_database = []
+    failed = []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(SCAN_MAX_DATABASES, len(databases))),
+                                  thread_name_prefix="scan")
+    try:
+        futures = {
+            executor.submit(scan_database, database, incremental, refresh): database
+            for database in databases
+        }
+        for future in as_completed(futures):
+            database = futures[future]
+            event = {"type": "database", "database": database}
+            try:
+                analysis_df, diff, seconds = future.result()
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e)
+                print(f"⚠️ Scan of {database} failed: {detail}")
+                failed.append({"database": database, "error": str(detail)})
+                yield {**event, "status": "error", "error": str(detail)}
+                continue
+
+            summary = summarize_analysis(analysis_df) if len(analysis_df) else {
+                "columns": 0, "tables": 0, "risk_levels": {"High": 0, "Medium": 0, "Low": 0},
+                "categories": {}, "top_tables": {},
+            }
+            for level, count in summary["risk_levels"].items():
+                totals[level] += count
+            pii_columns = int(analysis_df['pii_detected'].notna().sum()) if 'pii_detected' in analysis_df else 0
+            per_database.append({
+                "database": database,
+                "columns": summary["columns"],
+                "high": summary["risk_levels"]["High"],
+                "medium": summary["risk_levels"]["Medium"],
+                "pii_columns": pii_columns,
+            })
+            event.update(status="ok", elapsed_ms=round(seconds * 1000), summary=summary, pii_columns=pii_columns)
+            if diff is not None:
+                event["diff"] = diff
+            if include_rows:
+                event["rows"] = analysis_df.to_dict(orient="records")
+            yield jsonable_encoder(event)
+    finally:
+        # Also runs when the client goes away mid-stream
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    per_database.sort(key=lambda entry: (entry["high"], entry["medium"]), reverse=True)
+    yield {
+        "type": "summary",
+        "databases_scanned": len(per_database),
+        "databases_failed": failed,
+        "columns": sum(entry["columns"] for entry in per_database),
+        "risk_levels": totals,
+        "databases": per_database,
+        "elapsed_ms": round((time.time() - start) * 1000),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--databases", nargs="+", help="scan only these databases (default: all accessible)")
+    parser.add_argument("--incremental", action="store_true", help="re-analyse only changed tables")
+    parser.add_argument("--refresh", action="store_true", help="bypass the schema metadata cache")
+    parser.add_argument("--rows", action="store_true", help="include analysis rows in the output")
+    parser.add_argument("-o", "--output", help="write NDJSON events here (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for scan_event in iter_server_scan(args.databases, args.incremental, args.refresh, args.rows):
+            line = json.dumps(scan_event, default=str)
+            if out:
+                out.write(line + "\n")
+                out.flush()
+                if scan_event["type"] == "database":
+                    print(f"✔ {scan_event['database']}: {scan_event['status']}")
+            else:
+                print(line)
+    finally:
+        if out:
+            out.close()
@@ -1,138 +1,219 @@
-from smolagents import tool, CodeAgent, LiteLLMModel
-import pyodbc
-import os
-import time
-import multiprocessing
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dotenv import load_dotenv  # <-- NEW
-from pydantic_stuff import DataRecordSearch
-
-load_dotenv()  # Load environment variables from .env file
-
-
-SERVER = 'sql-lakeside-server.database.windows.net'
-USERNAME = 'hackathon_beta'
-PASSWORD = 'Rn4&qT7!zM3s'
-
-# Fixed list of known searchable columns
-SEARCH_TARGETS = [
-    {"database": "ORACLE_EBS_HACK", "schema": "dbo", "table": "AR_HZ_PARTIES", "column": "PARTY_NAME"},
-    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "KNA1", "column": "NAME1"},
-    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "ADRC", "column": "NAME1"},
-    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "ADRC", "column": "MC_NAME1"},
-    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "ADRP", "column": "NAME_TEXT"},
-
-]
-
-def get_db_connection(database_name):
-    return pyodbc.connect(
-        f"DRIVER={{ODBC Driver 18 for SQL Server}};"
-        f"SERVER={SERVER};"
-        f"DATABASE={database_name};"
-        f"UID={USERNAME};"
-        f"PWD={PASSWORD}"
-    )
-
-# ---------- TOOL: Query matches only in predefined target columns ----------
-@tool
-def query_name_matches(name: str) -> list:
-    """
-    Search for a name in predefined database.table.column targets using fast collation search.
-
-    Args:
-        name (str): Name to search for.
-
-    Returns:
-        list: Matching names with metadata (but no extra row data).
-    """
-    results = []
-
-    def query_single(entry):
-        db, schema, table, column = entry["database"], entry["schema"], entry["table"], entry["column"]
-        try:
-            conn = get_db_connection(db)
-            cursor = conn.cursor()
-
-            query = f"""
-            SELECT [{column}]
-            FROM [{schema}].[{table}]
-            WHERE [{column}] COLLATE Latin1_General_CI_AI LIKE ?
-            """
-            start_time = time.time()
-            cursor.execute(query, (f"%{name}%",))
-            rows = cursor.fetchall()
-            elapsed = time.time() - start_time
-            conn.close()
-
-            if rows:
-                print(f"✔ Found {len(rows)} match(es) in {db}.{schema}.{table}.{column} [{elapsed:.2f}s]")
-
-            return [
-                {
-                    "database": db,
-                    "schema": schema,
-                    "table": table,
-                    "column": column,
-                    "name": row[0]  # Extract only the name from the result
-                }
-                for row in rows
-            ]
-
-        except Exception as e:
-            print(f"⚠️ Error querying {db}.{schema}.{table}.{column}: {e}")
-            return []
-
-    max_threads = min(32, (multiprocessing.cpu_count() or 1) * 2)
-    print(f"🚀 Using {max_threads} threads for querying...")
-    with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        futures = [executor.submit(query_single, entry) for entry in SEARCH_TARGETS]
-
-        for future in as_completed(futures):
-            results.extend(future.result())
-
-    print(f"✅ Total matches found: {len(results)}")
-    return results
-
-
-# ---------- FORMAT RESULTS AS DataRecordSearch ----------
-def format_results_as_datarecordsearch(results, name_input):
-    formatted_outputs = []
-
-    for result in results:
-        db = result.get("database", "UnknownDB")
-        schema = result.get("schema", "UnknownSchema")
-        table = result.get("table", "UnknownTable")
-        column = result.get("column", "UnknownColumn")
-        matched_name = result.get("name", "Name Not Found")
-
-        source = f"{db}.{schema}.{table}"
-        key = f"{db}_{table}_{column}"
-        
-        formatted_outputs.append(
-            DataRecordSearch(
-                source=source,
-                name=matched_name,
-                key=key,
-                probability=100
-            )
-        )
-
-    return formatted_outputs
-
-
-
-
-def run_agent_for_names(name):
-    model = LiteLLMModel(model_id="gpt-4")
-    agent = CodeAgent(
-        tools=[query_name_matches],
-        model=model,
-        max_steps=3
-    )
-    print(f"🔍 Searching for name: {name}")
-    prompt = f"Find all rows in the known relevant tables where a column like name matches '{name}'"
-    raw_result = agent.run(prompt)
-
-    print("\n🟩 Formatted Final Results:")
-    formatted_records = format_results_as_datarecordsearch(raw_result, name)
+import contextvars
+import os
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pydantic_stuff import DataRecordSearch
+from utils import get_connection
+from metrics import stage, target_query_seconds
+from name_index import get_name_index, format_row_key, name_similarity, target_id
+from search_cache import search_cache
+
+
+# Fixed list of known searchable columns ("key" = columns identifying the row)
+SEARCH_TARGETS = [
+    {"database": "ORACLE_EBS_HACK", "schema": "dbo", "table": "AR_HZ_PARTIES", "column": "PARTY_NAME", "key": ["PARTY_ID"]},
+    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "KNA1", "column": "NAME1", "key": ["MANDT", "KUNNR"]},
+    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "ADRC", "column": "NAME1", "key": ["CLIENT", "ADDRNUMBER", "DATE_FROM", "NATION"]},
+    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "ADRC", "column": "MC_NAME1", "key": ["CLIENT", "ADDRNUMBER", "DATE_FROM", "NATION"]},
+    {"database": "ECC60jkl_HACK", "schema": "dbo", "table": "ADRP", "column": "NAME_TEXT", "key": ["CLIENT", "PERSNUMBER", "DATE_FROM", "NATION"]},
+
+]
+
+# Shared fan-out pool: avoids spinning up threads on every search
+max_threads = min(32, (multiprocessing.cpu_count() or 1) * 2)
+search_executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="search")
+
+def get_db_connection(database_name):
+    """Pooled connection for a search target database (use as a context manager)"""
+    return get_connection(database_name)
+
+def run_target_query(entry, name):
+    """LIKE search on a single target; raises on database errors"""
+    db, schema, table, column = entry["database"], entry["schema"], entry["table"], entry["column"]
+    key_columns = entry.get("key", [])
+    with get_db_connection(db) as conn:
+        cursor = conn.cursor()
+
+        selected = ", ".join(f"[{c}]" for c in key_columns + [column])
+        query = f"""
+        SELECT {selected}
+        FROM [{schema}].[{table}]
+        WHERE [{column}] COLLATE Latin1_General_CI_AI LIKE ?
+        """
+        start_time = time.time()
+        with stage("search_query"):
+            cursor.execute(query, (f"%{name}%",))
+            rows = cursor.fetchall()
+        elapsed = time.time() - start_time
+        target_query_seconds.observe(elapsed, target=target_id(entry))
+
+    if rows:
+        print(f"✔ Found {len(rows)} match(es) in {db}.{schema}.{table}.{column} [{elapsed:.2f}s]")
+
+    return [
+        {
+            "database": db,
+            "schema": schema,
+            "table": table,
+            "column": column,
+            "name": row[len(key_columns)],
+            "key": format_row_key(row[:len(key_columns)])
+        }
+        for row in rows
+    ]
+
+def query_target_sql(entry, name):
+    """LIKE search on a single target; used when the local name index is stale"""
+    try:
+        return run_target_query(entry, name)
+    except Exception as e:
+        print(f"⚠️ Error querying {target_id(entry)}: {e}")
+        return []
+
+def iter_target_matches(name, targets=SEARCH_TARGETS):
+    """
+    Yield one event per target as soon as its matches are available.
+
+    Targets with a fresh index segment come first (answered locally), then
+    stale targets in the order their SQL queries finish. Each event is a dict
+    with target, via ("index"/"sql"), status ("ok"/"error"), matches,
+    elapsed (seconds since the search started) and error.
+    """
+    if not name.strip():
+        return
+
+    start_time = time.time()
+    index = get_name_index()
+    stale_targets = []
+    for entry in targets:
+        matches, stale = index.search(name, [entry])
+        if stale:
+            stale_targets.append(entry)
+            continue
+        yield {"target": entry, "via": "index", "status": "ok", "matches": matches,
+               "elapsed": time.time() - start_time, "error": None}
+
+    if stale_targets:
+        print(f"🚀 Querying {len(stale_targets)} stale target(s) in SQL...")
+    # copy_context: worker stages show up in the caller's request profile
+    futures = {
+        search_executor.submit(contextvars.copy_context().run, run_target_query, entry, name): entry
+        for entry in stale_targets
+    }
+    for future in as_completed(futures):
+        entry = futures[future]
+        try:
+            yield {"target": entry, "via": "sql", "status": "ok", "matches": future.result(),
+                   "elapsed": time.time() - start_time, "error": None}
+        except Exception as e:
+            print(f"⚠️ Error querying {target_id(entry)}: {e}")
+            yield {"target": entry, "via": "sql", "status": "error", "matches": [],
+                   "elapsed": time.time() - start_time, "error": str(e)}
+
+def find_name_matches(name, targets=SEARCH_TARGETS):
+    """
+    Search targets via the local trigram index; only targets whose index
+    segment is missing or stale are searched with SQL.
+    """
+    results, _ = collect_target_matches(name, targets)
+    return results
+
+def collect_target_matches(name, targets=SEARCH_TARGETS):
+    """All matches over the targets; returns (matches, complete) where complete is False if a target failed"""
+    results = []
+    complete = True
+    for event in iter_target_matches(name, targets):
+        results.extend(event["matches"])
+        complete = complete and event["status"] == "ok"
+
+    print(f"✅ Total matches found: {len(results)}")
+    return results, complete
+
+def cached_name_matches(name, targets=SEARCH_TARGETS):
+    """find_name_matches through the search result cache (identical concurrent searches share one fan-out)"""
+    if not name.strip():
+        return []
+    return search_cache.get_or_compute(name, targets, lambda: collect_target_matches(name, targets))
+
+# ---------- TOOL: Query matches only in predefined target columns ----------
+# Wrapped as a smolagents tool on first use, see get_agent_tools()
+def query_name_matches(name: str) -> list:
+    """
+    Search for a name in predefined database.table.column targets using fast collation search.
+
+    Args:
+        name (str): Name to search for.
+
+    Returns:
+        list: Matching names with metadata (but no extra row data).
+    """
+    return find_name_matches(name)
+
+
+# ---------- FORMAT RESULTS AS DataRecordSearch ----------
+def format_results_as_datarecordsearch(results, name_input):
+    formatted_outputs = []
+
+    for result in results:
+        db = result.get("database", "UnknownDB")
+        schema = result.get("schema", "UnknownSchema")
+        table = result.get("table", "UnknownTable")
+        column = result.get("column", "UnknownColumn")
+        matched_name = result.get("name", "Name Not Found")
+
+        source = f"{db}.{schema}.{table}.{column}"
+        # Row key from the source table; agent output may not carry one
+        key = result.get("key") or f"{db}_{table}_{column}"
+        
+        formatted_outputs.append(
+            DataRecordSearch(
+                source=source,
+                name=matched_name,
+                key=key,
+                probability=name_similarity(name_input, matched_name)
+            )
+        )
+
+    formatted_outputs.sort(key=lambda record: record.probability, reverse=True)
+    return formatted_outputs
+
+
+def search_names_direct(name):
+    """Deterministic search: index/SQL fan-out over SEARCH_TARGETS, no LLM round-trip"""
+    print(f"🔍 Searching for name: {name}")
+    return format_results_as_datarecordsearch(cached_name_matches(name), name)
+
+
+_agent_tools = None
+
+def get_agent_tools():
+    """
+    The agent stack (smolagents, LiteLLM, .env credentials) is slow to import
+    and only needed in agent mode, so it is loaded on the first agent search.
+    """
+    global _agent_tools
+    if _agent_tools is None:
+        from dotenv import load_dotenv
+        from smolagents import tool
+        load_dotenv()  # Load environment variables from .env file
+        _agent_tools = [tool(query_name_matches)]
+    return _agent_tools
+
+def run_agent_for_names(name):
+    from smolagents import CodeAgent, LiteLLMModel
+
+    tools = get_agent_tools()
+    model = LiteLLMModel(model_id="gpt-4")
+    agent = CodeAgent(
+        tools=tools,
+        model=model,
+        max_steps=3
+    )
+    print(f"🔍 Searching for name: {name}")
+    prompt = f"Find all rows in the known relevant tables where a column like name matches '{name}'"
+    raw_result = agent.run(prompt)
+
+    print("\n🟩 Formatted Final Results:")
+    formatted_records = format_results_as_datarecordsearch(raw_result, name)
     return formatted_records
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules in api/ import each other as top-level modules (like the benchmarks do)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import analysis_jobs
+from analysis_jobs import AnalysisJobManager, AnalysisJobStore
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def analyse(schema_df, database_name, progress=None, cancel_event=None):
+        progress(0, 2)
+        release.wait(5)
+        progress(2, 2)
+        return pd.DataFrame({"column_name": ["NAME1", "KUNNR"], "risk_level": ["Medium", "Low"]})
+
+    monkeypatch.setattr(analysis_jobs, "extract_schema_metadata", lambda database_name, use_cache=True: None)
+    monkeypatch.setattr(analysis_jobs, "perform_gdpr_analysis", analyse)
+    manager = AnalysisJobManager(AnalysisJobStore(str(tmp_path / "jobs.sqlite")), max_workers=1, max_active=2)
+    manager.release = release
+    yield manager
+    release.set()
+    manager.shutdown()
+
+
+def wait_for(manager, job_id, *statuses):
+    for _ in range(200):
+        job = manager.status(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+
+def test_job_runs_and_pages_results(manager):
+    job_id = manager.submit("ECC")["job_id"]
+    wait_for(manager, job_id, "running")
+    manager.release.set()
+    assert wait_for(manager, job_id, "done")["result_rows"] == 2
+    page = manager.results(job_id, offset=1, limit=10)
+    assert page["data"] == [{"column_name": "KUNNR", "risk_level": "Low"}]
+    assert page["next_offset"] is None
+
+
+def test_active_job_limit(manager):
+    manager.submit("A")
+    manager.submit("B")
+    with pytest.raises(analysis_jobs.JobLimitReached):
+        manager.submit("C")
+
+
+def test_cancel_queued_job_never_runs(manager):
+    running = manager.submit("A")["job_id"]
+    queued = manager.submit("B")["job_id"]
+    assert manager.cancel_or_delete(queued)["status"] == "cancelled"
+    manager.release.set()
+    wait_for(manager, running, "done")
+    time.sleep(0.05)
+    assert manager.status(queued)["status"] == "cancelled"
+    assert manager.status(queued)["started_at"] is None
+
+
+def test_cancel_running_job(manager):
+    job_id = manager.submit("A")["job_id"]
+    wait_for(manager, job_id, "running")
+    assert manager.cancel_or_delete(job_id)["status"] == "cancelling"
+    manager.release.set()
+    # The fake analysis ignores the event; the job must still leave the active statuses
+    assert wait_for(manager, job_id, "done", "cancelled")["status"] in ("done", "cancelled")
+    assert manager.store.count_active() == 0
+
+
+def test_job_finishing_during_cancel_is_deleted(manager, monkeypatch):
+    job_id = manager.submit("A")["job_id"]
+    wait_for(manager, job_id, "running")
+    stale = manager.store.get(job_id)
+    manager.release.set()
+    wait_for(manager, job_id, "done")
+    reads = iter([stale])
+    real_get = manager.store.get
+    monkeypatch.setattr(manager.store, "get", lambda jid: next(reads, None) or real_get(jid))
+    assert manager.cancel_or_delete(job_id) == {"job_id": job_id, "status": "deleted"}
+    assert manager.store.count_active() == 0
+
+
+def test_active_jobs_are_never_deleted(tmp_path):
+    store = AnalysisJobStore(str(tmp_path / "jobs.sqlite"))
+    store.insert({"job_id": "j1", "database_name": "A", "refresh": False, "status": "running", "created_at": 0})
+    assert not store.delete("j1")
+    assert not store.transition("j1", ("queued",), status="cancelled")
+    assert store.transition("j1", ("running",), status="done")
+    assert store.delete("j1")
+    with pytest.raises(KeyError):
+        store.get("j1")
+
+
+def test_other_processes_jobs_are_not_interrupted(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    first = AnalysisJobStore(path, owner="worker-1")
+    first.insert({"job_id": "j1", "database_name": "A", "refresh": False, "status": "running",
+                  "created_at": time.time()})
+    AnalysisJobStore(path, owner="worker-2")  # e.g. a second uvicorn worker starting up
+    assert first.get("j1")["status"] == "running"
+
+
+def test_jobs_without_heartbeat_are_interrupted(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    gone = AnalysisJobStore(path, owner="worker-1")
+    gone.insert({"job_id": "j1", "database_name": "A", "refresh": False, "status": "running",
+                 "created_at": time.time() - analysis_jobs.ANALYSIS_HEARTBEAT_TIMEOUT - 1})
+    alive = AnalysisJobStore(path, owner="worker-2")
+    assert alive.get("j1")["status"] == "interrupted"
+    assert alive.interrupt_stale() == 0
+
+
+def test_heartbeat_keeps_jobs_alive(tmp_path):
+    store = AnalysisJobStore(str(tmp_path / "jobs.sqlite"), owner="worker-1")
+    store.insert({"job_id": "j1", "database_name": "A", "refresh": False, "status": "queued", "created_at": 0})
+    assert store.heartbeat() == {"j1": "queued"}
+    assert store.get("j1")["heartbeat_at"] > 0
+    assert AnalysisJobStore(store.path, owner="worker-2").get("j1")["status"] == "queued"
+
+
+def test_cancel_through_another_process(manager):
+    job_id = manager.submit("A")["job_id"]
+    wait_for(manager, job_id, "running")
+    other = AnalysisJobManager(AnalysisJobStore(manager.store.path, owner="worker-2"), max_workers=1)
+    try:
+        assert other.cancel_or_delete(job_id)["status"] == "cancelling"
+    finally:
+        other.shutdown()
+    manager.heartbeat()  # the owner notices the cancellation on its next round
+    manager.release.set()
+    assert wait_for(manager, job_id, "cancelled", "done")["status"] == "cancelled"
@@ -0,0 +1,24 @@
+import pandas as pd
+
+import analysis_results
+
+
+def test_chunks_share_one_row_count_query(monkeypatch):
+    queried, passed = [], []
+    monkeypatch.setattr(analysis_results, "get_row_counts", lambda db: queried.append(db) or {("dbo", "T0"): 5})
+
+    def analyse(df_schema, database_name, row_counts=None):
+        passed.append(row_counts)
+        return df_schema
+    monkeypatch.setattr(analysis_results, "perform_gdpr_analysis", analyse)
+
+    df_schema = pd.DataFrame({
+        "TABLE_SCHEMA": ["dbo"] * 5,
+        "TABLE_NAME": ["T0", "T0", "T1", "T2", "T3"],
+        "COLUMN_NAME": ["A", "B", "A", "A", "A"],
+    })
+    chunks = list(analysis_results.iter_analysis_chunks(df_schema, "DB", tables_per_chunk=2))
+
+    assert [chunk["TABLE_NAME"].tolist() for chunk in chunks] == [["T0", "T0", "T1"], ["T2", "T3"]]
+    assert queried == ["DB"]
+    assert passed == [{("dbo", "T0"): 5}] * 2
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+
+import pytest
+
+import bulk_search
+
+TARGET = {"database": "ECC", "schema": "dbo", "table": "KNA1", "column": "NAME1", "key": ["MANDT", "KUNNR"]}
+
+
+class Cursor:
+    """Fails the LIKE join; optionally the temp table cleanup too"""
+    def __init__(self, fail_cleanup):
+        self.fail_cleanup = fail_cleanup
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        if "INTO #search_hits" in sql:
+            raise RuntimeError("query timeout")
+        if "DROP TABLE" in sql and self.fail_cleanup and len(self.statements) > 3:
+            raise RuntimeError("connection broken")
+
+    def executemany(self, sql, rows):
+        self.statements.append(sql)
+
+
+@pytest.mark.parametrize("fail_cleanup", [False, True])
+def test_query_error_is_not_masked_by_the_cleanup(monkeypatch, fail_cleanup):
+    cursor = Cursor(fail_cleanup)
+
+    @contextmanager
+    def connection(database):
+        yield type("Conn", (), {"cursor": lambda self: cursor, "commit": lambda self: None})()
+
+    monkeypatch.setattr(bulk_search, "get_db_connection", connection)
+    with pytest.raises(RuntimeError, match="query timeout"):
+        bulk_search.bulk_query_target_sql(TARGET, ["Max Müller"])
+
+
+def test_names_are_queried_in_bounded_batches(monkeypatch):
+    batches = []
+
+    def query(entry, names):
+        batches.append(list(names))
+        return {i: [{"database": "ECC", "schema": "dbo", "table": "KNA1", "column": "NAME1",
+                     "name": name, "key": str(i)}] for i, name in enumerate(names)}
+
+    class Index:
+        def reload(self):
+            pass
+
+        def is_fresh(self, target):
+            return False
+
+    monkeypatch.setattr(bulk_search, "BULK_SEARCH_MAX_NAMES", 2)
+    monkeypatch.setattr(bulk_search, "bulk_query_target_sql", query)
+    monkeypatch.setattr(bulk_search, "get_name_index", Index)
+    results, errors = bulk_search.search_names_bulk(["A B", "C D", "E F"], targets=[TARGET])
+    assert sorted(map(len, batches)) == [1, 2]
+    assert [[record.name for record in result["records"]] for result in results] == [["A B"], ["C D"], ["E F"]]
+    assert errors == []
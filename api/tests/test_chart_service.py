@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+import chart_service
+from chart_service import ChartService, etag_matches
+
+
+def test_etag_matches_lists_and_weak_tags():
+    etag = '"abc-png-300"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"old-png-300", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"old-png-300"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_series_cache_is_bounded_and_drops_expired_entries(monkeypatch):
+    now = [1000.0]
+    fetched = []
+
+    def fetch(database_name, *params):
+        fetched.append(params)
+        return pd.DataFrame({"OlderRows": [1], "TotalRows": [2]})
+
+    monkeypatch.setattr(chart_service, "fetch_record_aging", fetch)
+    monkeypatch.setattr(chart_service, "time", SimpleNamespace(time=lambda: now[0]))
+    service = ChartService(data_ttl=60, series_cache_size=2)
+    for table in ("A", "B", "C"):
+        service.get_series("ECC", (table,))
+    assert [key[1] for key in service._series] == [("B",), ("C",)]
+    service.get_series("ECC", ("C",))
+    assert len(fetched) == 3
+
+    now[0] += 60
+    service.get_series("ECC", ("D",))
+    assert [key[1] for key in service._series] == [("D",)]
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from db_pool import ConnectionPool, PoolRegistry, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        raise RuntimeError("no server")
+
+
+def test_reuses_released_connection():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert conn.rollbacks == 1
+    assert pool.stats()["created"] == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1)
+    pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+    assert pool.stats()["checkout_timeouts"] == 1
+
+
+def test_waiter_gets_connection_on_release():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=1)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+    assert pool.acquire(timeout=2) is conn
+
+
+def test_registry_warms_new_pools_to_min_size():
+    registry = PoolRegistry(lambda database: FakeConnection(), min_size=2, max_size=4)
+    stats = registry.get("db").stats()
+    assert (stats["idle"], stats["created"]) == (2, 2)
+
+
+def test_maintain_evicts_idle_and_refills_min_size():
+    registry = PoolRegistry(lambda database: FakeConnection(), min_size=1, max_size=4, idle_timeout=0)
+    pool = registry.get("db")
+    connections = [pool.acquire() for _ in range(3)]
+    for conn in connections:
+        pool.release(conn)
+    registry.maintain()
+    stats = pool.stats()
+    assert stats["idle"] == 1
+    assert stats["evicted_idle"] == 2
+
+
+def test_failed_warm_does_not_break_checkout():
+    attempts = []
+
+    def connect(database):
+        attempts.append(database)
+        if len(attempts) == 1:
+            raise ConnectionError("server starting")
+        return FakeConnection()
+
+    registry = PoolRegistry(connect, min_size=1, max_size=2)
+    pool = registry.get("db")
+    assert isinstance(pool.acquire(), FakeConnection)
@@ -0,0 +1,83 @@
+from pydantic_stuff import DataRecordSearch
+
+from entity_resolution import blocking_keys, name_score, resolve_entities, soundex, token_bigrams, token_key
+
+KNA1 = "ECC60jkl_HACK.dbo.KNA1.NAME1"
+MC_NAME1 = "ECC60jkl_HACK.dbo.ADRC.MC_NAME1"
+PARTIES = "ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES.PARTY_NAME"
+
+
+def hit(name, key, source=KNA1, probability=90.0):
+    return DataRecordSearch(source=source, name=name, key=key, probability=probability)
+
+
+def score(left, right):
+    return name_score(token_bigrams(token_key(left)), token_bigrams(token_key(right)))
+
+
+def test_soundex():
+    assert soundex("robert") == soundex("rupert") == "R163"
+    assert soundex("ashcraft") == "A261"   # h does not separate s and c
+    assert soundex("lee") == "L000"
+    assert soundex("1234") == "1234"
+
+
+def test_token_key_is_order_case_and_accent_insensitive():
+    assert token_key("Müller, Max") == token_key("MAX MULLER") == "max muller"
+
+
+def test_blocking_keys_share_soundex_pair_across_spellings():
+    shared = blocking_keys(token_key("Max Müller")) & blocking_keys(token_key("MUELLER MAX"))
+    assert shared == {"s:M200|M460", "t:max"}
+
+
+def test_name_score():
+    assert score("Max Müller", "MÜLLER, Max") == 1.0
+    assert score("Max Müller", "Max Mülller") >= 0.85
+    assert score("Marie Falkendorf", "Marie Louis Falkendorf") < 0.85
+    assert score("Max Müller", "") == 0.0
+
+
+def test_source_spellings_and_typos_form_one_cluster():
+    clusters = resolve_entities([
+        hit("Max Müller", "1"),
+        hit("MUELLER MAX", "2", MC_NAME1, 80.0),
+        hit("Müller, Max", "3", PARTIES, 95.0),
+        hit("Max Mülller", "4"),
+        hit("Anna Schmidt", "5", probability=70.0),
+    ])
+    assert [len(cluster["records"]) for cluster in clusters] == [4, 1]
+    person = clusters[0]
+    assert person["probability"] == 95.0
+    assert person["sources"] == sorted({KNA1, MC_NAME1, PARTIES})
+    assert 0.85 <= person["confidence"] < 1.0
+    assert clusters[1]["confidence"] == 1.0
+
+
+def test_most_frequent_spelling_names_the_cluster():
+    clusters = resolve_entities([hit("Max Mülller", "1", probability=99.0), hit("Max Müller", "2"),
+                                 hit("Max Müller", "3")])
+    assert clusters[0]["name"] == "Max Müller"
+
+
+def test_chains_of_small_differences_stop_at_the_representative():
+    # Lena ~ Elena and Elena ~ Elena Chiara, but Lena is not Elena Chiara
+    clusters = resolve_entities(
+        [hit("Lena Ricci", str(n)) for n in range(3)] +
+        [hit("Elena Ricci", "e")] +
+        [hit("Elena Chiara Ricci", "c")],
+        threshold=0.8,
+    )
+    grouped = sorted(sorted({record.name for record in cluster["records"]}) for cluster in clusters)
+    assert grouped == [["Elena Chiara Ricci"], ["Elena Ricci", "Lena Ricci"]]
+
+
+def test_entity_id_depends_on_rows_not_order():
+    records = [hit("Max Müller", "1"), hit("MUELLER MAX", "2", MC_NAME1)]
+    first = resolve_entities(records)[0]["entity_id"]
+    assert resolve_entities(records[::-1])[0]["entity_id"] == first
+    assert resolve_entities(records + [hit("Max Müller", "3")])[0]["entity_id"] != first
+
+
+def test_no_records():
+    assert resolve_entities([]) == []
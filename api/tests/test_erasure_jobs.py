@@ -0,0 +1,82 @@
+import pytest
+
+import erasure_jobs
+from name_index import format_row_key
+
+KNA1 = "ECC60jkl_HACK.dbo.KNA1.NAME1"
+PARTIES = "ORACLE_EBS_HACK.dbo.AR_HZ_PARTIES.PARTY_NAME"
+
+
+@pytest.fixture(autouse=True)
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(erasure_jobs, "ERASURE_JOB_DIR", str(tmp_path))
+
+
+def test_jobs_group_sorted_keys_per_target(monkeypatch):
+    monkeypatch.setattr(erasure_jobs, "ERASURE_CHUNK_SIZE", 2)
+    job = erasure_jobs.create_job("mask", [
+        {"source": KNA1, "key": "100|3", "name": "Max Müller"},
+        {"source": KNA1, "key": "100|1", "name": "Max Müller"},
+        {"source": KNA1, "key": "100|2", "name": "MUELLER MAX"},
+        {"source": KNA1, "key": "100|1", "name": "Max Müller"},
+        {"source": PARTIES, "key": "7", "name": "Müller, Max"},
+    ])
+    kna1, parties = job["targets"]
+    assert kna1["keys"] == [["100", "1", "Max Müller"], ["100", "2", "MUELLER MAX"], ["100", "3", "Max Müller"]]
+    assert (kna1["total_keys"], kna1["chunks_total"]) == (3, 2)
+    assert parties["keys"] == [["7", "Müller, Max"]]
+    assert erasure_jobs.load_job(job["job_id"])["targets"][0]["keys"] == kna1["keys"]
+
+
+def test_key_values_containing_the_separator():
+    key = format_row_key(["100", "K|1"])
+    job = erasure_jobs.create_job("delete", [{"source": KNA1, "key": key, "name": "Max"}])
+    assert job["targets"][0]["keys"] == [["100", "K|1", "Max"]]
+
+
+def test_rejects_unknown_targets_and_key_shapes():
+    with pytest.raises(ValueError, match="Not a configured search target"):
+        erasure_jobs.create_job("delete", [{"source": "db.dbo.T.C", "key": "1", "name": "x"}])
+    with pytest.raises(ValueError, match="does not match"):
+        erasure_jobs.create_job("delete", [{"source": KNA1, "key": "100", "name": "x"}])
+    with pytest.raises(ValueError, match="Unknown action"):
+        erasure_jobs.create_job("shred", [])
+
+
+def test_mask_statement_only_touches_unchanged_values():
+    entry = erasure_jobs._targets_by_id[KNA1]
+    statement = erasure_jobs.build_chunk_statement(entry, "mask")
+    assert "t.[MANDT] = k.k0 AND t.[KUNNR] = k.k1" in statement
+    assert "t.[NAME1] = k.original_value" in statement
+    assert erasure_jobs.build_chunk_statement(entry, "delete").startswith("DELETE t FROM [dbo].[KNA1]")
+
+
+def test_keys_table_uses_the_column_collations():
+    entry = erasure_jobs._targets_by_id[KNA1]
+    ddl = erasure_jobs.build_keys_table(entry, {"KUNNR": "Latin1_General_BIN2", "NAME1": "Latin1_General_BIN2"})
+    assert "k0 nvarchar(450) COLLATE DATABASE_DEFAULT NOT NULL" in ddl
+    assert "k1 nvarchar(450) COLLATE Latin1_General_BIN2 NOT NULL" in ddl
+    assert "original_value nvarchar(4000) COLLATE Latin1_General_BIN2 NULL" in ddl
+    assert "mask_value nvarchar(4000) COLLATE Latin1_General_BIN2 NULL" in ddl
+
+
+def test_finished_target_invalidates_cached_searches(tmp_path, monkeypatch):
+    entry = erasure_jobs._targets_by_id[KNA1]
+    dropped, recorded = [], []
+    monkeypatch.setattr(erasure_jobs.search_cache, "generation_file", str(tmp_path / "generation"))
+    monkeypatch.setattr(erasure_jobs.search_cache, "invalidate_names", lambda names: dropped.extend(names) or 0)
+    monkeypatch.setattr(erasure_jobs, "record_erasure", lambda target, keys, before, after, directory:
+                        recorded.append((target["table"], keys, before, after)) or "tombstoned")
+
+    class Index:
+        directory = str(tmp_path)
+
+        def reload(self, force=False):
+            pass
+
+    monkeypatch.setattr(erasure_jobs, "get_name_index", Index)
+    erased = [["100", "1", "Max"], ["100", "2", "Max"]]
+    erasure_jobs.invalidate_searches(entry, {"source": KNA1, "keys": erased}, erased, "4:t0", "2:t1")
+    assert dropped == ["Max"]
+    assert recorded == [("KNA1", ["100|1", "100|2"], "4:t0", "2:t1")]
+    assert (tmp_path / "generation").exists()  # other processes drop their cached searches
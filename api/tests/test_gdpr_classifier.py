@@ -0,0 +1,70 @@
+import json
+
+import pandas as pd
+import pytest
+
+from gdpr_classifier import ColumnClassifier, DEFAULT_CLASSIFICATION, load_rules
+
+
+def schema(*columns):
+    """(column name, is primary key) pairs -> schema frame as extracted from INFORMATION_SCHEMA"""
+    return pd.DataFrame({
+        "COLUMN_NAME": [name for name, _ in columns],
+        "IS_PRIMARY_KEY": [int(pk) for _, pk in columns],
+    })
+
+
+def test_defaults_for_non_personal_column():
+    result = ColumnClassifier().classify(schema(("MANDT", False)))
+    assert result.iloc[0].to_dict() == DEFAULT_CLASSIFICATION
+
+
+def test_personal_keyword_is_case_insensitive():
+    row = ColumnClassifier().classify(schema(("Customer_EMail", False))).iloc[0]
+    assert (row.risk_level, row.gdpr_category) == ("Medium", "Personal Data")
+
+
+def test_special_category_wins_over_personal_data():
+    row = ColumnClassifier().classify(schema(("medical_name", False))).iloc[0]
+    assert (row.risk_level, row.gdpr_category) == ("High", "Special Category Data")
+
+
+def test_personal_identifier_only_for_primary_keys():
+    result = ColumnClassifier().classify(schema(("person_name", True), ("person_name", False)))
+    assert result.gdpr_category.tolist() == ["Personal Identifier", "Personal Data"]
+
+
+def test_timestamp_rule_only_overrides_recommendation():
+    row = ColumnClassifier().classify(schema(("name_updated", False))).iloc[0]
+    assert row.risk_level == "Medium"
+    assert row.recommendation == "Contains timestamp - good for audit trail"
+
+
+def test_result_is_aligned_with_schema_index():
+    df = schema(("email", False), ("MANDT", False)).set_axis([10, 20])
+    result = ColumnClassifier().classify(df)
+    assert result.index.tolist() == [10, 20]
+    assert result.loc[10, "risk_level"] == "Medium"
+
+
+def test_missing_column_names_use_defaults():
+    df = pd.DataFrame({"COLUMN_NAME": [None], "IS_PRIMARY_KEY": [0]})
+    assert ColumnClassifier().classify(df).iloc[0].risk_level == "Low"
+
+
+def test_unknown_rule_field_is_rejected():
+    with pytest.raises(ValueError, match="unknown fields"):
+        ColumnClassifier([{"name": "bad", "priority": 1, "keywords": ["x"], "set": {"owner": "me"}}])
+
+
+def test_rules_from_json_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "defaults": {"recommendation": "Review"},
+        "rules": [{"name": "iban", "priority": 1, "keywords": ["iban"], "set": {"risk_level": "High"}}],
+    }))
+    defaults, rules = load_rules(str(path))
+    classifier = ColumnClassifier(rules, defaults)
+    result = classifier.classify(schema(("IBAN", False), ("MANDT", False)))
+    assert result.risk_level.tolist() == ["High", "Low"]
+    assert result.recommendation.tolist() == ["Review", "Review"]
@@ -0,0 +1,118 @@
+import pandas as pd
+import pytest
+
+import incremental_analysis
+from incremental_analysis import diff_analysis, incremental_gdpr_analysis, table_fingerprints
+
+
+def analysed(*rows):
+    """(table, column, risk level) -> analysis frame"""
+    return pd.DataFrame({
+        "table_schema": ["dbo"] * len(rows),
+        "table_name": [table for table, _, _ in rows],
+        "column_name": [column for _, column, _ in rows],
+        "data_type": ["nvarchar"] * len(rows),
+        "risk_level": [risk for _, _, risk in rows],
+        "gdpr_category": ["Personal Data" if risk != "Low" else "Non-Personal" for _, _, risk in rows],
+    })
+
+
+def schema(*rows):
+    """(table, column) -> schema metadata frame"""
+    return pd.DataFrame({
+        "TABLE_SCHEMA": ["dbo"] * len(rows),
+        "TABLE_NAME": [table for table, _ in rows],
+        "COLUMN_NAME": [column for _, column in rows],
+        "DATA_TYPE": ["nvarchar"] * len(rows),
+        "IS_PRIMARY_KEY": [0] * len(rows),
+    })
+
+
+def test_diff_reports_added_removed_and_changed():
+    previous = analysed(("KNA1", "NAME1", "Medium"), ("KNA1", "ORT01", "Low"))
+    current = analysed(("KNA1", "NAME1", "High"), ("KNA1", "STRAS", "Low"))
+    diff = diff_analysis(previous, current)
+    assert [entry["column_name"] for entry in diff["added"]] == ["STRAS"]
+    assert [entry["column_name"] for entry in diff["removed"]] == ["ORT01"]
+    assert diff["changed"] == [{
+        "table_schema": "dbo", "table_name": "KNA1", "column_name": "NAME1",
+        "risk_level": "High", "gdpr_category": "Personal Data", "data_type": "nvarchar",
+        "risk_level_previous": "Medium", "gdpr_category_previous": "Personal Data", "data_type_previous": "nvarchar",
+    }]
+
+
+def test_unchanged_columns_are_not_reported():
+    frame = analysed(("KNA1", "NAME1", "Medium"))
+    assert diff_analysis(frame, frame.copy()) == {"added": [], "changed": [], "removed": []}
+
+
+def test_fingerprint_changes_with_columns_and_stats():
+    df = schema(("KNA1", "NAME1"), ("ADRC", "NAME1"))
+    base = table_fingerprints(df, {("dbo", "KNA1"): "2024|10"})
+    assert table_fingerprints(df, {("dbo", "KNA1"): "2024|11"})[("dbo", "KNA1")] != base[("dbo", "KNA1")]
+    assert table_fingerprints(df, {("dbo", "KNA1"): "2024|11"})[("dbo", "ADRC")] == base[("dbo", "ADRC")]
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Fake catalog: set current["schema"] before each run; counts analysed columns"""
+    current = {"schema": None, "analysed": []}
+
+    def analyse(df_schema, database_name, **options):
+        current["analysed"].append(len(df_schema))
+        return analysed(*[(table, column, "Medium" if "NAME" in column else "Low")
+                          for table, column in zip(df_schema["TABLE_NAME"], df_schema["COLUMN_NAME"])])
+
+    monkeypatch.setattr(incremental_analysis, "ANALYSIS_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(incremental_analysis, "extract_schema_metadata",
+                        lambda database_name, use_cache=True: current["schema"].copy())
+    monkeypatch.setattr(incremental_analysis, "fetch_table_stats", lambda database_name: {})
+    monkeypatch.setattr(incremental_analysis, "perform_gdpr_analysis", analyse)
+    return current
+
+
+def test_rerun_only_analyses_changed_tables(database):
+    database["schema"] = schema(("KNA1", "NAME1"), ("ADRC", "NAME1"))
+    incremental_gdpr_analysis("ECC")
+    database["schema"] = schema(("KNA1", "NAME1"), ("ADRC", "NAME1"), ("ADRC", "CITY1"))
+    df, report = incremental_gdpr_analysis("ECC")
+    assert database["analysed"] == [2, 2]
+    assert (report["tables_reanalysed"], report["tables_unchanged"]) == (1, 1)
+    assert [entry["column_name"] for entry in report["diff"]["added"]] == ["CITY1"]
+    assert df["column_name"].tolist() == ["NAME1", "NAME1", "CITY1"]
+
+
+def test_all_tables_dropped_reports_removals(database):
+    database["schema"] = schema(("KNA1", "NAME1"), ("KNA1", "ORT01"))
+    incremental_gdpr_analysis("ECC")
+    database["schema"] = schema()
+    df, report = incremental_gdpr_analysis("ECC")
+    assert len(df) == 0
+    assert report["tables_removed"] == 1
+    assert [entry["column_name"] for entry in report["diff"]["removed"]] == ["NAME1", "ORT01"]
+    # The empty state must not break the next run either
+    database["schema"] = schema(("KNA1", "NAME1"))
+    _, report = incremental_gdpr_analysis("ECC")
+    assert [entry["column_name"] for entry in report["diff"]["added"]] == ["NAME1"]
+
+
+def test_changed_detectors_force_a_full_run(database, monkeypatch):
+    import pii_detectors
+    database["schema"] = schema(("KNA1", "NAME1"), ("ADRC", "NAME1"))
+    incremental_gdpr_analysis("ECC")
+    monkeypatch.setattr(pii_detectors, "PII_DETECTOR_VERSION", pii_detectors.PII_DETECTOR_VERSION + 1)
+    _, report = incremental_gdpr_analysis("ECC")
+    assert report["full_run"]
+    assert database["analysed"] == [2, 2]
+
+
+def test_views_are_reanalysed_after_their_ttl(database, monkeypatch):
+    # KNA1 is a table (has stats), V_CUSTOMERS a view
+    monkeypatch.setattr(incremental_analysis, "fetch_table_stats", lambda database_name: {("dbo", "KNA1"): "2024|10"})
+    database["schema"] = schema(("KNA1", "NAME1"), ("V_CUSTOMERS", "NAME1"))
+    incremental_gdpr_analysis("ECC")
+    _, report = incremental_gdpr_analysis("ECC")
+    assert report["tables_reanalysed"] == 0
+    monkeypatch.setattr(incremental_analysis, "ANALYSIS_VIEW_TTL", -1)
+    _, report = incremental_gdpr_analysis("ECC")
+    assert (report["tables_reanalysed"], report["columns_reanalysed"]) == (1, 1)
@@ -0,0 +1,87 @@
+import pytest
+
+import masking
+from masking import ENCRYPTED_PREFIX, TOKEN_PREFIX, KeyStore, MaskingEngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return MaskingEngine(KeyStore(str(tmp_path), master_key=None))
+
+
+def test_encrypt_round_trip(engine):
+    masked, reference = engine.mask_names(["Max Müller", "Erika Mustermann"])
+    assert reference.startswith(ENCRYPTED_PREFIX)
+    assert "Max Müller" not in masked
+    assert engine.unmask_names(masked, reference) == ["Max Müller", "Erika Mustermann"]
+
+
+def test_batches_share_the_active_data_key(engine):
+    _, small = engine.mask_names(["a"])
+    _, large = engine.mask_names(["b"] * 5000)
+    assert small == large
+    assert engine.key_store.stats()["data_keys"] == 1
+
+
+def test_active_key_rotates_after_max_uses(engine, monkeypatch):
+    monkeypatch.setattr(masking, "MASKING_KEY_MAX_USES", 10)
+    _, first = engine.mask_names(["a"] * 6)
+    _, second = engine.mask_names(["b"] * 6)
+    assert first != second
+    assert engine.unmask_names(engine.mask_names(["c"], key_id=first[len(ENCRYPTED_PREFIX):])[0], first) == ["c"]
+
+
+def test_tokens_are_deterministic_and_normalized(engine):
+    tokens, reference = engine.mask_names(["Max  Müller", "max müller", "Erika"], deterministic=True)
+    assert reference.startswith(TOKEN_PREFIX)
+    assert tokens[0] == tokens[1] != tokens[2]
+    with pytest.raises(ValueError):
+        engine.unmask_names(tokens, reference)
+
+
+def test_keys_survive_master_rotation_and_reload(engine, tmp_path):
+    masked, reference = engine.mask_names(["Max"])
+    assert engine.key_store.rotate_master_key() == 1
+    reloaded = MaskingEngine(KeyStore(str(tmp_path), master_key=None))
+    assert reloaded.unmask_names(masked, reference) == ["Max"]
+
+
+def test_key_created_by_another_process_is_found(engine, tmp_path):
+    engine.mask_names(["a"])
+    key_id, _ = KeyStore(str(tmp_path), master_key=None).new_data_key()
+    assert len(engine.key_store.data_key(key_id)) == 32
+    assert engine.key_store.stats()["data_keys"] == 2
+
+
+def create_keys(directory, count):
+    """Worker process: create data keys in a shared key directory"""
+    store = KeyStore(directory, master_key=None)
+    return [store.new_data_key()[0] for _ in range(count)]
+
+
+def test_processes_creating_keys_do_not_lose_each_others(tmp_path):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as pool:
+        created = [key_id for part in pool.map(create_keys, [str(tmp_path)] * 4, [15] * 4) for key_id in part]
+    store = KeyStore(str(tmp_path), master_key=None)
+    assert store.stats()["data_keys"] == len(created) == 60
+    assert all(len(store.data_key(key_id)) == 32 for key_id in created)
+
+
+def test_key_created_after_a_rotation_elsewhere_stays_readable(engine, tmp_path):
+    engine.mask_names(["a"])
+    KeyStore(str(tmp_path), master_key=None).rotate_master_key()
+    # engine's store still holds the old master in memory
+    key_id, _ = engine.key_store.new_data_key()
+    assert len(KeyStore(str(tmp_path), master_key=None).data_key(key_id)) == 32
+
+
+def test_warm_process_pool_starts_every_worker(monkeypatch):
+    monkeypatch.setattr(masking, "MASKING_PROCESSES", 2)
+    masking.shutdown_process_pool()
+    try:
+        assert masking.warm_process_pool(block=True) == 2
+        assert len(masking.get_process_pool()._processes) == 2
+    finally:
+        masking.shutdown_process_pool()
@@ -0,0 +1,189 @@
+from contextlib import contextmanager
+
+import pytest
+
+import name_index
+from name_index import (IndexSegment, NameIndex, build_segment, format_row_key, name_similarity, parse_row_key,
+                        normalize_name, write_manifest)
+
+TARGET = {"database": "ECC", "schema": "dbo", "table": "KNA1", "column": "NAME1", "key": ["MANDT", "KUNNR"]}
+ROWS = [("100|1", "Max Müller"), ("100|2", "MUELLER MAX"), ("100|3", "José  Álvarez"), ("100|4", "Li")]
+
+
+def test_normalize_folds_case_accents_and_whitespace():
+    assert normalize_name("  José\tÁLVAREZ ") == "jose alvarez"
+    assert normalize_name("Straße") == "strasse"
+
+
+def test_name_similarity_ignores_token_order():
+    assert name_similarity("Paul Jonas", "JONAS, Paul") == 100.0
+    assert name_similarity("Max Müller", "Max Muller") == 100.0
+    assert name_similarity("", "Max") == 0.0
+    assert name_similarity("Max Müller", "Erika Schmidt") < 50
+
+
+def test_format_row_key():
+    assert format_row_key(["100", " 42 ", None]) == "100|42|"
+
+
+@pytest.fixture
+def segment(tmp_path):
+    directory = str(tmp_path / "segment")
+    assert build_segment(directory, ROWS) == len(ROWS)
+    return IndexSegment(directory, {})
+
+
+def test_segment_substring_search(segment):
+    assert segment.search(normalize_name("müller")) == [("Max Müller", "100|1")]
+    assert segment.search(normalize_name("alvarez")) == [("José  Álvarez", "100|3")]
+    assert segment.search(normalize_name("max")) == [("Max Müller", "100|1"), ("MUELLER MAX", "100|2")]
+    assert segment.search(normalize_name("nobody")) == []
+
+
+def test_segment_short_query_scans_names(segment):
+    assert segment.search("li") == [("Li", "100|4")]
+
+
+def test_trigrams_are_verified_as_substring(tmp_path):
+    # Contains both trigrams of "abcd" but not the substring itself
+    directory = str(tmp_path / "segment")
+    build_segment(directory, [("1", "abc bcd")])
+    assert IndexSegment(directory, {}).search("abcd") == []
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class QueuedExecutor:
+    def __init__(self):
+        self.queued = []
+
+    def submit(self, fn, *args):
+        self.queued.append((fn, args))
+
+
+def make_index(tmp_path, monkeypatch, source_fingerprint, source_signal=None, built_signal="4:t0",
+               executor=None, verify_interval=60):
+    directory = str(tmp_path)
+    build_segment(str(tmp_path / "seg"), ROWS)
+    write_manifest(directory, {"segments": {name_index.target_id(TARGET): {
+        "dir": "seg", "fingerprint": "4:123", "signal": built_signal, "doc_count": len(ROWS),
+        "built_at": 0, "verified_at": 0,
+    }}})
+    checks = []
+
+    @contextmanager
+    def fake_connection(database):
+        yield None
+
+    def fake_fingerprint(conn, target):
+        checks.append(target["table"])
+        return source_fingerprint
+
+    monkeypatch.setattr(name_index, "get_connection", fake_connection)
+    monkeypatch.setattr(name_index, "fetch_target_fingerprint", fake_fingerprint)
+    monkeypatch.setattr(name_index, "fetch_target_signal", lambda conn, target: source_signal)
+    return NameIndex(directory, verify_interval=verify_interval, executor=executor or InlineExecutor()), checks
+
+
+def test_index_answers_when_fingerprint_matches(tmp_path, monkeypatch):
+    index, checks = make_index(tmp_path, monkeypatch, "4:123")
+    hits, stale = index.search("Müller", [TARGET])
+    assert stale == []
+    assert [(hit["name"], hit["key"], hit["table"]) for hit in hits] == [("Max Müller", "100|1", "KNA1")]
+    index.search("Max", [TARGET])
+    assert checks == ["KNA1"]  # verified once per interval
+
+
+def test_unmoved_signal_skips_the_fingerprint_scan(tmp_path, monkeypatch):
+    index, checks = make_index(tmp_path, monkeypatch, "5:999", source_signal="4:t0")
+    assert index.search("Müller", [TARGET])[1] == []
+    assert checks == []
+
+
+def test_changed_table_falls_back_to_sql(tmp_path, monkeypatch):
+    index, _ = make_index(tmp_path, monkeypatch, "5:999", source_signal="5:t1")
+    assert index.search("Müller", [TARGET]) == ([], [TARGET])
+
+
+def test_fingerprint_outcome_is_remembered_per_signal(tmp_path, monkeypatch):
+    # e.g. usage stats reset by a server restart: the signal moved, the rows did not
+    index, checks = make_index(tmp_path, monkeypatch, "4:123", source_signal="4:", verify_interval=0)
+    for _ in range(3):
+        assert index.search("Müller", [TARGET])[1] == []
+    assert checks == ["KNA1"]
+
+
+def test_search_never_waits_for_verification(tmp_path, monkeypatch):
+    executor = QueuedExecutor()
+    index, checks = make_index(tmp_path, monkeypatch, "5:999", source_signal="5:t1", executor=executor)
+    # Not checked yet: served from the segment, one check queued for all searches
+    assert index.search("Müller", [TARGET])[1] == []
+    assert index.search("Max", [TARGET])[1] == []
+    assert len(executor.queued) == 1
+    fn, args = executor.queued.pop()
+    fn(*args)
+    assert index.search("Müller", [TARGET]) == ([], [TARGET])
+
+
+def test_invalidated_target_is_searched_in_sql(tmp_path, monkeypatch):
+    index, _ = make_index(tmp_path, monkeypatch, "4:123", source_signal="4:t0", executor=QueuedExecutor())
+    index.reload(force=True)
+    index.invalidate(TARGET)
+    assert index.search("Müller", [TARGET]) == ([], [TARGET])
+
+
+def test_target_without_segment_is_stale(tmp_path, monkeypatch):
+    index, checks = make_index(tmp_path, monkeypatch, "4:123")
+    other = {**TARGET, "table": "ADRC"}
+    assert index.search("Müller", [other]) == ([], [other])
+    assert checks == []
+
+
+def test_row_key_round_trip_with_separators():
+    values = ["100", "A|B", "C\\D", ""]
+    key = format_row_key(values)
+    assert key == "100|A\\|B|C\\\\D|"
+    assert parse_row_key(key) == values
+    assert parse_row_key("100|42") == ["100", "42"]
+
+
+def test_refresh_skips_targets_whose_signal_did_not_move(tmp_path, monkeypatch):
+    _, checks = make_index(tmp_path, monkeypatch, "4:123", source_signal="4:t0")
+    monkeypatch.setattr(name_index, "iter_target_rows", lambda conn, target: iter(ROWS))
+    assert name_index.refresh_index([TARGET], str(tmp_path)) == {name_index.target_id(TARGET): "unchanged"}
+    assert checks == []
+
+    monkeypatch.setattr(name_index, "fetch_target_signal", lambda conn, target: "5:t1")
+    assert name_index.refresh_index([TARGET], str(tmp_path), force=True) == {name_index.target_id(TARGET): "rebuilt"}
+    manifest = name_index.read_manifest(str(tmp_path))["segments"][name_index.target_id(TARGET)]
+    assert (manifest["signal"], manifest["doc_count"]) == ("5:t1", len(ROWS))
+
+
+def test_erased_rows_are_hidden_from_other_processes(tmp_path, monkeypatch):
+    index, checks = make_index(tmp_path, monkeypatch, "4:123", source_signal="4:t0", verify_interval=0)
+    assert [hit["key"] for hit in index.search("Max", [TARGET])[0]] == ["100|1", "100|2"]
+    # The erasure ran elsewhere (another worker, the CLI): only the shared manifest tells
+    assert name_index.record_erasure(TARGET, ["100|1"], "4:t0", "3:t1", directory=str(tmp_path)) == "tombstoned, current"
+    index.reload(force=True)
+    monkeypatch.setattr(name_index, "fetch_target_signal", lambda conn, target: "3:t1")
+    hits, stale = index.search("Max", [TARGET])
+    assert ([hit["key"] for hit in hits], stale) == (["100|2"], [])
+    assert checks == []  # the re-based signal keeps the segment current without a fingerprint scan
+
+
+def test_erasure_after_other_writes_keeps_the_old_signal(tmp_path, monkeypatch):
+    make_index(tmp_path, monkeypatch, "4:123")
+    assert name_index.record_erasure(TARGET, ["100|1"], "9:t9", "8:t10", directory=str(tmp_path)) == "tombstoned"
+    assert name_index.read_manifest(str(tmp_path))["segments"][name_index.target_id(TARGET)]["signal"] == "4:t0"
+
+
+def test_too_many_tombstones_wait_for_a_rebuild(tmp_path, monkeypatch):
+    index, _ = make_index(tmp_path, monkeypatch, "4:123", source_signal="4:t0")
+    monkeypatch.setattr(name_index, "NAME_INDEX_MAX_TOMBSTONES", 1)
+    assert name_index.record_erasure(TARGET, ["100|1", "100|2"], directory=str(tmp_path)) == "stale"
+    assert index.search("Max", [TARGET]) == ([], [TARGET])
+    monkeypatch.setattr(name_index, "iter_target_rows", lambda conn, target: iter(ROWS[1:]))
+    assert name_index.refresh_index([TARGET], str(tmp_path)) == {name_index.target_id(TARGET): "rebuilt"}
@@ -0,0 +1,70 @@
+import re
+import zlib
+
+import pandas as pd
+
+from pdf_report import fit_text, pdf_text, stream_gdpr_pdf_report, summarize_analysis
+
+
+def analysis(rows: int, tables: int = 3) -> pd.DataFrame:
+    levels = ["High", "Medium", "Low"]
+    return pd.DataFrame({
+        "table_schema": ["dbo"] * rows,
+        "table_name": [f"T{i * tables // rows}" for i in range(rows)],
+        "column_name": [f"col_{i}" for i in range(rows)],
+        "data_type": ["nvarchar"] * rows,
+        "is_primary_key": [0] * rows,
+        "risk_level": [levels[i % 3] for i in range(rows)],
+        "gdpr_category": ["Personal Data"] * rows,
+    })
+
+
+def render(df) -> bytes:
+    return b"".join(stream_gdpr_pdf_report(df, "ECC"))
+
+
+def test_pdf_text_escapes_string_delimiters():
+    assert pdf_text("a(b)\\c\nd") == b"a\\(b\\)\\\\c d"
+    assert pdf_text(None) == b""
+    assert pdf_text("Müller") == "Müller".encode("cp1252")
+
+
+def test_fit_text_truncates_to_column_width():
+    assert fit_text("short", 100) == "short"
+    fitted = fit_text("x" * 200, 50)
+    assert fitted.endswith("…") and len(fitted) < 20
+
+
+def test_summary_counts():
+    summary = summarize_analysis(analysis(9))
+    assert summary["columns"] == 9
+    assert summary["tables"] == 3
+    assert summary["risk_levels"] == {"High": 3, "Medium": 3, "Low": 3}
+    assert summary["categories"] == {"Personal Data": 9}
+
+
+def test_cross_reference_offsets_point_at_objects():
+    pdf = render(analysis(20))
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    xref_position = int(re.search(rb"startxref\n(\d+)\n", pdf).group(1))
+    assert pdf[xref_position:].startswith(b"xref\n")
+    size = int(re.search(rb"/Size (\d+)", pdf).group(1))
+    offsets = re.findall(rb"(\d{10}) 00000 n ", pdf[xref_position:])
+    assert len(offsets) == size - 1
+    for object_id, offset in enumerate(offsets, start=1):
+        assert pdf[int(offset):].startswith(b"%d 0 obj" % object_id)
+
+
+def test_rows_flow_over_pages():
+    pdf = render(analysis(500, tables=10))
+    pages = int(re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", pdf).group(1))
+    assert pages > 2
+    streams = [zlib.decompress(body) for body in re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)]
+    assert len(streams) == pages
+    assert sum(stream.count(b"(col_") for stream in streams) == 500
+    assert b"(Table: dbo.T9)" in b"".join(streams)
+
+
+def test_empty_analysis_still_renders_summary():
+    pdf = render(analysis(0))
+    assert b"/Count 1" in pdf
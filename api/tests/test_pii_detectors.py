@@ -0,0 +1,85 @@
+import pandas as pd
+
+from pii_detectors import PiiDetector, dob_is_plausible, iban_is_valid, phone_is_plausible
+
+
+def detect(columns):
+    """{column name: sampled values} -> [(pii_detected, pii_confidence)] in column order"""
+    result = PiiDetector().detect(list(columns.values()), list(columns))
+    return list(zip(result.pii_detected, result.pii_confidence))
+
+
+def test_email_column():
+    assert detect({"SMTP_ADDR": ["anna@example.com", "b.meier@firma.de", "x@y.ch"]}) == [("email", 1.0)]
+
+
+def test_phone_numbers():
+    assert detect({"TELF1": ["030 1234567", "+49 30 1234567", "0171/2345678"]}) == [("phone", 1.0)]
+
+
+def test_sap_document_numbers_and_amounts_are_not_phone_numbers():
+    assert detect({
+        "VBELN": ["0090000001", "0090000002", "0090000017"],     # billing documents
+        "VBELN_VL": ["0080001234", "0080001235", "0080009999"],  # deliveries
+        "NETWR": ["+1 000 000.00", "+2 500 000.00", "1.234,56"],
+    }) == [(None, 0.0)] * 3
+
+
+def test_unseparated_international_numbers_need_a_phone_column_name():
+    values = ["00491711234567", "00493012345678", "0041441234567"]
+    assert detect({"TELF1": values, "BELNR": values}) == [("phone", 1.0), (None, 0.0)]
+    assert detect({"X": ["+491711234567", "+41 44 123 45 67", "0044 20 7946 0958"]}) == [("phone", 1.0)]
+
+
+def test_dotted_dates_are_not_phone_numbers():
+    assert not phone_is_plausible("05.03.1999")
+    (detected, _), = detect({"ERDAT": ["05.03.1999", "06.04.2000", "07.01.1985"]})
+    assert detected != "phone"
+
+
+def test_dotted_dates_of_birth_with_name_hint():
+    assert detect({"GEBDAT": ["05.03.1999", "06.04.2000", "07.01.1985"]}) == [("date_of_birth", 1.0)]
+
+
+def test_sap_dats_dates_of_birth_need_name_hint():
+    values = ["19800504", "19751230", "19900101"]
+    assert detect({"GBDAT": values, "KUNNR": values}) == [("date_of_birth", 1.0), (None, 0.0)]
+
+
+def test_iso_dates_without_name_hint_are_weighted_down():
+    values = ["1980-05-04", "1975-12-30 00:00:00", "1990-01-01"]
+    assert detect({"BIRTHDATE": values, "ERDAT": values}) == [("date_of_birth", 1.0), (None, 0.5)]
+
+
+def test_implausible_dates_of_birth():
+    assert not dob_is_plausible("20991231")
+    assert not dob_is_plausible("1980-02-30")
+    assert dob_is_plausible("1980-02-29")
+
+
+def test_iban_checksum():
+    assert iban_is_valid("DE89 3704 0044 0532 0130 00")
+    assert not iban_is_valid("DE89 3704 0044 0532 0130 01")
+    assert detect({"IBAN": ["DE89370400440532013000", "GB82WEST12345698765432", "DE89370400440532013001"]}) == [
+        ("iban", 0.67)]
+
+
+def test_few_samples_are_not_enough():
+    assert detect({"X": ["anna@example.com"]}) == [(None, 0.33)]
+
+
+def test_empty_columns():
+    assert detect({"A": None, "B": []}) == [(None, 0.0), (None, 0.0)]
+
+
+def test_apply_to_risk_only_raises():
+    df = pd.DataFrame({
+        "pii_detected": ["iban", "email", None],
+        "risk_level": ["Low", "High", "Low"],
+        "gdpr_category": ["Non-Personal", "Special Category Data", "Non-Personal"],
+        "compliance_status": ["Compliant"] * 3,
+        "recommendation": [""] * 3,
+    })
+    PiiDetector().apply_to_risk(df)
+    assert df.risk_level.tolist() == ["High", "High", "Low"]
+    assert df.gdpr_category.tolist() == ["Personal Data (financial)", "Special Category Data", "Non-Personal"]
@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+import sample_extraction
+from sample_extraction import build_sample_query, sample_table
+
+
+class FakeConnection:
+    """Answers the batch query with `batch` and every sparse-column query with no rows"""
+    def __init__(self, clock, batch, query_seconds):
+        self.clock, self.batch, self.query_seconds = clock, batch, query_seconds
+        self.timeout = 0
+        self.queries = []   # (sql, timeout in effect)
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.queries.append((sql, self.timeout))
+        self.clock[0] += self.query_seconds
+        self.result = [] if "IS NOT NULL" in sql else self.batch
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(sample_extraction, "time", SimpleNamespace(monotonic=lambda: clock[0], time=lambda: clock[0]))
+
+    def connect(batch, query_seconds=0.0):
+        conn = FakeConnection(clock, batch, query_seconds)
+
+        @contextmanager
+        def get_connection(database):
+            yield conn
+        monkeypatch.setattr(sample_extraction, "get_connection", get_connection)
+        return conn
+    return connect
+
+
+COLUMNS = ["NAME1", "TELF1", "STCD1", "ORT01"]
+FULL_BATCH = [("Max", None, None, None)] * 100
+
+
+def test_sparse_columns_are_queried_individually(fake_db):
+    conn = fake_db(FULL_BATCH)
+    samples = sample_table("DB", "dbo", "KNA1", COLUMNS, row_count=500)
+    assert samples["NAME1"] == ["Max"] * 3
+    assert [sql for sql, _ in conn.queries[1:]] == [
+        "SELECT TOP (3) [TELF1] FROM [dbo].[KNA1] WITH (READUNCOMMITTED) WHERE [TELF1] IS NOT NULL",
+        "SELECT TOP (3) [STCD1] FROM [dbo].[KNA1] WITH (READUNCOMMITTED) WHERE [STCD1] IS NOT NULL",
+        "SELECT TOP (3) [ORT01] FROM [dbo].[KNA1] WITH (READUNCOMMITTED) WHERE [ORT01] IS NOT NULL",
+    ]
+    assert conn.timeout == 0
+
+
+def test_short_batch_was_the_whole_table(fake_db):
+    conn = fake_db(FULL_BATCH[:10])
+    sample_table("DB", "dbo", "KNA1", COLUMNS, row_count=10)
+    assert len(conn.queries) == 1
+
+
+def test_large_tables_skip_the_sparse_column_scans(fake_db):
+    conn = fake_db(FULL_BATCH)
+    sample_table("DB", "dbo", "KNA1", COLUMNS, row_count=5_000_000)
+    assert [sql for sql, _ in conn.queries] == [build_sample_query("dbo", "KNA1", COLUMNS, 5_000_000)]
+    assert "TABLESAMPLE" in conn.queries[0][0]
+
+
+def test_all_queries_share_one_table_deadline(fake_db):
+    conn = fake_db(FULL_BATCH, query_seconds=1.5)
+    sample_table("DB", "dbo", "KNA1", COLUMNS, row_count=500, timeout=5)
+    # 5s budget: batch (timeout 5) and two sparse columns (4, then 2) before less than a second is left
+    assert [timeout for _, timeout in conn.queries] == [5, 4, 2]
@@ -0,0 +1,162 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import search_cache as search_cache_module
+from search_cache import SearchCache
+
+KNA1 = {"database": "ECC", "schema": "dbo", "table": "KNA1", "column": "NAME1"}
+ADRP = {"database": "ECC", "schema": "dbo", "table": "ADRP", "column": "NAME_TEXT"}
+
+
+def match(name):
+    return {"database": "ECC", "schema": "dbo", "table": "KNA1", "column": "NAME1", "name": name, "key": "800|1"}
+
+
+class Computation:
+    """compute() stand-in counting its calls"""
+    def __init__(self, matches=(), cacheable=True):
+        self.matches = list(matches)
+        self.cacheable = cacheable
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.matches, self.cacheable
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_hit_folds_case_accents_and_target_order():
+    cache, compute = SearchCache(), Computation([match("Jürgen Müller")])
+    first = cache.get_or_compute("Müller", [KNA1, ADRP], compute)
+    assert cache.get_or_compute("  MULLER ", [ADRP, KNA1], compute) is first
+    assert compute.calls == 1
+
+
+def test_other_targets_miss():
+    cache, compute = SearchCache(), Computation()
+    cache.get_or_compute("Meier", [KNA1], compute)
+    cache.get_or_compute("Meier", [KNA1, ADRP], compute)
+    assert compute.calls == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache, compute = SearchCache(ttl=60), Computation()
+    cache.get_or_compute("Meier", [KNA1], compute)
+    clock[0] += 59
+    cache.get_or_compute("Meier", [KNA1], compute)
+    clock[0] += 1
+    cache.get_or_compute("Meier", [KNA1], compute)
+    assert compute.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchCache(max_entries=2)
+    computations = {name: Computation() for name in ("a", "b", "c")}
+    for name in ("a", "b"):
+        cache.get_or_compute(name, [KNA1], computations[name])
+    cache.get_or_compute("a", [KNA1], computations["a"])   # "b" is now the oldest
+    cache.get_or_compute("c", [KNA1], computations["c"])
+    for name in ("a", "b", "c"):
+        cache.get_or_compute(name, [KNA1], computations[name])
+    assert {name: c.calls for name, c in computations.items()} == {"a": 1, "b": 2, "c": 2}
+    assert cache.stats()["entries"] == 2
+
+
+def test_incomplete_results_are_not_cached():
+    cache, compute = SearchCache(), Computation([match("Meier")], cacheable=False)
+    assert cache.get_or_compute("Meier", [KNA1], compute) == [match("Meier")]
+    cache.get_or_compute("Meier", [KNA1], compute)
+    assert compute.calls == 2
+
+
+def test_concurrent_searches_share_one_computation(monkeypatch):
+    cache = SearchCache()
+    started, coalesced = threading.Event(), threading.Event()
+    monkeypatch.setattr(search_cache_module, "count_event",
+                        lambda event, *args: event == "search_coalesced" and coalesced.set())
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        coalesced.wait(5)   # the follower is waiting on the leader's future
+        return [match("Meier")], True
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("Meier", [KNA1], slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(cache.get_or_compute("meier", [KNA1], slow)))
+    follower.start()
+    leader.join(5)
+    follower.join(5)
+    assert coalesced.is_set()
+    assert len(calls) == 1
+    assert results[0] is results[1]
+
+
+def test_failed_computation_is_raised_and_not_cached():
+    cache = SearchCache()
+
+    def failing():
+        raise RuntimeError("target down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("Meier", [KNA1], failing)
+    compute = Computation()
+    cache.get_or_compute("Meier", [KNA1], compute)
+    assert compute.calls == 1
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_invalidate_name_drops_searches_that_could_match():
+    cache = SearchCache()
+    for query, matches in (("Müller", [match("Anna Müller")]), ("Anna", []), ("Schmidt", [])):
+        cache.get_or_compute(query, [KNA1], Computation(matches))
+    # "Müller" and "Anna" are contained in the processed name, "Schmidt" is not
+    assert cache.invalidate_name("ANNA MULLER") == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_invalidate_names_matches_returned_names():
+    cache = SearchCache()
+    cache.get_or_compute("Mül", [KNA1], Computation([match("Jürgen Müller")]))
+    cache.get_or_compute("Meier", [KNA1], Computation([match("Hans Meier")]))
+    assert cache.invalidate_names(["Jürgen Müller", "Eva Weber"]) == 1
+    assert cache.invalidate_names([]) == 0
+
+
+def test_invalidation_during_computation_skips_caching():
+    cache = SearchCache()
+
+    def racing():
+        cache.invalidate_name("Anna Meier")
+        return [match("Anna Meier")], True
+
+    cache.get_or_compute("Meier", [KNA1], racing)
+    compute = Computation()
+    cache.get_or_compute("Meier", [KNA1], compute)
+    assert compute.calls == 1
+
+
+def test_invalidation_published_by_another_process(tmp_path):
+    path = str(tmp_path / "generation")
+    here, elsewhere = SearchCache(generation_file=path), SearchCache(generation_file=path)
+    compute = Computation([match("Max Müller")])
+    here.get_or_compute("Müller", [KNA1], compute)
+    elsewhere.publish_invalidation()
+    here.get_or_compute("Müller", [KNA1], compute)
+    assert compute.calls == 2
+    # The publisher keeps its own entries (it already dropped what it erased)
+    elsewhere.get_or_compute("Müller", [KNA1], compute)
+    elsewhere.publish_invalidation()
+    elsewhere.get_or_compute("Müller", [KNA1], compute)
+    assert compute.calls == 3
@@ -1,45 +1,162 @@
+import os
+from contextlib import contextmanager
+
 import pyodbc
-from cryptography.fernet import Fernet
+from masking import get_masking_engine
+from db_pool import PoolRegistry
+from metrics import count_event, registry, stage
 
 # === SQL Server Configuration ===
-server = 'sql-lakeside-server.database.windows.net'
-username = 'hackathon_beta'
-password = 'Rn4&qT7!zM3s'
+# Defaults point at the shared Azure SQL server. Set SQL_SERVER / SQL_USERNAME /
+# SQL_PASSWORD (and SQL_DRIVER / SQL_CONNECTION_OPTIONS) to use another
+# instance, e.g. the local benchmark stand-in (benchmarks/seed_standin.py), or
+# SQL_CONNECTION_STRING as a full template with a {database} placeholder.
+server = os.getenv("SQL_SERVER", 'sql-lakeside-server.database.windows.net')
+username = os.getenv("SQL_USERNAME", 'hackathon_beta')
+password = os.getenv("SQL_PASSWORD", 'Rn4&qT7!zM3s')
+driver = os.getenv("SQL_DRIVER", 'ODBC Driver 18 for SQL Server')
+connection_options = os.getenv("SQL_CONNECTION_OPTIONS", 'Encrypt=yes;TrustServerCertificate=no;Connection Timeout=30;')
+connection_string_template = os.getenv("SQL_CONNECTION_STRING")
 
 def get_connection_string(database):
+    if connection_string_template:
+        return connection_string_template.format(database=database)
     return (
-        'DRIVER={ODBC Driver 18 for SQL Server};'
+        f'DRIVER={{{driver}}};'
         f'SERVER={server};'
         f'DATABASE={database};'
         f'UID={username};'
         f'PWD={password};'
-        'Encrypt=yes;TrustServerCertificate=no;Connection Timeout=30;'
+        f'{connection_options}'
     )
 
-def encrypt_name(name:str):
-    """Encrypt both names with the same key"""
-    key = Fernet.generate_key()
-    f = Fernet(key)
-    encrypted_name = f.encrypt(name.encode()).decode()
-    return encrypted_name, key.decode()
+# === Connection Pool ===
+# One pool per database; connections are reused across requests instead of
+# paying TLS + login on every call.
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 10
+POOL_CHECKOUT_TIMEOUT = 30      # seconds to wait for a free connection
+POOL_IDLE_TIMEOUT = 300         # close idle connections above min size after this
+POOL_HEALTH_CHECK_INTERVAL = 30 # ping connections idle longer than this before reuse
+POOL_MAINTENANCE_INTERVAL = 30  # evict idle / re-open min_size connections this often
+
+connection_pools = PoolRegistry(
+    lambda database: pyodbc.connect(get_connection_string(database)),
+    min_size=POOL_MIN_SIZE,
+    max_size=POOL_MAX_SIZE,
+    checkout_timeout=POOL_CHECKOUT_TIMEOUT,
+    idle_timeout=POOL_IDLE_TIMEOUT,
+    health_check_interval=POOL_HEALTH_CHECK_INTERVAL,
+)
+
+@contextmanager
+def get_connection(database: str, timeout: float = None):
+    """Check out a pooled connection: `with get_connection(db) as conn: ...`"""
+    pool = connection_pools.get(database)
+    with stage("db_checkout"):
+        conn = pool.acquire(timeout)
+    try:
+        yield conn
+    finally:
+        # release() rolls back; a failing rollback means the connection is unusable
+        pool.release(conn)
+
+def get_pool_stats():
+    """Per-database pool statistics, used for sizing the pools"""
+    return connection_pools.stats()
+
+POOL_GAUGES = ("size", "idle", "in_use", "waiting")
+POOL_COUNTERS = ("checkouts", "checkout_timeouts", "discarded")
+
+def _pool_metrics():
+    """Pool gauges and counters for /metrics, read at scrape time"""
+    pools = connection_pools.stats()
+    lines = []
+    for key in POOL_GAUGES + POOL_COUNTERS:
+        kind, name = ("gauge", f"gdpr_pool_{key}") if key in POOL_GAUGES else ("counter", f"gdpr_pool_{key}_total")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f'{name}{{database="{pool["database"]}"}} {pool[key]}' for pool in pools)
+    return lines
+
+registry.add_collector(_pool_metrics)
+
+def encrypt_name(name: str, deterministic: bool = False):
+    """
+    Mask a name; returns (masked_name, key_reference).
+
+    The key reference ("dk:<id>" or "tok:tokenization") points into the
+    masking key store, the key itself is never stored with the results.
+    """
+    with stage("encrypt"):
+        masked, key_reference = get_masking_engine().mask_names([name], deterministic=deterministic)
+    return masked[0], key_reference
+
+def encrypt_names(names, deterministic: bool = False):
+    """Mask a batch of names under one data key, returning (masked_name, key_reference) pairs in input order"""
+    with stage("encrypt"):
+        masked, key_reference = get_masking_engine().mask_names(names, deterministic=deterministic)
+    return [(value, key_reference) for value in masked]
+
+RESULTS_INSERT_QUERY = """
+    INSERT INTO dbo.identified_names_team_beta 
+        ([key], encrypt_key, source, name, probability)
+    VALUES (?, ?, ?, ?, ?)
+"""
+RESULTS_INSERT_CHUNK_SIZE = 1000
 
 def insert_into_results_table(entity_id: str, processed_name: str,
                             encrypt_key: str, source: str, probability: float):
     """Insert processed data into Results.dbo.identified_names_team_beta"""
     try:
-        conn = pyodbc.connect(get_connection_string('Results'))
-        cursor = conn.cursor()
-        insert_query = """
-            INSERT INTO dbo.identified_names_team_beta 
-                ([key], encrypt_key, source, name, probability)
-            VALUES (?, ?, ?, ?, ?)
-        """
-        # Combine first and last name for the 'name' field
-        full_name = processed_name
-        cursor.execute(insert_query, (entity_id, encrypt_key, source, full_name, probability))
-        conn.commit()
-        conn.close()
+        with get_connection('Results') as conn, stage("insert"):
+            cursor = conn.cursor()
+            # Combine first and last name for the 'name' field
+            full_name = processed_name
+            cursor.execute(RESULTS_INSERT_QUERY, (entity_id, encrypt_key, source, full_name, probability))
+            conn.commit()
         return True
     except Exception as e:
         print(f"Insert failed: {e}")
-        return False
\ No newline at end of file
+        count_event("insert_failed")
+        return False
+
+def insert_many_into_results_table(rows, chunk_size: int = RESULTS_INSERT_CHUNK_SIZE):
+    """
+    Bulk insert into Results.dbo.identified_names_team_beta.
+
+    rows: sequence of (entity_id, processed_name, encrypt_key, source, probability).
+    Each chunk is one set-based insert (fast_executemany) in its own transaction.
+    If a chunk fails it is rolled back and retried row by row so one bad record
+    does not fail its neighbours. Returns a list of per-row success flags.
+    """
+    outcomes = [False] * len(rows)
+    try:
+        with get_connection('Results') as conn, stage("insert"):
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            for start in range(0, len(rows), chunk_size):
+                params = [
+                    (entity_id, encrypt_key, source, processed_name, probability)
+                    for entity_id, processed_name, encrypt_key, source, probability in rows[start:start + chunk_size]
+                ]
+                try:
+                    cursor.executemany(RESULTS_INSERT_QUERY, params)
+                    conn.commit()
+                    outcomes[start:start + len(params)] = [True] * len(params)
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Chunk insert failed, retrying rows individually: {e}")
+                    for offset, row_params in enumerate(params):
+                        try:
+                            cursor.execute(RESULTS_INSERT_QUERY, row_params)
+                            conn.commit()
+                            outcomes[start + offset] = True
+                        except Exception as row_error:
+                            conn.rollback()
+                            print(f"Insert failed: {row_error}")
+    except Exception as e:
+        print(f"Insert failed: {e}")
+    failed = outcomes.count(False)
+    if failed:
+        count_event("insert_failed", failed)
+    return outcomes
@@ -0,0 +1,100 @@
+import importlib
+import threading
+import time
+
+# === Lazy Loading / Warm-up ===
+# Heavy subsystems (pandas analysis, matplotlib charts, numpy name index, the
+# LLM agent stack) are not imported when the app starts. Each one is a
+# LazyModule that imports on first attribute access; start_preload() warms
+# them in a background thread once the server is accepting requests, and
+# readiness() reports how far that has got.
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str, after_load=None):
+        self.__dict__["_name"] = name
+        self.__dict__["_after_load"] = after_load
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+        self.__dict__["_seconds"] = None
+        self.__dict__["_error"] = None
+
+    def load(self):
+        module = self.__dict__["_module"]
+        if module is not None:
+            return module
+        with self.__dict__["_lock"]:
+            if self.__dict__["_module"] is None:
+                start = time.perf_counter()
+                try:
+                    module = importlib.import_module(self._name)
+                    if self._after_load is not None:
+                        self._after_load(module)
+                except Exception as e:
+                    self.__dict__["_error"] = str(e)
+                    raise
+                self.__dict__["_seconds"] = time.perf_counter() - start
+                self.__dict__["_error"] = None
+                self.__dict__["_module"] = module
+        return self.__dict__["_module"]
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def status(self) -> dict:
+        seconds = self.__dict__["_seconds"]
+        return {
+            "loaded": self.loaded,
+            "load_seconds": round(seconds, 3) if seconds is not None else None,
+            "error": self.__dict__["_error"],
+        }
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self.load(), attribute, value)
+
+
+_registry = {}
+_preload_started = None
+_preload_finished = None
+
+
+def lazy_module(name: str, after_load=None) -> LazyModule:
+    """Register (or return) the lazy proxy for a module"""
+    if name not in _registry:
+        _registry[name] = LazyModule(name, after_load)
+    return _registry[name]
+
+
+def _preload():
+    global _preload_finished
+    for name, module in list(_registry.items()):
+        try:
+            module.load()
+        except Exception as e:
+            print(f"⚠️ Preloading {name} failed: {e}")
+    _preload_finished = time.time()
+    print(f"🔥 Warm-up finished in {_preload_finished - _preload_started:.2f}s")
+
+
+def start_preload():
+    """Import every registered module in a background thread"""
+    global _preload_started
+    if _preload_started is not None:
+        return
+    _preload_started = time.time()
+    threading.Thread(target=_preload, name="warmup", daemon=True).start()
+
+
+def readiness() -> dict:
+    modules = {name: module.status() for name, module in _registry.items()}
+    return {
+        "ready": all(status["loaded"] for status in modules.values()),
+        "warmup_seconds": round(_preload_finished - _preload_started, 3) if _preload_finished else None,
+        "modules": modules,
+    }